@@ -6,7 +6,7 @@ from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import async_engine_from_config
 
 from alembic import context
-from source.database.connection import build_url
+from source.database.connection import build_url, is_sqlite, shard_count
 from source.database.models import Base
 
 # this is the Alembic Config object, which provides
@@ -42,30 +42,36 @@ def run_migrations_offline() -> None:
     script output.
 
     """
-    context.configure(
-        url=build_url(),
-        target_metadata=target_metadata,
-        literal_binds=True,
-        dialect_opts={"paramstyle": "named"},
-    )
+    for shard in range(shard_count()):
+        config.attributes["shard"] = shard
+        context.configure(
+            url=build_url(shard),
+            target_metadata=target_metadata,
+            render_as_batch=is_sqlite(),
+            literal_binds=True,
+            dialect_opts={"paramstyle": "named"},
+        )
 
-    with context.begin_transaction():
-        context.run_migrations()
+        with context.begin_transaction():
+            context.run_migrations()
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    # SQLite can't ALTER most things; batch mode rebuilds the table instead (and autogenerates batch operations).
+    context.configure(connection=connection, target_metadata=target_metadata, render_as_batch=is_sqlite())
 
     with context.begin_transaction():
         context.run_migrations()
 
 
-async def run_async_migrations() -> None:
+async def run_async_migrations(shard: int) -> None:
     """In this scenario we need to create an Engine
     and associate a connection with the context.
 
     """
-    config.set_main_option("sqlalchemy.url", build_url())
+    # Migrations can read the shard being migrated from `op.get_context().config.attributes["shard"]`.
+    config.attributes["shard"] = shard
+    config.set_main_option("sqlalchemy.url", build_url(shard).replace("%", "%%"))
 
     connectable = async_engine_from_config(
         config.get_section(config.config_ini_section, {}),
@@ -80,9 +86,10 @@ async def run_async_migrations() -> None:
 
 
 def run_migrations_online() -> None:
-    """Run migrations in 'online' mode."""
+    """Run migrations in 'online' mode, on every database shard in turn."""
 
-    asyncio.run(run_async_migrations())
+    for shard in range(shard_count()):
+        asyncio.run(run_async_migrations(shard))
 
 
 if context.is_offline_mode():
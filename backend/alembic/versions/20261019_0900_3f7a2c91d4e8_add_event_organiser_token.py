@@ -0,0 +1,34 @@
+"""add event organiser token
+
+Revision ID: 3f7a2c91d4e8
+Revises: 9dfcb9cfa576
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f7a2c91d4e8"
+down_revision: str | Sequence[str] | None = "9dfcb9cfa576"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Batch operations are plain ALTERs on Postgres; SQLite cannot alter constraints, so there the table is rebuilt.
+    with op.batch_alter_table("event") as batch_op:
+        batch_op.add_column(sa.Column("organiser_token", sa.String(length=64), nullable=True))
+        batch_op.create_unique_constraint(op.f("event_organiser_token_key"), ["organiser_token"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("event") as batch_op:
+        batch_op.drop_constraint(op.f("event_organiser_token_key"), type_="unique")
+        batch_op.drop_column("organiser_token")
@@ -0,0 +1,40 @@
+"""add participant notified_at
+
+Revision ID: b81e4d07a2c5
+Revises: 3f7a2c91d4e8
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b81e4d07a2c5"
+down_revision: str | Sequence[str] | None = "3f7a2c91d4e8"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("participant", sa.Column("notified_at", sa.DateTime(timezone=True), nullable=True))
+    # Per-participant delivery wasn't recorded before; assume everyone with an email in a notified event got it.
+    op.execute(
+        """
+        UPDATE participant
+        SET notified_at = event.notified_at
+        FROM event
+        WHERE participant.event_id = event.id
+          AND event.notified_at IS NOT NULL
+          AND participant.email IS NOT NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("participant", "notified_at")
@@ -0,0 +1,29 @@
+"""add event draw task id
+
+Revision ID: 5c2d9e8f1b37
+Revises: b81e4d07a2c5
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5c2d9e8f1b37"
+down_revision: str | Sequence[str] | None = "b81e4d07a2c5"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("event", sa.Column("draw_task_id", sa.String(length=255), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("event", "draw_task_id")
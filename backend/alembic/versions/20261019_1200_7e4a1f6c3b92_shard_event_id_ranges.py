@@ -0,0 +1,47 @@
+"""shard event id ranges
+
+Revision ID: 7e4a1f6c3b92
+Revises: 5c2d9e8f1b37
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7e4a1f6c3b92"
+down_revision: str | Sequence[str] | None = "5c2d9e8f1b37"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Mirrors source.database.sharding.EVENT_ID_SHARD_SHIFT: shard N hands out event ids [N << 26, (N + 1) << 26).
+EVENT_ID_SHARD_SHIFT = 26
+
+
+def _shard() -> int:
+    config = op.get_context().config
+    return config.attributes.get("shard", 0) if config is not None else 0
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_context().dialect.name == "sqlite":
+        return  # a SQLite database is never sharded and has no sequences
+    shard = _shard()
+    first, last = max(1, shard << EVENT_ID_SHARD_SHIFT), ((shard + 1) << EVENT_ID_SHARD_SHIFT) - 1
+    if shard == 0:
+        # Existing events keep their ids; the sequence just must not run into shard 1.
+        op.execute(f"ALTER SEQUENCE event_id_seq MAXVALUE {last}")
+    else:
+        op.execute(
+            f"ALTER SEQUENCE event_id_seq MINVALUE {first} MAXVALUE {last} START WITH {first} RESTART WITH {first}"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_context().dialect.name == "sqlite":
+        return
+    op.execute("ALTER SEQUENCE event_id_seq NO MINVALUE NO MAXVALUE START WITH 1")
@@ -0,0 +1,47 @@
+"""add event participant_count and drawn_at
+
+Revision ID: a9d3c5e27f10
+Revises: 7e4a1f6c3b92
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a9d3c5e27f10"
+down_revision: str | Sequence[str] | None = "7e4a1f6c3b92"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("event", sa.Column("participant_count", sa.Integer(), server_default="0", nullable=False))
+    op.add_column("event", sa.Column("drawn_at", sa.DateTime(timezone=True), nullable=True))
+    op.execute(
+        """
+        UPDATE event
+        SET participant_count = counts.total
+        FROM (SELECT event_id, count(*) AS total FROM participant GROUP BY event_id) AS counts
+        WHERE event.id = counts.event_id
+        """
+    )
+    op.execute(
+        """
+        UPDATE event
+        SET drawn_at = draws.created_at
+        FROM (SELECT event_id, min(created_at) AS created_at FROM draw GROUP BY event_id) AS draws
+        WHERE event.id = draws.event_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("event", "drawn_at")
+    op.drop_column("event", "participant_count")
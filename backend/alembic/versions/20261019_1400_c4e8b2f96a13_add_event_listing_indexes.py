@@ -0,0 +1,58 @@
+"""add event listing indexes
+
+Revision ID: c4e8b2f96a13
+Revises: a9d3c5e27f10
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c4e8b2f96a13"
+down_revision: str | Sequence[str] | None = "a9d3c5e27f10"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# name -> partial index predicate on Postgres and on SQLite (None for the full index); mirrors the indexes declared
+# on the Event model.
+INDEXES = {
+    "ix_event_registration_deadline_id": (None, None),
+    "ix_event_open_registration_deadline_id": (
+        "is_draw_complete IS false AND notified_at IS NULL",
+        "is_draw_complete IS 0 AND notified_at IS NULL",
+    ),
+    "ix_event_drawn_registration_deadline_id": (
+        "is_draw_complete IS true AND notified_at IS NULL",
+        "is_draw_complete IS 1 AND notified_at IS NULL",
+    ),
+    "ix_event_notified_registration_deadline_id": ("notified_at IS NOT NULL", "notified_at IS NOT NULL"),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Built concurrently (outside the migration transaction) so writes to a large event table are not blocked.
+    with op.get_context().autocommit_block():
+        for name, (postgresql_where, sqlite_where) in INDEXES.items():
+            op.create_index(
+                name,
+                "event",
+                ["registration_deadline", "id"],
+                unique=False,
+                postgresql_where=sa.text(postgresql_where) if postgresql_where else None,
+                sqlite_where=sa.text(sqlite_where) if sqlite_where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.drop_index(name, table_name="event", postgresql_concurrently=True, if_exists=True)
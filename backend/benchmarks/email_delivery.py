@@ -0,0 +1,271 @@
+"""Throughput of ``PostMan.send_event_emails`` against an in-process fake Resend API."""
+
+# uv run python -m benchmarks.email_delivery --participants 5000 --latency-ms 80 --concurrency 1,4,16
+
+import asyncio
+import itertools
+import json
+import logging
+import platform
+import random
+import time
+from collections import Counter
+from types import SimpleNamespace
+from typing import Any
+
+import click
+import httpx
+import structlog
+
+from source.settings import LanguageSelection, Settings
+from source.utils.circuitbreaker import CircuitBreaker
+from source.utils.postman import EmailRecipient, PostMan
+
+
+class FakeResend:
+    """Answers like ``POST /emails`` on Resend, with configurable latency, throttling and failures."""
+
+    def __init__(
+        self,
+        *,
+        latency_ms: float,
+        jitter_ms: float,
+        throttle_rps: float | None,
+        retry_after_seconds: int,
+        error_rate_429: float,
+        error_rate_5xx: float,
+        timeout_rate: float,
+        seed: int,
+    ) -> None:
+        self._latency = latency_ms / 1000
+        self._jitter = jitter_ms / 1000
+        self._throttle_rps = throttle_rps
+        self._retry_after = retry_after_seconds
+        self._error_rate_429 = error_rate_429
+        self._error_rate_5xx = error_rate_5xx
+        self._timeout_rate = timeout_rate
+        self._random = random.Random(seed)
+        self._tokens = throttle_rps or 0.0
+        self._refilled_at = time.monotonic()
+        self._ids = itertools.count(1)
+        self.outcomes: Counter[str] = Counter()
+
+    def _take_token(self) -> bool:
+        if self._throttle_rps is None:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self._throttle_rps, self._tokens + (now - self._refilled_at) * self._throttle_rps)
+        self._refilled_at = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def _throttled(self) -> httpx.Response:
+        self.outcomes["429"] += 1
+        return httpx.Response(
+            429, json={"name": "rate_limit_exceeded"}, headers={"Retry-After": str(self._retry_after)}
+        )
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(max(0.0, self._latency + self._random.uniform(-self._jitter, self._jitter)))
+
+        if not self._take_token():
+            return self._throttled()
+        roll = self._random.random()
+        if roll < self._timeout_rate:
+            self.outcomes["timeout"] += 1
+            raise httpx.ReadTimeout("Fake provider timed out", request=request)
+        roll -= self._timeout_rate
+        if roll < self._error_rate_429:
+            return self._throttled()
+        roll -= self._error_rate_429
+        if roll < self._error_rate_5xx:
+            self.outcomes["503"] += 1
+            return httpx.Response(503, json={"name": "application_error"})
+
+        self.outcomes["200"] += 1
+        return httpx.Response(200, json={"id": f"fake-{next(self._ids)}"})
+
+
+def _fake_participants(count: int) -> list[EmailRecipient]:
+    return [
+        EmailRecipient(
+            name=f"Participant {i}",
+            email=f"participant-{i}@example.com",
+            language=LanguageSelection.PL if i % 3 else LanguageSelection.EN,
+            reveal_token=f"{i:043d}",
+        )
+        for i in range(count)
+    ]
+
+
+def _default(name: str) -> Any:
+    return Settings.model_fields[name].default
+
+
+def _postman_settings(*, max_retries: int, backoff_base_seconds: float, max_retry_sleep_seconds: float) -> Any:
+    # PostMan only reads these attributes, so the configured API key and sender are never used.
+    return SimpleNamespace(
+        email_from="Picko <picko@example.com>",
+        resend_api_key="re_benchmark",
+        cors_origins="https://picko.example.com",
+        app_name="Picko",
+        resend_max_retries=max_retries,
+        resend_backoff_base_seconds=backoff_base_seconds,
+        resend_max_retry_sleep_seconds=max_retry_sleep_seconds,
+        resend_min_interval_seconds=0.0,
+        resend_concurrency=1,
+        email_breaker_enabled=False,  # a fresh breaker is passed per run instead of the process-wide one
+    )
+
+
+def _new_breaker() -> CircuitBreaker:
+    return CircuitBreaker(
+        "email-benchmark",
+        window=_default("email_breaker_window"),
+        min_calls=_default("email_breaker_min_calls"),
+        failure_rate=_default("email_breaker_failure_rate"),
+        cooldown_seconds=_default("email_breaker_cooldown_seconds"),
+        half_open_probes=_default("email_breaker_half_open_probes"),
+    )
+
+
+async def _run_configuration(
+    provider: FakeResend,
+    participants: list[EmailRecipient],
+    *,
+    postman_settings: Any,
+    concurrency: int,
+    mode: str,
+    breaker: bool,
+) -> dict[str, Any]:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(provider.handle))
+    postman = PostMan(
+        postman_settings,
+        client=client,
+        defer_retries=mode == "deferred",
+        breaker=_new_breaker() if breaker else None,
+    )
+    started = time.perf_counter()
+    async with client, postman:
+        sent_to, failed, deferred = await postman.send_event_emails(
+            participants=participants, event_id=1, concurrency=concurrency
+        )
+    wall_seconds = time.perf_counter() - started
+
+    requests = sum(provider.outcomes.values())
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "breaker": breaker,
+        "messages": len(participants),
+        "delivered": len(sent_to),
+        "deferred": len(deferred),
+        "failed": failed,
+        "wall_seconds": round(wall_seconds, 3),
+        "messages_per_second": round(len(sent_to) / wall_seconds, 2) if wall_seconds > 0 else None,
+        "provider_requests": requests,
+        "retry_amplification": round(requests / len(participants), 3) if participants else None,
+        "provider_outcomes": dict(sorted(provider.outcomes.items())),
+    }
+
+
+def _parse_list(value: str, cast: type) -> list[Any]:
+    try:
+        return [cast(item.strip()) for item in value.split(",") if item.strip()]
+    except ValueError as exc:
+        raise click.BadParameter(str(exc)) from exc
+
+
+@click.command(context_settings={"help_option_names": ["-h", "--help"]})
+@click.option("--participants", default=5000, show_default=True, help="Emails sent per configuration.")
+@click.option("--concurrency", default="1,4,16", show_default=True, help="Comma-separated sends in flight.")
+@click.option("--mode", "modes", default="inline,deferred", show_default=True, help="Comma-separated retry modes.")
+@click.option("--breaker/--no-breaker", default=True, show_default=True, help="Send through a circuit breaker.")
+@click.option("--latency-ms", default=50.0, show_default=True, help="Provider response time.")
+@click.option("--jitter-ms", default=10.0, show_default=True, help="Uniform +/- jitter on the response time.")
+@click.option("--throttle-rps", type=float, default=None, help="Answer 429 above this request rate.")
+@click.option("--retry-after", default=1, show_default=True, help="Retry-After seconds sent with 429s.")
+@click.option("--error-rate-429", default=0.0, show_default=True, help="Share of requests rejected with 429.")
+@click.option("--error-rate-5xx", default=0.0, show_default=True, help="Share of requests failing with 503.")
+@click.option("--timeout-rate", default=0.0, show_default=True, help="Share of requests timing out.")
+@click.option("--max-retries", default=_default("resend_max_retries"), show_default=True, help="Inline retries.")
+@click.option("--backoff-base", default=_default("resend_backoff_base_seconds"), show_default=True, help="Seconds.")
+@click.option("--max-retry-sleep", default=_default("resend_max_retry_sleep_seconds"), show_default=True)
+@click.option("--seed", default=0, show_default=True, help="Seed for the injected failures.")
+@click.option("--label", default=None, help="Free-form label stored with the results, e.g. a release tag.")
+@click.option("--output", type=click.Path(dir_okay=False), default=None, help="Append the JSON results to this file.")
+def main(
+    participants: int,
+    concurrency: str,
+    modes: str,
+    breaker: bool,
+    latency_ms: float,
+    jitter_ms: float,
+    throttle_rps: float | None,
+    retry_after: int,
+    error_rate_429: float,
+    error_rate_5xx: float,
+    timeout_rate: float,
+    max_retries: int,
+    backoff_base: float,
+    max_retry_sleep: float,
+    seed: int,
+    label: str | None,
+    output: str | None,
+) -> None:
+    # PostMan logs every send; at thousands per second that would be the benchmark.
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.CRITICAL))
+
+    mode_values = _parse_list(modes, str)
+    if unknown := set(mode_values) - {"inline", "deferred"}:
+        raise click.BadParameter(f"Unknown mode(s): {', '.join(sorted(unknown))}", param_hint="--mode")
+
+    recipients = _fake_participants(participants)
+    postman_settings = _postman_settings(
+        max_retries=max_retries, backoff_base_seconds=backoff_base, max_retry_sleep_seconds=max_retry_sleep
+    )
+    provider_config = {
+        "latency_ms": latency_ms,
+        "jitter_ms": jitter_ms,
+        "throttle_rps": throttle_rps,
+        "retry_after_seconds": retry_after,
+        "error_rate_429": error_rate_429,
+        "error_rate_5xx": error_rate_5xx,
+        "timeout_rate": timeout_rate,
+    }
+
+    lines = []
+    for mode, limit in itertools.product(mode_values, _parse_list(concurrency, int)):
+        provider = FakeResend(**provider_config, seed=seed)
+        result = asyncio.run(
+            _run_configuration(
+                provider,
+                recipients,
+                postman_settings=postman_settings,
+                concurrency=limit,
+                mode=mode,
+                breaker=breaker,
+            )
+        )
+        line = json.dumps(
+            {
+                "benchmark": "email_delivery",
+                "label": label,
+                "python": platform.python_version(),
+                "provider": provider_config,
+                "max_retries": max_retries,
+                **result,
+            }
+        )
+        click.echo(line)
+        lines.append(line)
+
+    if output:
+        with open(output, "a", encoding="utf-8") as fh:
+            fh.writelines(f"{line}\n" for line in lines)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""HTTP load-testing harness for the Picko API, in-process or against a running server with ``--base-url``."""
+
+# uv run python -m benchmarks.load registration-burst --requests 2000 --concurrency 50
+
+import asyncio
+import datetime
+import itertools
+import json
+import platform
+import secrets
+import time
+from collections import Counter, defaultdict
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+import click
+import httpx
+
+
+@dataclass
+class PhaseStats:
+    latencies: list[float] = field(default_factory=list)
+    status_codes: Counter = field(default_factory=Counter)
+
+    def summary(self, elapsed_seconds: float) -> dict[str, Any]:
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+
+        def percentile(q: float) -> float | None:
+            if not latencies:
+                return None
+            return round(latencies[min(count - 1, int(q * count))] * 1000, 3)
+
+        return {
+            "requests": count,
+            "throughput_rps": round(count / elapsed_seconds, 2) if elapsed_seconds > 0 else None,
+            "latency_ms": {
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+                "max": round(latencies[-1] * 1000, 3) if latencies else None,
+                "mean": round(sum(latencies) / count * 1000, 3) if latencies else None,
+            },
+            "status_codes": {str(k): v for k, v in sorted(self.status_codes.items(), key=lambda kv: str(kv[0]))},
+        }
+
+
+@dataclass
+class LoadResult:
+    elapsed_seconds: float = 0.0
+    phases: dict[str, PhaseStats] = field(default_factory=lambda: defaultdict(PhaseStats))
+
+    def summary(self) -> dict[str, Any]:
+        overall = PhaseStats()
+        for stats in self.phases.values():
+            overall.latencies.extend(stats.latencies)
+            overall.status_codes.update(stats.status_codes)
+
+        result = {"elapsed_seconds": round(self.elapsed_seconds, 3), **overall.summary(self.elapsed_seconds)}
+        if len(self.phases) > 1:
+            result["phases"] = {name: stats.summary(self.elapsed_seconds) for name, stats in self.phases.items()}
+        return result
+
+
+async def run_load(
+    send: Callable[[int], Awaitable[httpx.Response]],
+    *,
+    concurrency: int,
+    requests: int | None = None,
+    duration_seconds: float | None = None,
+    phase: Callable[[], str] = lambda: "default",
+) -> LoadResult:
+    """Drive ``send`` from ``concurrency`` workers until ``requests`` were issued or ``duration_seconds`` elapsed."""
+    result = LoadResult()
+    counter = itertools.count()
+    started = time.perf_counter()
+
+    def should_continue(index: int) -> bool:
+        if requests is not None and index >= requests:
+            return False
+        return duration_seconds is None or time.perf_counter() - started < duration_seconds
+
+    async def worker() -> None:
+        while should_continue(index := next(counter)):
+            name = phase()
+            request_started = time.perf_counter()
+            try:
+                status_code: int | str = (await send(index)).status_code
+            except httpx.HTTPError as exc:
+                status_code = type(exc).__name__
+            stats = result.phases[name]
+            stats.latencies.append(time.perf_counter() - request_started)
+            stats.status_codes[status_code] += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.elapsed_seconds = time.perf_counter() - started
+    return result
+
+
+@asynccontextmanager
+async def open_client(base_url: str | None, *, timeout: float, protection: bool) -> AsyncIterator[httpx.AsyncClient]:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    if base_url:
+        async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+            yield client
+        return
+
+    from source.app import create_app
+    from source.settings import get_settings
+
+    if not protection:
+        # Read per request (rate limiting) and when the app and engines are built (admission control).
+        get_settings().rate_limit_enabled = False
+        get_settings().admission_control_enabled = False
+    application = create_app()
+    async with application.router.lifespan_context(application):
+        transport = httpx.ASGITransport(app=application)
+        async with httpx.AsyncClient(transport=transport, base_url="http://picko", timeout=timeout) as client:
+            yield client
+
+
+def _deadline_in(seconds: float) -> str:
+    return (datetime.datetime.now(datetime.UTC) + datetime.timedelta(seconds=seconds)).isoformat()
+
+
+async def _create_event(client: httpx.AsyncClient, *, deadline_in_seconds: float) -> dict[str, Any]:
+    response = await client.post(
+        "/event",
+        json={
+            "name": f"Load test {secrets.token_hex(4)}",
+            "currency": None,
+            "registration_deadline": _deadline_in(deadline_in_seconds),
+        },
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+async def _register(client: httpx.AsyncClient, token: str, name: str) -> httpx.Response:
+    return await client.post(f"/event/register/{token}", json={"name": name})
+
+
+async def _register_many(client: httpx.AsyncClient, token: str, count: int, *, concurrency: int) -> list[str]:
+    access_tokens: list[str] = []
+
+    async def send(index: int) -> httpx.Response:
+        response = await _register(client, token, f"participant-{index}")
+        if response.status_code == 201:
+            access_tokens.append(response.json()["access_token"])
+        return response
+
+    result = await run_load(send, concurrency=concurrency, requests=count)
+    if len(access_tokens) < count:
+        raise click.ClickException(
+            f"Setup registered {len(access_tokens)} of {count} participants; "
+            f"status codes: {result.summary()['status_codes']}."
+        )
+    return access_tokens
+
+
+async def _wait_until(deadline: str) -> None:
+    remaining = (datetime.datetime.fromisoformat(deadline) - datetime.datetime.now(datetime.UTC)).total_seconds()
+    await asyncio.sleep(max(0.0, remaining) + 0.1)
+
+
+async def scenario_registration_burst(
+    client: httpx.AsyncClient, *, requests: int, concurrency: int, participants: int, duration: float
+) -> LoadResult:
+    """Many distinct participants registering through the same registration token."""
+    event = await _create_event(client, deadline_in_seconds=3600)
+    token = event["registration_token"]
+    return await run_load(
+        lambda i: _register(client, token, f"burst-{i}-{secrets.token_hex(3)}"),
+        concurrency=concurrency,
+        requests=requests,
+    )
+
+
+async def scenario_reveal_storm(
+    client: httpx.AsyncClient, *, requests: int, concurrency: int, participants: int, duration: float
+) -> LoadResult:
+    """Everybody opening their reveal and status links right after the notification emails went out."""
+    event = await _create_event(client, deadline_in_seconds=max(2.0, participants / 200))
+    access_tokens = await _register_many(client, event["registration_token"], participants, concurrency=concurrency)
+    await _wait_until(event["registration_deadline"])
+
+    # Fetching the event after the deadline executes the draw and exposes the reveal tokens.
+    drawn = (await client.get(f"/event/{event['id']}")).raise_for_status().json()
+    reveal_tokens = [p["reveal_token"] for p in drawn["participants"] if p["reveal_token"]]
+    if not reveal_tokens:
+        raise click.ClickException("Draw did not produce any assignments; register at least two participants.")
+
+    def send(index: int) -> Awaitable[httpx.Response]:
+        if index % 2:
+            return client.get(f"/participant/me/{access_tokens[index % len(access_tokens)]}")
+        return client.get(f"/draw/reveal/{reveal_tokens[index % len(reveal_tokens)]}")
+
+    return await run_load(send, concurrency=concurrency, requests=requests)
+
+
+async def scenario_deadline_polling(
+    client: httpx.AsyncClient, *, requests: int, concurrency: int, participants: int, duration: float
+) -> LoadResult:
+    """Open event pages polling ``GET /event/{id}`` while the registration deadline passes."""
+    event = await _create_event(client, deadline_in_seconds=duration / 2)
+    await _register_many(client, event["registration_token"], participants, concurrency=concurrency)
+    deadline = datetime.datetime.fromisoformat(event["registration_deadline"])
+
+    def phase() -> str:
+        return "before_deadline" if datetime.datetime.now(datetime.UTC) <= deadline else "after_deadline"
+
+    return await run_load(
+        lambda _: client.get(f"/event/{event['id']}"),
+        concurrency=concurrency,
+        duration_seconds=duration,
+        phase=phase,
+    )
+
+
+SCENARIOS: dict[str, Callable[..., Awaitable[LoadResult]]] = {
+    "registration-burst": scenario_registration_burst,
+    "reveal-storm": scenario_reveal_storm,
+    "deadline-polling": scenario_deadline_polling,
+}
+
+
+@click.command(context_settings={"help_option_names": ["-h", "--help"]})
+@click.argument("scenario", type=click.Choice(sorted(SCENARIOS)))
+@click.option("--base-url", default=None, help="Target a running server instead of the in-process ASGI app.")
+@click.option("--requests", "requests_", default=1000, show_default=True, help="Measured requests to send.")
+@click.option("--concurrency", default=20, show_default=True, help="Concurrent in-flight requests.")
+@click.option("--participants", default=200, show_default=True, help="Participants registered during setup.")
+@click.option("--duration", default=10.0, show_default=True, help="Seconds to poll for deadline-polling.")
+@click.option(
+    "--protection/--no-protection",
+    default=False,
+    show_default=True,
+    help="Keep rate limiting and admission control on in the in-process app.",
+)
+@click.option("--timeout", default=30.0, show_default=True, help="Per-request timeout in seconds.")
+@click.option("--label", default=None, help="Free-form label stored with the result, e.g. a release tag.")
+@click.option("--output", type=click.Path(dir_okay=False), default=None, help="Append the JSON result to this file.")
+def main(
+    scenario: str,
+    base_url: str | None,
+    requests_: int,
+    concurrency: int,
+    participants: int,
+    duration: float,
+    protection: bool,
+    timeout: float,
+    label: str | None,
+    output: str | None,
+) -> None:
+    async def _run() -> LoadResult:
+        async with open_client(base_url, timeout=timeout, protection=protection) as client:
+            return await SCENARIOS[scenario](
+                client, requests=requests_, concurrency=concurrency, participants=participants, duration=duration
+            )
+
+    result = asyncio.run(_run())
+    record = {
+        "benchmark": "load",
+        "scenario": scenario,
+        "label": label,
+        "mode": "http" if base_url else "asgi",
+        "protection": protection if not base_url else None,
+        "concurrency": concurrency,
+        "recorded_at": datetime.datetime.now(datetime.UTC).isoformat(),
+        "python": platform.python_version(),
+        **result.summary(),
+    }
+    line = json.dumps(record)
+    click.echo(line)
+    if output:
+        with open(output, "a", encoding="utf-8") as fh:
+            fh.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""CPU cost of serving a large ``EventRead`` payload before and after the trusted JSON response path."""
+
+# uv run python -m benchmarks.serialization --participants 10000
+
+import asyncio
+import datetime
+import json
+import platform
+import time
+from types import SimpleNamespace
+
+import click
+import httpx
+from fastapi import FastAPI
+
+from source.endpoints.event import EventRead, ParticipantRead, build_event_response
+from source.settings import CurrencySelection, LanguageSelection
+from source.utils.responses import TrustedJSONResponse
+
+
+def _fake_event(participants: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=1,
+        name="Office Secret Santa",
+        max_amount=100,
+        date=datetime.date(2025, 12, 24),
+        currency=CurrencySelection.EUR,
+        registration_deadline=datetime.datetime(2025, 12, 20, 18, 0, tzinfo=datetime.UTC),
+        registration_token="r" * 43,
+        is_draw_complete=True,
+        participant_count=participants,
+        participants=[
+            SimpleNamespace(
+                id=i,
+                name=f"Participant {i}",
+                email=f"participant-{i}@example.com",
+                language=LanguageSelection.PL if i % 3 else LanguageSelection.EN,
+                wishlist="Warm socks, a good book and something homemade." if i % 2 else None,
+                given_assignments=[SimpleNamespace(reveal_token=f"{i:043d}")],
+            )
+            for i in range(participants)
+        ],
+    )
+
+
+def _build_validated_event_read(event: SimpleNamespace) -> EventRead:
+    # The previous path: a validated model per participant, revalidated by FastAPI through ``response_model``.
+    return EventRead(
+        id=event.id,
+        name=event.name,
+        max_amount=event.max_amount,
+        date=event.date,
+        currency=event.currency,
+        registration_deadline=event.registration_deadline,
+        registration_token=event.registration_token,
+        is_draw_complete=event.is_draw_complete,
+        participant_count=event.participant_count,
+        participants=[
+            ParticipantRead(
+                id=p.id,
+                name=p.name,
+                email=p.email,
+                language=p.language,
+                wishlist=p.wishlist,
+                reveal_token=p.given_assignments[0].reveal_token if p.given_assignments else None,
+            )
+            for p in event.participants
+        ],
+    )
+
+
+def _create_benchmark_app(event: SimpleNamespace) -> FastAPI:
+    application = FastAPI()
+
+    @application.get("/before", response_model=EventRead)
+    async def before() -> EventRead:
+        return _build_validated_event_read(event)
+
+    @application.get("/after", response_model=EventRead)
+    async def after() -> TrustedJSONResponse:
+        return TrustedJSONResponse(build_event_response(event))
+
+    return application
+
+
+async def _measure(client: httpx.AsyncClient, path: str, iterations: int) -> tuple[dict[str, float], bytes]:
+    body = (await client.get(path)).raise_for_status().content  # warm-up
+    cpu_samples = []
+    wall_started = time.perf_counter()
+    for _ in range(iterations):
+        cpu_started = time.process_time()
+        (await client.get(path)).raise_for_status()
+        cpu_samples.append(time.process_time() - cpu_started)
+    wall_seconds = time.perf_counter() - wall_started
+
+    cpu_samples.sort()
+    return {
+        "cpu_ms_mean": round(sum(cpu_samples) / iterations * 1000, 3),
+        "cpu_ms_p50": round(cpu_samples[iterations // 2] * 1000, 3),
+        "wall_ms_mean": round(wall_seconds / iterations * 1000, 3),
+    }, body
+
+
+@click.command(context_settings={"help_option_names": ["-h", "--help"]})
+@click.option("--participants", default=10_000, show_default=True, help="Participants in the serialized event.")
+@click.option("--iterations", default=20, show_default=True, help="Measured requests per variant.")
+def main(participants: int, iterations: int) -> None:
+    application = _create_benchmark_app(_fake_event(participants))
+
+    async def _run() -> dict[str, dict[str, float]]:
+        transport = httpx.ASGITransport(app=application)
+        async with httpx.AsyncClient(transport=transport, base_url="http://picko") as client:
+            before, before_body = await _measure(client, "/before", iterations)
+            after, after_body = await _measure(client, "/after", iterations)
+        if json.loads(before_body) != json.loads(after_body):
+            raise click.ClickException("Serialized payloads differ between the two paths.")
+        return {"before": before, "after": after}
+
+    results = asyncio.run(_run())
+    click.echo(
+        json.dumps(
+            {
+                "benchmark": "serialization",
+                "participants": participants,
+                "iterations": iterations,
+                "python": platform.python_version(),
+                **results,
+                "cpu_speedup": round(results["before"]["cpu_ms_mean"] / results["after"]["cpu_ms_mean"], 2),
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,34 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from source.endpoints.admin import router as admin_router
+from source.endpoints.debug import router as debug_router
 from source.endpoints.draw import router as draw_router
 from source.endpoints.event import router as event_router
 from source.endpoints.participant import router as participant_router
 from source.endpoints.status import router as status_router
+from source.middleware.admission import AdmissionControlMiddleware
+from source.middleware.profiling import QueryProfilerMiddleware
+from source.middleware.tracing import TracingMiddleware
 from source.settings import settings
+from source.utils.notifications import get_event_broadcaster
+from source.utils.tokenfilter import get_token_filter
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    if settings.token_filter_enabled:
+        get_token_filter().start()
+    try:
+        yield
+    finally:
+        if settings.token_filter_enabled:
+            await get_token_filter().stop()
+        if settings.event_stream_enabled:
+            await get_event_broadcaster().stop()
 
 
 def create_app() -> FastAPI:
@@ -14,14 +37,25 @@ def create_app() -> FastAPI:
         description="Lightweight Secret Santa app for randomized draws and link-based result sharing.",
         docs_url=None,
         redoc_url="/docs",
+        lifespan=lifespan,
     )
 
+    # Added first so it runs inside CORS: browsers can only read a 503 that carries the CORS headers.
+    if settings.admission_control_enabled:
+        application.add_middleware(AdmissionControlMiddleware)
     application.add_middleware(
         CORSMiddleware,
         allow_origins=[settings.cors_origins],
         allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     )
 
+    if settings.sql_profile_enabled:
+        application.add_middleware(QueryProfilerMiddleware)
+    if settings.trace_export_path:
+        application.add_middleware(TracingMiddleware)
+
+    application.include_router(admin_router)
+    application.include_router(debug_router)
     application.include_router(draw_router)
     application.include_router(event_router)
     application.include_router(participant_router)
@@ -1,4 +1,5 @@
 from celery import Celery
+from celery.schedules import crontab
 from kombu import Queue
 
 from source.settings import settings
@@ -15,3 +16,14 @@ celery_app.conf.task_default_routing_key = "default"
 celery_app.conf.worker_concurrency = settings.default_worker_concurrency
 
 celery_app.autodiscover_tasks(["source"], related_name="tasks")
+
+if settings.retention_schedule_enabled:
+    # Requires a beat process, e.g. `celery -A source.celery_app:celery_app worker -B`.
+    celery_app.conf.beat_schedule = {
+        "purge-expired-events": {"task": "purge_expired_events", "schedule": crontab(hour=4, minute=0)},
+    }
+
+if settings.admin_token:
+    from source.utils.debugging import install_task_profiling
+
+    install_task_profiling()
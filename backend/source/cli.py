@@ -1,18 +1,17 @@
+# Heavy subsystems (SQLAlchemy, Celery, the email client) are imported inside the commands that use them, so the
+# CLI starts quickly and `picko --help` works without any configuration.
 import asyncio
 import datetime
+from typing import IO, TYPE_CHECKING
 
 import click
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
-
-from source.celery_app import celery_app
-from source.database.connection import AsyncSessionLocal
-from source.database.models import Assignment, Event, Participant
-from source.database.operations import get_event
-from source.settings import settings
-from source.tasks.draw import draw
+
 from source.utils.datetime import ensure_utc
-from source.utils.postman import PostMan
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from source.database.models import Event
 
 
 def _parse_deadline(value: str) -> datetime.datetime:
@@ -26,19 +25,52 @@ def _parse_deadline(value: str) -> datetime.datetime:
     return ensure_utc(dt)
 
 
-async def _get_event_or_fail(session, event_id: int) -> Event:
-    if (event := await get_event(session, event_id=event_id)) is None:
+async def _get_event_or_fail(session: "AsyncSession", event_id: int, *, with_participants: bool = True) -> "Event":
+    from source.database.models import Event
+    from source.database.operations import get_event
+
+    if with_participants:
+        event = await get_event(session, event_id=event_id)
+    else:
+        event = await session.get(Event, event_id)
+
+    if event is None:
         raise click.ClickException(f"Event {event_id} not found")
     return event
 
 
-def _schedule_draw_task(event_id: int, deadline: datetime.datetime) -> None:
-    countdown = (
-        max(0, int((deadline - datetime.datetime.now(datetime.UTC)).total_seconds())) + settings.schedule_buffer_seconds
-    )
-    result = draw.apply_async(args=[event_id], countdown=countdown)
+async def _invalidate_registration_pages(registration_tokens: list[str]) -> None:
+    from source.utils.cache import invalidate_registration_page
+    from source.utils.redis import new_redis
+
+    async with new_redis() as redis:
+        for registration_token in registration_tokens:
+            await invalidate_registration_page(registration_token, redis=redis)
+
+
+async def _announce_tokens(tokens: list[str]) -> None:
+    from source.utils.redis import new_redis
+    from source.utils.tokenfilter import announce_tokens
+
+    async with new_redis() as redis:
+        await announce_tokens(tokens, redis=redis)
+
+
+async def _publish_participants_joined(event_id: int, participants: list[dict]) -> None:
+    from source.utils.notifications import PARTICIPANT_JOINED, publish_event_update
+    from source.utils.redis import new_redis
+
+    async with new_redis() as redis:
+        data = {"participants": [{"id": p["id"], "name": p["name"]} for p in participants]}
+        await publish_event_update(event_id, PARTICIPANT_JOINED, data, redis=redis)
 
-    click.echo(f"New task has been scheduled. UUID={result.id}")
+
+def _schedule_draw_task(event_id: int, deadline: datetime.datetime, task_id: str | None = None) -> None:
+    from source.utils.scheduling import schedule_draw
+
+    task_id = schedule_draw(event_id, deadline, task_id=task_id)
+
+    click.echo(f"New task has been scheduled. UUID={task_id}")
 
 
 @click.group(context_settings={"help_option_names": ["-h", "--help"]})
@@ -49,36 +81,136 @@ def cli() -> None:
 @cli.command("set-deadline")
 @click.argument("event_id", type=int)
 @click.argument("deadline", type=str)
-@click.option("--revoke-task-id", default=None, help="If provided, revoke this Celery task ID before scheduling.")
+@click.option(
+    "--revoke-task-id",
+    default=None,
+    help="Celery task ID to revoke before scheduling. Defaults to the draw task stored on the event.",
+)
 @click.option(
     "--terminate", is_flag=True, default=False, help="If revoking, also request termination if the task is running."
 )
 def set_deadline(event_id: int, deadline: str, revoke_task_id: str | None, terminate: bool) -> None:
+    import uuid
+
+    from source.database.connection import session_for_event
+
     new_deadline = _parse_deadline(deadline)
+    new_task_id = str(uuid.uuid4())
 
-    async def _run() -> None:
-        async with AsyncSessionLocal() as session:
-            event = await _get_event_or_fail(session, event_id)
+    async def _run() -> str | None:
+        async with session_for_event(event_id) as session:
+            event = await _get_event_or_fail(session, event_id, with_participants=False)
+            previous_task_id = event.draw_task_id
             event.registration_deadline = new_deadline
+            event.draw_task_id = new_task_id
             await session.commit()
+            await _invalidate_registration_pages([event.registration_token])
+            return previous_task_id
 
-    asyncio.run(_run())
+    previous_task_id = asyncio.run(_run())
 
     click.echo(f"Deadline updated successfully to {new_deadline.isoformat()}.")
 
-    if revoke_task_id:
+    if revoke_task_id := revoke_task_id or previous_task_id:
+        from source.celery_app import celery_app
+
         celery_app.control.revoke(revoke_task_id, terminate=terminate)
         click.echo(f"Task has been revoked (UUID={revoke_task_id}) with termination set to: {terminate}.")
 
-    _schedule_draw_task(event_id, new_deadline)
+    _schedule_draw_task(event_id, new_deadline, new_task_id)
+
+
+@cli.command("reschedule")
+@click.option("--deadline-from", default=None, help="Only events with a deadline at or after this ISO-8601 time.")
+@click.option("--deadline-to", default=None, help="Only events with a deadline at or before this ISO-8601 time.")
+@click.option("--set", "new_deadline", default=None, help="Move every selected deadline to this ISO-8601 time.")
+@click.option("--shift-minutes", type=int, default=None, help="Move every selected deadline by this many minutes.")
+@click.option(
+    "--revoke-only", is_flag=True, default=False, help="Revoke the pending draw tasks without scheduling new ones."
+)
+@click.option("--dry-run", is_flag=True, default=False, help="List the selected events without changing anything.")
+def reschedule(
+    deadline_from: str | None,
+    deadline_to: str | None,
+    new_deadline: str | None,
+    shift_minutes: int | None,
+    revoke_only: bool,
+    dry_run: bool,
+) -> None:
+    """Move the deadlines of undrawn, unnotified events in a deadline range and reschedule their draws."""
+    import uuid
+
+    from source.database.connection import new_session, shard_count
+    from source.database.operations import get_pending_draw_events, reschedule_pending_draws, set_draw_task_ids
+
+    if not revoke_only and not dry_run and (new_deadline is None) == (shift_minutes is None):
+        raise click.UsageError("Provide exactly one of --set or --shift-minutes (or use --revoke-only).")
+
+    lower = _parse_deadline(deadline_from) if deadline_from else None
+    upper = _parse_deadline(deadline_to) if deadline_to else None
+    target = _parse_deadline(new_deadline) if new_deadline else None
+    shift = datetime.timedelta(minutes=shift_minutes) if shift_minutes is not None else None
+
+    async def _run_shard(shard: int) -> list[tuple[int, datetime.datetime, str | None, str | None]]:
+        async with new_session(shard) as session:
+            if dry_run or revoke_only:
+                rows = await get_pending_draw_events(session, deadline_from=lower, deadline_to=upper)
+            else:
+                rows = await reschedule_pending_draws(
+                    session, deadline_from=lower, deadline_to=upper, new_deadline=target, shift=shift
+                )
+
+            # (event id, deadline, task to revoke, task to schedule)
+            plan = [(row.id, row.registration_deadline, row.draw_task_id, None) for row in rows]
+            if not revoke_only:
+                plan = [(event_id, dl, old, str(uuid.uuid4())) for event_id, dl, old, _ in plan]
+
+            if not dry_run:
+                await set_draw_task_ids(session, {event_id: new for event_id, _, _, new in plan})
+                await session.commit()
+                if not revoke_only:
+                    await _invalidate_registration_pages([row.registration_token for row in rows])
+            return plan
+
+    async def _run() -> list[tuple[int, datetime.datetime, str | None, str | None]]:
+        # One statement per shard.
+        return [item for shard in range(shard_count()) for item in await _run_shard(shard)]
+
+    plan = asyncio.run(_run())
+
+    for event_id, deadline, old_task_id, _ in plan:
+        click.echo(f"Event {event_id}: deadline {ensure_utc(deadline).isoformat()}, pending task {old_task_id}")
+    if dry_run or not plan:
+        click.echo(f"{len(plan)} events selected.")
+        return
+
+    from source.celery_app import celery_app
+    from source.utils.scheduling import schedule_draw
+
+    with celery_app.producer_or_acquire() as producer:
+        if revoke_ids := [old for _, _, old, _ in plan if old]:
+            celery_app.control.revoke(revoke_ids, connection=producer.connection)
+        if not revoke_only:
+            for event_id, deadline, _, new_task_id in plan:
+                schedule_draw(event_id, deadline, task_id=new_task_id, producer=producer)
+
+    action = "revoked" if revoke_only else "rescheduled"
+    click.echo(f"{len(plan)} events {action} ({len(revoke_ids)} pending tasks revoked).")
 
 
 @cli.command("resend-email")
 @click.argument("event_id", type=int)
 @click.argument("name", type=str)
 def resend_email(event_id: int, name: str) -> None:
+    from sqlalchemy import select
+    from sqlalchemy.orm import selectinload
+
+    from source.database.connection import session_for_event
+    from source.database.models import Assignment, Participant
+    from source.utils.postman import EmailRecipient, PostMan
+
     async def _run() -> None:
-        async with AsyncSessionLocal() as session:
+        async with session_for_event(event_id) as session:
             await _get_event_or_fail(session, event_id)
 
             result = await session.execute(
@@ -101,9 +233,13 @@ def resend_email(event_id: int, name: str) -> None:
                 raise click.ClickException(f"Participant '{name}' has no assignment (draw not complete?)")
 
             async with PostMan() as postman:
-                sent_to, skipped = await postman.send_event_emails(participants=[participant], event_id=event_id)
+                sent_to, _, _ = await postman.send_event_emails(
+                    participants=[EmailRecipient.from_participant(participant)], event_id=event_id
+                )
 
             if sent_to:
+                participant.notified_at = datetime.datetime.now(datetime.UTC)
+                await session.commit()
                 click.echo(f"Email sent successfully to {participant.email}.")
             else:
                 raise click.ClickException(f"Failed to send email to {participant.email}")
@@ -111,5 +247,235 @@ def resend_email(event_id: int, name: str) -> None:
     asyncio.run(_run())
 
 
+@cli.command("resend-event")
+@click.argument("event_id", type=int)
+@click.option("--only-failed", is_flag=True, default=False, help="Only email participants without a recorded delivery.")
+@click.option("--concurrency", default=4, show_default=True, help="Emails in flight at once.")
+def resend_event(event_id: int, only_failed: bool, concurrency: int) -> None:
+    from source.database.connection import session_for_event
+    from source.database.operations import mark_participants_notified, stream_email_recipients
+    from source.utils.postman import PostMan
+
+    async def _run() -> tuple[int, list[str], int]:
+        async with session_for_event(event_id) as session:
+            event = await _get_event_or_fail(session, event_id, with_participants=False)
+            if not event.is_draw_complete:
+                raise click.ClickException(f"The draw for event {event_id} has not taken place yet")
+
+            recipients = stream_email_recipients(session, event_id=event_id, only_unnotified=only_failed)
+            started_at = datetime.datetime.now(datetime.UTC)
+            async with PostMan() as postman:
+                # Retries happen in place here: the command is interactive and nothing else waits on it.
+                sent_to, skipped, _ = await postman.send_event_emails(
+                    participants=recipients, event_id=event_id, concurrency=concurrency
+                )
+
+            await mark_participants_notified(session, event_id=event_id, names=sent_to, notified_at=started_at)
+            await session.commit()
+            return len(sent_to) + skipped, sent_to, skipped
+
+    total, sent_to, skipped = asyncio.run(_run())
+
+    click.echo(f"Sent {len(sent_to)} of {total} emails; {skipped} skipped or failed.")
+    if skipped:
+        raise SystemExit(1)
+
+
+@cli.command("list-events")
+@click.option(
+    "--state", type=click.Choice(["open", "drawn", "notified"]), default=None, help="Only events in this state."
+)
+@click.option(
+    "--limit",
+    type=click.IntRange(min=1),
+    default=50,
+    show_default=True,
+    help="Events per page, up to event_list_max_page_size.",
+)
+@click.option("--after", "cursor", default=None, help="Cursor printed after the previous page.")
+@click.option("--all", "all_pages", is_flag=True, default=False, help="Follow the cursor to the last page.")
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["table", "ndjson"]),
+    default="table",
+    show_default=True,
+    help="Format.",
+)
+def list_events(state: str | None, limit: int, cursor: str | None, all_pages: bool, output_format: str) -> None:
+    """List events ordered by registration deadline, a page at a time."""
+    import json
+
+    from source.settings import EventStateSelection, settings
+    from source.utils.listing import event_state, list_events_page
+
+    # The upper bound is a setting, so it is checked here rather than in the option: `--help` needs no configuration.
+    if limit > settings.event_list_max_page_size:
+        raise click.BadParameter(f"At most {settings.event_list_max_page_size} per page.", param_hint="--limit")
+    state_filter = EventStateSelection(state) if state else None
+
+    async def _run() -> str | None:
+        next_cursor = cursor
+        while True:
+            try:
+                page = await list_events_page(limit=limit, cursor=next_cursor, state=state_filter)
+            except ValueError as exc:
+                raise click.BadParameter(str(exc), param_hint="--after") from exc
+            for row in page.events:
+                deadline = ensure_utc(row.registration_deadline).isoformat()
+                if output_format == "ndjson":
+                    record = {
+                        "id": row.id,
+                        "name": row.name,
+                        "registration_deadline": deadline,
+                        "participant_count": row.participant_count,
+                        "state": event_state(row),
+                    }
+                    click.echo(json.dumps(record, ensure_ascii=False))
+                else:
+                    click.echo(f"{row.id}\t{deadline}\t{event_state(row)}\t{row.participant_count}\t{row.name}")
+            next_cursor = page.next_cursor
+            if not all_pages or next_cursor is None:
+                return next_cursor
+
+    if (next_cursor := asyncio.run(_run())) is not None:
+        click.echo(f"More events: picko list-events --after {next_cursor}", err=True)
+
+
+_EXPORT_COLUMNS = (
+    "participant_id",
+    "name",
+    "email",
+    "language",
+    "wishlist",
+    "notified_at",
+    "receiver_name",
+    "reveal_token",
+)
+
+
+@cli.command("export")
+@click.argument("event_id", type=int)
+@click.option(
+    "--format", "file_format", type=click.Choice(["csv", "ndjson"]), default="csv", show_default=True, help="Format."
+)
+@click.option("--output", "-o", type=click.Path(dir_okay=False), default="-", help="Output file. Defaults to stdout.")
+@click.option("--batch-size", default=1000, show_default=True, help="Rows fetched from the database per round trip.")
+def export(event_id: int, file_format: str, output: str, batch_size: int) -> None:
+    import csv
+    import json
+
+    from source.database.connection import session_for_event
+    from source.database.operations import stream_event_export
+
+    async def _run(fh) -> int:
+        writer = csv.writer(fh)
+        if file_format == "csv":
+            writer.writerow(_EXPORT_COLUMNS)
+
+        count = 0
+        async with session_for_event(event_id) as session:
+            await _get_event_or_fail(session, event_id, with_participants=False)
+            async for row in stream_event_export(session, event_id=event_id, batch_size=batch_size):
+                values = [value.isoformat() if isinstance(value, datetime.datetime) else value for value in row]
+                if file_format == "csv":
+                    writer.writerow(values)
+                else:
+                    fh.write(json.dumps(dict(zip(_EXPORT_COLUMNS, values, strict=True)), ensure_ascii=False) + "\n")
+                count += 1
+        return count
+
+    with click.open_file(output, "w", encoding="utf-8", newline="") as fh:
+        count = asyncio.run(_run(fh))
+
+    click.echo(f"Exported {count} participants.", err=True)
+
+
+@cli.command("import")
+@click.argument("event_id", type=int)
+@click.argument("file", type=click.File("rb"))
+@click.option(
+    "--format",
+    "file_format",
+    type=click.Choice(["json", "csv"]),
+    default=None,
+    help="File format. Defaults to the file extension, falling back to JSON.",
+)
+def import_participants(event_id: int, file: IO[bytes], file_format: str | None) -> None:
+    import json
+
+    from source.database.connection import session_for_event
+    from source.utils.importing import ImportFormatError, parse_rows
+    from source.utils.importing import import_participants as import_rows
+
+    file_format = file_format or ("csv" if file.name.lower().endswith(".csv") else "json")
+    try:
+        rows = parse_rows(file.read(), file_format=file_format)
+    except ImportFormatError as exc:
+        raise click.ClickException(str(exc)) from exc
+
+    async def _run() -> dict:
+        async with session_for_event(event_id) as session:
+            event = await _get_event_or_fail(session, event_id)
+            if event.is_draw_complete:
+                raise click.ClickException(f"The draw for event {event_id} has already taken place")
+            report = await import_rows(session, event_id=event_id, rows=rows)
+            if report["imported"]:
+                await _announce_tokens([row["access_token"] for row in report["imported"]])
+                await _invalidate_registration_pages([event.registration_token])
+                await _publish_participants_joined(event_id, report["imported"])
+            return report
+
+    report = asyncio.run(_run())
+
+    click.echo(json.dumps(report, ensure_ascii=False, indent=2))
+    click.echo(f"Imported {len(report['imported'])} of {len(rows)} participants.", err=True)
+    if report["errors"]:
+        click.echo(f"{len(report['errors'])} rows were rejected; see the report above.", err=True)
+
+
+@cli.command("purge")
+@click.option(
+    "--older-than-days", type=click.IntRange(min=0), default=None, help="Defaults to the retention_days setting."
+)
+@click.option("--archive-dir", type=click.Path(file_okay=False), default=None, help="Where to write the archive.")
+@click.option("--batch-size", type=click.IntRange(min=1), default=None, help="Events deleted per transaction.")
+@click.option(
+    "--pause", "pause_seconds", type=click.FloatRange(min=0), default=None, help="Seconds to wait between batches."
+)
+@click.option("--max-batches", type=click.IntRange(min=1), default=None, help="Stop after this many batches.")
+@click.option("--dry-run", is_flag=True, default=False, help="Only count the events that would be purged.")
+def purge(
+    older_than_days: int | None,
+    archive_dir: str | None,
+    batch_size: int | None,
+    pause_seconds: float | None,
+    max_batches: int | None,
+    dry_run: bool,
+) -> None:
+    """Archive events notified long ago to compressed JSONL and delete them in throttled batches."""
+    from source.utils.retention import archive_and_purge, count_purgeable_events
+
+    if dry_run:
+        count = asyncio.run(count_purgeable_events(older_than_days=older_than_days))
+        click.echo(f"{count} events would be archived and deleted.")
+        return
+
+    result = asyncio.run(
+        archive_and_purge(
+            older_than_days=older_than_days,
+            archive_dir=archive_dir,
+            batch_size=batch_size,
+            pause_seconds=pause_seconds,
+            max_batches=max_batches,
+        )
+    )
+    click.echo(f"Archived and deleted {result.events} events in {result.batches} batches.")
+    if result.archive_path:
+        click.echo(f"Archive: {result.archive_path}")
+    if result.remaining:
+        click.echo("Stopped at --max-batches; more events are due for purging.")
+
+
 if __name__ == "__main__":
     cli()
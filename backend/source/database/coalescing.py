@@ -0,0 +1,102 @@
+import asyncio
+from dataclasses import dataclass
+from functools import cache
+from typing import Any
+
+from sqlalchemy import Row
+from sqlalchemy.exc import IntegrityError
+from structlog import get_logger
+
+from source.database.connection import new_session
+from source.database.models import Participant
+from source.database.operations import insert_participants, register_participant
+from source.settings import settings
+
+logger = get_logger()
+
+
+class DuplicateParticipantError(Exception):
+    """The name is already taken in the event, possibly by another registration in the same batch."""
+
+
+@dataclass
+class _PendingRegistration:
+    values: dict[str, Any]
+    future: asyncio.Future[Row | Participant]
+
+
+def _resolve(future: asyncio.Future[Row | Participant], outcome: Row | Participant | BaseException) -> None:
+    if future.done():  # the request went away meanwhile
+        return
+    if isinstance(outcome, BaseException):
+        future.set_exception(outcome)
+    else:
+        future.set_result(outcome)
+
+
+class RegistrationCoalescer:
+    """Group commit: registrations arriving within ``window_seconds`` of each other share one INSERT and one commit."""
+
+    def __init__(self, *, window_seconds: float, max_batch: int) -> None:
+        self._window_seconds = window_seconds
+        self._max_batch = max(1, max_batch)
+        self._pending: dict[int, list[_PendingRegistration]] = {}
+        self._timers: dict[int, asyncio.TimerHandle] = {}
+        self._writes: set[asyncio.Task[None]] = set()
+
+    async def register(self, *, shard: int, event_id: int, values: dict[str, Any]) -> Row | Participant:
+        """Queue a registration (``participant_values``) for ``event_id`` and wait for its batch to be committed."""
+        loop = asyncio.get_running_loop()
+        pending = _PendingRegistration({**values, "event_id": event_id}, loop.create_future())
+        batch = self._pending.setdefault(shard, [])
+        batch.append(pending)
+        if len(batch) >= self._max_batch:
+            self._flush(shard)
+        elif shard not in self._timers:
+            self._timers[shard] = loop.call_later(self._window_seconds, self._flush, shard)
+        return await pending.future
+
+    def _flush(self, shard: int) -> None:
+        if (timer := self._timers.pop(shard, None)) is not None:
+            timer.cancel()
+        if not (batch := self._pending.pop(shard, None)):
+            return
+        task = asyncio.create_task(self._write(shard, batch), name="registration-group-commit")
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def _write(self, shard: int, batch: list[_PendingRegistration]) -> None:
+        try:
+            async with new_session(shard) as session:
+                rows = await insert_participants(session, [pending.values for pending in batch])
+                await session.commit()
+        except Exception as exc:
+            logger.warning("Group commit failed; registering one by one", size=len(batch), error=str(exc))
+            await self._write_individually(shard, batch)
+            return
+
+        # Names repeated within the batch: the first registration gets the row, the later ones the conflict.
+        inserted = {(row.event_id, row.name): row for row in rows}
+        for pending in batch:
+            row = inserted.pop((pending.values["event_id"], pending.values["name"]), None)
+            _resolve(pending.future, row if row is not None else DuplicateParticipantError())
+
+    async def _write_individually(self, shard: int, batch: list[_PendingRegistration]) -> None:
+        for pending in batch:
+            try:
+                async with new_session(shard) as session:
+                    participant = await register_participant(session, **pending.values)
+            except IntegrityError:
+                _resolve(pending.future, DuplicateParticipantError())
+            except Exception as exc:
+                _resolve(pending.future, exc)
+            else:
+                _resolve(pending.future, participant)
+
+
+@cache
+def get_registration_coalescer() -> RegistrationCoalescer:
+    return RegistrationCoalescer(
+        window_seconds=settings.registration_coalesce_window_ms / 1000,
+        max_batch=settings.registration_coalesce_max_batch,
+    )
@@ -1,26 +1,104 @@
-from collections.abc import AsyncIterator
+import random
+from collections.abc import AsyncIterator, Mapping
+from functools import cache
+from typing import Any
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from starlette.requests import Request
 
+from source.database.pool import WaitTrackingQueuePool
+from source.database.profiling import install_query_profiler
+from source.database.sharding import MAX_SHARDS, shard_for_event_id, shard_for_token
+from source.database.sqlite import install_sqlite_pragmas
 from source.settings import settings
 
 
-def build_url() -> str:
-    return settings.database_url.replace("postgresql://", "postgresql+asyncpg://")
+def database_urls() -> list[str]:
+    """One URL per shard; shard 0 is ``database_url``, which holds every event created before sharding."""
+    urls = [settings.database_url, *settings.database_shard_urls]
+    if len(urls) > MAX_SHARDS:
+        raise ValueError(f"At most {MAX_SHARDS} database shards are supported.")
+    if len(urls) > 1 and any(url.startswith("sqlite") for url in urls):
+        raise ValueError("A SQLite database cannot be sharded; unset database_shard_urls.")
+    return urls
 
 
-ENGINE = create_async_engine(
-    build_url(),
-    pool_pre_ping=True,  # validates connections before use
-    pool_size=5,  # maximum number of persistent connections the pool keeps open
-    max_overflow=10,  # extra connections the pool can open temporarily if all pool_size connections are busy
-    pool_recycle=300,  # any connection older than 300 seconds (5 minutes) will be closed and replaced before reuse
-)
+def shard_count() -> int:
+    return len(database_urls())
 
 
-AsyncSessionLocal = async_sessionmaker(bind=ENGINE, expire_on_commit=False, autoflush=False)
+def is_sqlite() -> bool:
+    """Whether the app runs on an embedded SQLite database (single node) rather than Postgres."""
+    return settings.database_url.startswith("sqlite")
 
 
-async def get_session() -> AsyncIterator[AsyncSession]:
-    async with AsyncSessionLocal() as session:
+def build_url(shard: int = 0) -> str:
+    url = database_urls()[shard]
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url.replace("postgresql://", "postgresql+asyncpg://")
+
+
+@cache
+def get_engine(shard: int = 0) -> AsyncEngine:
+    if is_sqlite():
+        # Opening a file is cheap, and pooled aiosqlite connections keep a non-daemon thread each that would block
+        # interpreter exit after every ``asyncio.run`` (CLI commands, Celery tasks) unless the engine was disposed.
+        engine = create_async_engine(build_url(shard), poolclass=NullPool)
+        install_sqlite_pragmas(engine.sync_engine)
+    else:
+        engine = create_async_engine(
+            build_url(shard),
+            pool_pre_ping=True,  # validates connections before use
+            pool_size=5,  # maximum number of persistent connections the pool keeps open
+            max_overflow=10,  # extra connections the pool can open temporarily if all pool_size connections are busy
+            pool_recycle=300,  # any connection older than 300 seconds will be closed and replaced before reuse
+            # records checkout waits, which admission control sheds requests on
+            poolclass=WaitTrackingQueuePool if settings.admission_control_enabled else None,
+        )
+    if settings.sql_profile_enabled:
+        install_query_profiler(engine.sync_engine)
+    return engine
+
+
+@cache
+def get_sessionmaker(shard: int = 0) -> async_sessionmaker[AsyncSession]:
+    # The shard is kept on the session so operations can issue tokens routed back to it.
+    return async_sessionmaker(bind=get_engine(shard), expire_on_commit=False, autoflush=False, info={"shard": shard})
+
+
+def new_session(shard: int = 0) -> AsyncSession:
+    """Open a session on a shard's (lazily created) engine: ``async with new_session() as session: ...``"""
+    return get_sessionmaker(shard)()
+
+
+def _known_shard(shard: int) -> int:
+    # Unknown shards can only come from made-up ids or tokens; shard 0 then simply won't find them.
+    return shard if 0 <= shard < shard_count() else 0
+
+
+def session_for_event(event_id: int) -> AsyncSession:
+    return new_session(_known_shard(shard_for_event_id(event_id)))
+
+
+def session_for_token(token: str) -> AsyncSession:
+    return new_session(_known_shard(shard_for_token(token)))
+
+
+def shard_for_path_params(path_params: Mapping[str, Any]) -> int:
+    """Route a request by its ``event_id`` or token path parameter; new events go to a random shard."""
+    if (event_id := path_params.get("event_id")) is not None:
+        try:
+            return _known_shard(shard_for_event_id(int(event_id)))
+        except ValueError:
+            return 0
+    for name in ("token", "access_token"):
+        if (token := path_params.get(name)) is not None:
+            return _known_shard(shard_for_token(token))
+    return random.randrange(shard_count())
+
+
+async def get_session(request: Request) -> AsyncIterator[AsyncSession]:
+    async with new_session(shard_for_path_params(request.path_params)) as session:
         yield session
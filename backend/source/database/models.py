@@ -1,4 +1,4 @@
-from datetime import date, datetime
+from datetime import UTC, date, datetime
 
 from sqlalchemy import (
     Boolean,
@@ -7,11 +7,15 @@ from sqlalchemy import (
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     String,
+    TypeDecorator,
     UniqueConstraint,
     func,
+    text,
 )
+from sqlalchemy.engine import Dialect
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 from source.settings import CurrencySelection, LanguageSelection
@@ -21,9 +25,57 @@ class Base(DeclarativeBase):
     pass
 
 
+class UTCDateTime(TypeDecorator[datetime]):
+    """``timestamptz`` on Postgres; UTC on SQLite, read back as aware datetimes so both compare alike."""
+
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value: datetime | None, dialect: Dialect) -> datetime | None:
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(UTC)
+        return value
+
+    def process_result_value(self, value: datetime | None, dialect: Dialect) -> datetime | None:
+        if value is not None and value.tzinfo is None:
+            value = value.replace(tzinfo=UTC)
+        return value
+
+
+def _partial_index(name: str, *, postgresql_where: str, sqlite_where: str) -> Index:
+    # SQLite only uses a partial index when the query repeats its predicate as written, and SQLAlchemy renders
+    # boolean comparisons as 0/1 there.
+    return Index(
+        name,
+        "registration_deadline",
+        "id",
+        postgresql_where=text(postgresql_where),
+        sqlite_where=text(sqlite_where),
+    )
+
+
 class Event(Base):
     __tablename__ = "event"
-    __table_args__ = (CheckConstraint("max_amount > 0", name="ck_event_max_amount_positive"),)
+    __table_args__ = (
+        CheckConstraint("max_amount > 0", name="ck_event_max_amount_positive"),
+        # Keyset pagination of the event listing, overall and per state (see operations.event_state_filter).
+        Index("ix_event_registration_deadline_id", "registration_deadline", "id"),
+        _partial_index(
+            "ix_event_open_registration_deadline_id",
+            postgresql_where="is_draw_complete IS false AND notified_at IS NULL",
+            sqlite_where="is_draw_complete IS 0 AND notified_at IS NULL",
+        ),
+        _partial_index(
+            "ix_event_drawn_registration_deadline_id",
+            postgresql_where="is_draw_complete IS true AND notified_at IS NULL",
+            sqlite_where="is_draw_complete IS 1 AND notified_at IS NULL",
+        ),
+        _partial_index(
+            "ix_event_notified_registration_deadline_id",
+            postgresql_where="notified_at IS NOT NULL",
+            sqlite_where="notified_at IS NOT NULL",
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -34,10 +86,20 @@ class Event(Base):
     currency: Mapped[CurrencySelection | None] = mapped_column(Enum(CurrencySelection, length=3), nullable=True)
 
     # Registration
-    registration_deadline: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    registration_deadline: Mapped[datetime] = mapped_column(UTCDateTime(), nullable=False)
     registration_token: Mapped[str] = mapped_column(String(64), nullable=False, unique=True)
     is_draw_complete: Mapped[bool] = mapped_column(Boolean(), default=False, nullable=False)
-    notified_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    drawn_at: Mapped[datetime | None] = mapped_column(UTCDateTime(), nullable=True)
+    notified_at: Mapped[datetime | None] = mapped_column(UTCDateTime(), nullable=True)
+
+    # Kept in step with the participant rows by the operations that add them, so counting never loads the list.
+    participant_count: Mapped[int] = mapped_column(Integer(), default=0, server_default="0", nullable=False)
+
+    # Celery task id of the pending draw, so rescheduling can revoke it.
+    draw_task_id: Mapped[str | None] = mapped_column(String(255), nullable=True)
+
+    # Organiser credential for management endpoints; events created before it existed have none.
+    organiser_token: Mapped[str | None] = mapped_column(String(64), nullable=True, unique=True)
 
     # SQL Alchemy Relations
     participants: Mapped[list["Participant"]] = relationship(back_populates="event", cascade="all, delete-orphan")
@@ -61,6 +123,9 @@ class Participant(Base):
     )
     wishlist: Mapped[str | None] = mapped_column(String(1000), nullable=True)
 
+    # Set when the assignment email was accepted by the provider; NULL means never sent or failed.
+    notified_at: Mapped[datetime | None] = mapped_column(UTCDateTime(), nullable=True)
+
     # Personal access token - allows participant to view their own assignment
     access_token: Mapped[str] = mapped_column(String(64), nullable=False, unique=True)
 
@@ -85,7 +150,7 @@ class Draw(Base):
 
     event_id: Mapped[int] = mapped_column(ForeignKey("event.id", ondelete="CASCADE"), nullable=False, index=True)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True),
+        UTCDateTime(),
         nullable=False,
         server_default=func.now(),  # pylint: disable=not-callable
     )
@@ -1,19 +1,44 @@
-import secrets
-from datetime import UTC, datetime
+from collections import Counter
+from collections.abc import AsyncIterator, Collection, Sequence
+from datetime import UTC, datetime, timedelta
+from typing import Any
 
-from sqlalchemy import select
+from sqlalchemy import Row, Select, delete, func, select, text, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased, selectinload
 
 from source.database.models import Assignment, Draw, Event, Participant
-from source.settings import CurrencySelection, LanguageSelection
+from source.database.sharding import new_token
+from source.settings import CurrencySelection, EventStateSelection, LanguageSelection
 from source.utils.distribution import generate_derangement
+from source.utils.tokenfilter import token_may_exist
+
+
+def _shard(session: AsyncSession) -> int:
+    return session.info.get("shard", 0)
+
+
+def _is_sqlite(session: AsyncSession) -> bool:
+    return session.get_bind().dialect.name == "sqlite"
+
+
+# Any write takes SQLite's database-wide write lock; this one changes nothing.
+_SQLITE_WRITE_LOCK = text("UPDATE event SET id = id WHERE 0")
+
+
+async def _for_update(session: AsyncSession, query: Select, *, skip_locked: bool = False) -> Select:
+    """``query`` as ``SELECT ... FOR UPDATE``; SQLite has no row locks, so there the database write lock is taken."""
+    if _is_sqlite(session):
+        await session.execute(_SQLITE_WRITE_LOCK)
+        return query
+    return query.with_for_update(skip_locked=skip_locked)
 
 
 async def get_event(session: AsyncSession, *, event_id: int, lock: bool = False) -> Event | None:
     query = select(Event)
     if lock:
-        query = query.with_for_update()
+        query = await _for_update(session, query)
     query = query.options(
         selectinload(Event.participants).selectinload(Participant.given_assignments),
         selectinload(Event.draws),
@@ -22,7 +47,28 @@ async def get_event(session: AsyncSession, *, event_id: int, lock: bool = False)
     return (await session.execute(query)).scalar_one_or_none()
 
 
+async def get_event_summary(session: AsyncSession, *, event_id: int, lock: bool = False) -> Event | None:
+    """The event row alone, without participants or draws; relationships must not be accessed on the result."""
+    query = select(Event).where(Event.id == event_id)
+    if lock:
+        query = await _for_update(session, query)
+    return (await session.execute(query)).scalar_one_or_none()
+
+
+async def get_event_summary_by_registration_token(session: AsyncSession, *, registration_token: str) -> Event | None:
+    if not token_may_exist(registration_token):
+        return None
+    result = await session.execute(select(Event).where(Event.registration_token == registration_token))
+    return result.scalar_one_or_none()
+
+
+def is_draw_due(event: Event, now: datetime) -> bool:
+    return not event.is_draw_complete and now > event.registration_deadline and event.participant_count >= 2
+
+
 async def get_event_by_registration_token(session: AsyncSession, *, registration_token: str) -> Event | None:
+    if not token_may_exist(registration_token):
+        return None
     result = await session.execute(
         select(Event)
         .options(
@@ -42,6 +88,7 @@ async def create_event(
     max_amount: int | None = None,
     date=None,
     currency: CurrencySelection | None = None,
+    draw_task_id: str | None = None,
 ) -> Event:
     event = Event(
         name=name,
@@ -49,8 +96,10 @@ async def create_event(
         date=date,
         currency=currency,
         registration_deadline=registration_deadline,
-        registration_token=secrets.token_urlsafe(32),
+        registration_token=new_token(_shard(session)),
+        organiser_token=new_token(_shard(session)),
         is_draw_complete=False,
+        draw_task_id=draw_task_id,
     )
 
     session.add(event)
@@ -83,23 +132,170 @@ async def register_participant(
         email=email,
         language=language,
         wishlist=wishlist,
-        access_token=secrets.token_urlsafe(32),
+        access_token=new_token(_shard(session)),
     )
     session.add(participant)
+    await session.flush()
+    await _add_to_participant_count(session, event_id=event_id, delta=1)
     await session.commit()
     await session.refresh(participant)
     return participant
 
 
-async def execute_draw(session: AsyncSession, event: Event) -> None:
+async def _add_to_participant_count(session: AsyncSession, *, event_id: int, delta: int) -> None:
+    # A relative UPDATE, so concurrent registrations can't lose increments.
+    await session.execute(
+        update(Event)
+        .where(Event.id == event_id)
+        .values(participant_count=Event.participant_count + delta)
+        .execution_options(synchronize_session=False)
+    )
+
+
+# Keeps each INSERT well below the 32767 bind parameter limit of the Postgres protocol.
+_BULK_INSERT_CHUNK_SIZE = 1000
+
+
+def _insert_ignoring_taken_names(session: AsyncSession) -> Any:
+    if _is_sqlite(session):
+        return sqlite.insert(Participant).on_conflict_do_nothing(index_elements=["event_id", "name"])
+    return postgresql.insert(Participant).on_conflict_do_nothing(constraint="uq_participant_event_id_name")
+
+
+async def insert_participants(session: AsyncSession, participants: Sequence[dict[str, Any]]) -> list[Row]:
+    """Insert participants with multi-row INSERTs, skipping taken names, and bump the counters; the caller commits."""
+    values = [{**p, "access_token": new_token(_shard(session))} for p in participants]
+
+    inserted: list[Row] = []
+    for start in range(0, len(values), _BULK_INSERT_CHUNK_SIZE):
+        result = await session.execute(
+            _insert_ignoring_taken_names(session)
+            .values(values[start : start + _BULK_INSERT_CHUNK_SIZE])
+            .returning(
+                Participant.id,
+                Participant.name,
+                Participant.email,
+                Participant.language,
+                Participant.wishlist,
+                Participant.event_id,
+                Participant.access_token,
+            )
+        )
+        inserted.extend(result.all())
+
+    # In event id order, so concurrent batches touching the same events lock their rows in the same order.
+    for event_id, count in sorted(Counter(row.event_id for row in inserted).items()):
+        await _add_to_participant_count(session, event_id=event_id, delta=count)
+    return inserted
+
+
+async def register_participants_bulk(
+    session: AsyncSession, *, event_id: int, participants: Sequence[dict[str, Any]]
+) -> tuple[list[Row], set[str]]:
+    """Insert many participants in one transaction; returns the inserted rows and the names skipped as taken."""
+    inserted = await insert_participants(session, [{**p, "event_id": event_id} for p in participants])
+    await session.commit()
+
+    inserted_names = {row.name for row in inserted}
+    return inserted, {p["name"] for p in participants} - inserted_names
+
+
+def event_state_filter(state: EventStateSelection) -> list[Any]:
+    # Must stay in step with the partial listing indexes on ``Event`` for the planner to use them.
+    if state is EventStateSelection.OPEN:
+        return [Event.is_draw_complete.is_(False), Event.notified_at.is_(None)]
+    if state is EventStateSelection.DRAWN:
+        return [Event.is_draw_complete.is_(True), Event.notified_at.is_(None)]
+    return [Event.notified_at.is_not(None)]
+
+
+def _pending_draw_filter(*, deadline_from: datetime | None, deadline_to: datetime | None) -> list[Any]:
+    conditions = event_state_filter(EventStateSelection.OPEN)
+    if deadline_from is not None:
+        conditions.append(Event.registration_deadline >= deadline_from)
+    if deadline_to is not None:
+        conditions.append(Event.registration_deadline <= deadline_to)
+    return conditions
+
+
+async def get_pending_draw_events(
+    session: AsyncSession, *, deadline_from: datetime | None = None, deadline_to: datetime | None = None
+) -> Sequence[Row]:
+    """``(id, registration_deadline, draw_task_id)`` of undrawn, unnotified events in the deadline range."""
+    result = await session.execute(
+        select(Event.id, Event.registration_deadline, Event.draw_task_id)
+        .where(*_pending_draw_filter(deadline_from=deadline_from, deadline_to=deadline_to))
+        .order_by(Event.id)
+    )
+    return result.all()
+
+
+async def reschedule_pending_draws(
+    session: AsyncSession,
+    *,
+    deadline_from: datetime | None = None,
+    deadline_to: datetime | None = None,
+    new_deadline: datetime | None = None,
+    shift: timedelta | None = None,
+) -> Sequence[Row]:
+    """Move the deadline of every undrawn, unnotified event in the range in one UPDATE; the caller commits."""
+    if (new_deadline is None) == (shift is None):
+        raise ValueError("Provide exactly one of new_deadline or shift.")
+
+    result = await session.execute(
+        update(Event)
+        .where(*_pending_draw_filter(deadline_from=deadline_from, deadline_to=deadline_to))
+        .values(registration_deadline=new_deadline if new_deadline is not None else Event.registration_deadline + shift)
+        .returning(Event.id, Event.registration_deadline, Event.draw_task_id, Event.registration_token)
+        .execution_options(synchronize_session=False)
+    )
+    return result.all()
+
+
+async def list_events(
+    session: AsyncSession,
+    *,
+    limit: int,
+    after: tuple[datetime, int] | None = None,
+    state: EventStateSelection | None = None,
+) -> Sequence[Row]:
+    """Keyset page of up to ``limit`` events by ``(registration_deadline, id)``, starting after the ``after`` key."""
+    query = select(
+        Event.id,
+        Event.name,
+        Event.date,
+        Event.registration_deadline,
+        Event.participant_count,
+        Event.is_draw_complete,
+        Event.drawn_at,
+        Event.notified_at,
+    )
+    if state is not None:
+        query = query.where(*event_state_filter(state))
+    if after is not None:
+        query = query.where(tuple_(Event.registration_deadline, Event.id) > tuple_(*after))
+    result = await session.execute(query.order_by(Event.registration_deadline, Event.id).limit(limit))
+    return result.all()
+
+
+async def set_draw_task_ids(session: AsyncSession, task_ids: dict[int, str | None]) -> None:
+    """Store the scheduled draw task id per event id in one executemany; the caller commits."""
+    if task_ids:
+        await session.execute(
+            update(Event), [{"id": event_id, "draw_task_id": task_id} for event_id, task_id in task_ids.items()]
+        )
+
+
+async def execute_draw(session: AsyncSession, event: Event) -> list[str]:
+    """Draw the assignments of ``event`` and commit; returns the new reveal tokens (none if nothing was drawn)."""
     if event.is_draw_complete:
-        return  # Already done
+        return []  # Already done
 
     result = await session.execute(select(Participant).where(Participant.event_id == event.id).order_by(Participant.id))
     participants = list(result.scalars().all())
 
     if len(participants) < 2:
-        return  # Not enough participants
+        return []  # Not enough participants
 
     # Create the draw
     draw = Draw(event_id=event.id)
@@ -108,47 +304,100 @@ async def execute_draw(session: AsyncSession, event: Event) -> None:
 
     # Generate derangement and create assignments
     pairs = generate_derangement(participants)
+    reveal_tokens = []
     for giver, receiver in pairs:
         assignment = Assignment(
             draw_id=draw.id,
             giver_id=giver.id,
             receiver_id=receiver.id,
-            reveal_token=secrets.token_urlsafe(32),
+            reveal_token=new_token(_shard(session)),
         )
         session.add(assignment)
+        reveal_tokens.append(assignment.reveal_token)
 
     # Mark event as draw complete
     event.is_draw_complete = True
+    event.drawn_at = datetime.now(UTC)
     await session.commit()
+    return reveal_tokens
 
 
-async def get_event_and_maybe_draw(session: AsyncSession, *, event_id: int) -> Event | None:
-    event = await get_event(session, event_id=event_id)
-    if event is None:
-        return None
+async def stream_email_recipients(
+    session: AsyncSession,
+    *,
+    event_id: int,
+    only_unnotified: bool = False,
+    names: Collection[str] | None = None,
+    batch_size: int = 1000,
+) -> AsyncIterator[Row]:
+    """Yield each participant's ``name``, ``email``, ``language`` and ``reveal_token`` from a server-side cursor."""
+    # Finish (or close) the iteration before running other statements on the session.
+    query = (
+        select(Participant.name, Participant.email, Participant.language, Assignment.reveal_token)
+        .outerjoin(Assignment, Assignment.giver_id == Participant.id)
+        .where(Participant.event_id == event_id)
+        .order_by(Participant.id)
+        .execution_options(yield_per=batch_size)
+    )
+    if only_unnotified:
+        query = query.where(Participant.notified_at.is_(None))
+    if names is not None:
+        query = query.where(Participant.name.in_(names))
+    result = await session.stream(query)
+    async for row in result:
+        yield row
 
-    now = datetime.now(UTC)
-    if not event.is_draw_complete and now > event.registration_deadline and len(event.participants) >= 2:
-        await execute_draw(session, event)
-        # Reload to get the new assignments
-        event = await get_event(session, event_id=event_id)
 
-    return event
+async def count_unnotified_participants(session: AsyncSession, *, event_id: int) -> int:
+    result = await session.execute(
+        select(func.count())
+        .select_from(Participant)
+        .where(Participant.event_id == event_id, Participant.notified_at.is_(None))
+    )
+    return result.scalar_one()
 
 
-async def get_event_participants_with_assignments(session: AsyncSession, *, event_id: int) -> list[Participant]:
-    result = await session.execute(
-        select(Participant)
-        .options(
-            selectinload(Participant.given_assignments).selectinload(Assignment.receiver),
-            selectinload(Participant.event),
+async def mark_participants_notified(
+    session: AsyncSession, *, event_id: int, names: Collection[str], notified_at: datetime
+) -> None:
+    """Record a successful email delivery, keeping the first one; the caller commits."""
+    if not names:
+        return
+    await session.execute(
+        update(Participant)
+        .where(Participant.event_id == event_id, Participant.name.in_(names), Participant.notified_at.is_(None))
+        .values(notified_at=notified_at)
+    )
+
+
+async def stream_event_export(session: AsyncSession, *, event_id: int, batch_size: int = 1000) -> AsyncIterator[Row]:
+    """Yield one plain row per participant with their assignment, from a server-side cursor."""
+    receiver = aliased(Participant)
+    query = (
+        select(
+            Participant.id,
+            Participant.name,
+            Participant.email,
+            Participant.language,
+            Participant.wishlist,
+            Participant.notified_at,
+            receiver.name.label("receiver_name"),
+            Assignment.reveal_token,
         )
+        .outerjoin(Assignment, Assignment.giver_id == Participant.id)
+        .outerjoin(receiver, receiver.id == Assignment.receiver_id)
         .where(Participant.event_id == event_id)
+        .order_by(Participant.id)
+        .execution_options(yield_per=batch_size)
     )
-    return list(result.scalars().all())
+    result = await session.stream(query)
+    async for row in result:
+        yield row
 
 
 async def get_assignment_by_token(session: AsyncSession, *, reveal_token: str) -> Assignment | None:
+    if not token_may_exist(reveal_token):
+        return None
     result = await session.execute(
         select(Assignment)
         .options(
@@ -161,6 +410,8 @@ async def get_assignment_by_token(session: AsyncSession, *, reveal_token: str) -
 
 
 async def get_participant_by_access_token(session: AsyncSession, *, access_token: str) -> Participant | None:
+    if not token_may_exist(access_token):
+        return None
     result = await session.execute(
         select(Participant)
         .options(
@@ -170,3 +421,53 @@ async def get_participant_by_access_token(session: AsyncSession, *, access_token
         .where(Participant.access_token == access_token)
     )
     return result.scalar_one_or_none()
+
+
+async def count_tokens(session: AsyncSession) -> int:
+    """Registration, access and reveal tokens on the session's database."""
+    result = await session.execute(
+        select(
+            select(func.count()).select_from(Event).scalar_subquery()
+            + select(func.count()).select_from(Participant).scalar_subquery()
+            + select(func.count()).select_from(Assignment).scalar_subquery()
+        )
+    )
+    return result.scalar_one()
+
+
+async def stream_tokens(session: AsyncSession, *, batch_size: int = 10_000) -> AsyncIterator[str]:
+    """Yield every registration, access and reveal token on the session's database through server-side cursors."""
+    for column in (Event.registration_token, Participant.access_token, Assignment.reveal_token):
+        result = await session.stream_scalars(select(column).execution_options(yield_per=batch_size))
+        async for token in result:
+            yield token
+
+
+async def count_expired_events(session: AsyncSession, *, notified_before: datetime) -> int:
+    result = await session.execute(select(func.count()).select_from(Event).where(Event.notified_at < notified_before))
+    return result.scalar_one()
+
+
+async def get_expired_event_ids(session: AsyncSession, *, notified_before: datetime, limit: int) -> list[int]:
+    """Oldest events notified before the cutoff, locked so concurrent purges skip them instead of waiting."""
+    query = select(Event.id).where(Event.notified_at < notified_before).order_by(Event.id).limit(limit)
+    result = await session.execute(await _for_update(session, query, skip_locked=True))
+    return list(result.scalars().all())
+
+
+async def get_events_for_archive(session: AsyncSession, *, event_ids: Sequence[int]) -> list[Event]:
+    result = await session.execute(
+        select(Event)
+        .options(selectinload(Event.participants), selectinload(Event.draws).selectinload(Draw.assignments))
+        .where(Event.id.in_(event_ids))
+        .order_by(Event.id)
+    )
+    return list(result.scalars().all())
+
+
+async def delete_events(session: AsyncSession, *, event_ids: Sequence[int]) -> int:
+    """Delete events by id; participants, draws and assignments go with them via ON DELETE CASCADE."""
+    result = await session.execute(
+        delete(Event).where(Event.id.in_(event_ids)).execution_options(synchronize_session=False)
+    )
+    return result.rowcount
@@ -0,0 +1,61 @@
+import itertools
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from functools import cache
+from typing import Any
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from source.settings import settings
+
+
+class PoolWaitTracker:
+    """How long checkouts of a pooled connection have been waiting in this process, across every engine."""
+
+    def __init__(self, *, window_seconds: float) -> None:
+        self._window_seconds = window_seconds
+        self._ids = itertools.count()
+        self._waiting: dict[int, float] = {}  # checkout id -> start, oldest first
+        self._completed: deque[tuple[float, float]] = deque()  # (finished at, seconds waited)
+        self._completed_total = 0.0
+
+    @contextmanager
+    def measure(self) -> Iterator[None]:
+        checkout, start = next(self._ids), time.monotonic()
+        self._waiting[checkout] = start
+        try:
+            yield
+        finally:
+            del self._waiting[checkout]
+            now = time.monotonic()
+            self._completed.append((now, now - start))
+            self._completed_total += now - start
+            self._expire(now)
+
+    def _expire(self, now: float) -> None:
+        while self._completed and self._completed[0][0] < now - self._window_seconds:
+            self._completed_total -= self._completed.popleft()[1]
+
+    def current_wait(self) -> float:
+        # The longer of the oldest checkout still waiting and the mean of those completed in the window, so it
+        # drops back to zero on its own once nothing queues any more.
+        now = time.monotonic()
+        self._expire(now)
+        oldest = now - next(iter(self._waiting.values())) if self._waiting else 0.0
+        mean = max(0.0, self._completed_total / len(self._completed)) if self._completed else 0.0
+        return max(oldest, mean)
+
+
+@cache
+def get_pool_wait_tracker() -> PoolWaitTracker:
+    return PoolWaitTracker(window_seconds=settings.admission_pool_wait_window_seconds)
+
+
+class WaitTrackingQueuePool(AsyncAdaptedQueuePool):
+    """The default asyncio pool, recording how long each checkout waits (pre-ping included) for admission control."""
+
+    def connect(self) -> Any:
+        with get_pool_wait_tracker().measure():
+            return super().connect()
@@ -0,0 +1,140 @@
+import heapq
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.engine.interfaces import DBAPICursor, ExecutionContext
+from structlog import get_logger
+
+from source.settings import settings
+
+logger = get_logger()
+
+_STATEMENT_PREVIEW_LENGTH = 500
+
+# Profiles are stacked so that a test budget can be asserted inside a request that is already being profiled.
+_active_profiles: ContextVar[tuple["QueryProfile", ...]] = ContextVar("picko_query_profiles", default=())
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@dataclass
+class QueryProfile:
+    label: str
+    slowest_limit: int = 3
+    statements: int = 0
+    total_seconds: float = 0.0
+    executed: list[str] | None = None  # every statement, kept only for budget assertions
+    _slowest: list[tuple[float, int, str]] = field(default_factory=list, repr=False)
+
+    def record(self, statement: str, duration_seconds: float) -> None:
+        self.statements += 1
+        self.total_seconds += duration_seconds
+        if self.executed is not None:
+            self.executed.append(statement)
+
+        # Min-heap keyed by duration keeps only the N slowest statements; the counter breaks ties.
+        entry = (duration_seconds, self.statements, statement)
+        if len(self._slowest) < self.slowest_limit:
+            heapq.heappush(self._slowest, entry)
+        elif self._slowest and duration_seconds > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def slowest(self) -> list[dict[str, Any]]:
+        return [
+            {"duration_ms": round(duration * 1000, 2), "statement": statement[:_STATEMENT_PREVIEW_LENGTH]}
+            for duration, _, statement in sorted(self._slowest, reverse=True)
+        ]
+
+    def is_above_threshold(self, *, min_statements: int, min_seconds: float) -> bool:
+        return self.statements >= min_statements or self.total_seconds >= min_seconds
+
+
+def _before_cursor_execute(
+    conn: Connection,
+    cursor: DBAPICursor,
+    statement: str,
+    parameters: Any,
+    context: ExecutionContext | None,
+    executemany: bool,
+) -> None:
+    if context is not None and _active_profiles.get():
+        context.picko_query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(
+    conn: Connection,
+    cursor: DBAPICursor,
+    statement: str,
+    parameters: Any,
+    context: ExecutionContext | None,
+    executemany: bool,
+) -> None:
+    if not (profiles := _active_profiles.get()):
+        return
+    if (started_at := getattr(context, "picko_query_started_at", None)) is None:
+        return  # Profiling started while the statement was in flight.
+
+    duration = time.perf_counter() - started_at
+    for profile in profiles:
+        profile.record(statement, duration)
+
+
+def install_query_profiler(engine: Engine) -> None:
+    """Attach the statement timing hooks to a sync engine (``engine.sync_engine`` of an async one)."""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def _activate(profile: QueryProfile) -> Iterator[QueryProfile]:
+    token = _active_profiles.set((*_active_profiles.get(), profile))
+    try:
+        yield profile
+    finally:
+        _active_profiles.reset(token)
+
+
+@contextmanager
+def profile_queries(label: str, **log_context: Any) -> Iterator[QueryProfile]:
+    """Record the statements executed in this context and log a summary when they cross the configured thresholds."""
+    profile = QueryProfile(label=label, slowest_limit=settings.sql_profile_slowest_count)
+    try:
+        with _activate(profile):
+            yield profile
+    finally:
+        if profile.is_above_threshold(
+            min_statements=settings.sql_profile_log_min_statements,
+            min_seconds=settings.sql_profile_log_min_seconds,
+        ):
+            logger.warning(
+                "Query profile above threshold",
+                label=profile.label,
+                statements=profile.statements,
+                total_db_ms=round(profile.total_seconds * 1000, 2),
+                slowest=profile.slowest(),
+                **log_context,
+            )
+
+
+@contextmanager
+def assert_query_budget(max_statements: int, *, label: str = "query budget") -> Iterator[QueryProfile]:
+    """Test helper failing when the wrapped block executes more than ``max_statements`` statements."""
+    profile = QueryProfile(label=label, executed=[])
+    with _activate(profile):
+        yield profile
+
+    if profile.statements > max_statements:
+        executed = "\n".join(f"  {i}. {s[:_STATEMENT_PREVIEW_LENGTH]}" for i, s in enumerate(profile.executed, 1))
+        raise QueryBudgetExceeded(
+            f"{label}: executed {profile.statements} statements, budget is {max_statements}.\n{executed}"
+        )
@@ -0,0 +1,34 @@
+"""Shard routing: the shard is encoded in event ids (high bits) and in tokens (a two hex digit prefix)."""
+# Ids and tokens issued before sharding carry no shard and resolve to shard 0.
+
+import secrets
+
+# Event ids below 2**26 belong to shard 0, the next 2**26 to shard 1 and so on; int4 ids leave room for 32 shards.
+EVENT_ID_SHARD_SHIFT = 26
+MAX_SHARDS = 32
+
+# secrets.token_urlsafe(32) is 43 characters; sharded tokens prefix it with the shard as two hex digits.
+_LEGACY_TOKEN_LENGTH = 43
+_TOKEN_PREFIX_LENGTH = 2
+
+
+def event_id_range(shard: int) -> tuple[int, int]:
+    """First and last event id of ``shard``, used to configure each database's ``event_id_seq``."""
+    return max(1, shard << EVENT_ID_SHARD_SHIFT), ((shard + 1) << EVENT_ID_SHARD_SHIFT) - 1
+
+
+def shard_for_event_id(event_id: int) -> int:
+    return event_id >> EVENT_ID_SHARD_SHIFT
+
+
+def new_token(shard: int) -> str:
+    return f"{shard:02x}{secrets.token_urlsafe(32)}"
+
+
+def shard_for_token(token: str) -> int:
+    if len(token) != _LEGACY_TOKEN_LENGTH + _TOKEN_PREFIX_LENGTH:
+        return 0
+    try:
+        return int(token[:_TOKEN_PREFIX_LENGTH], 16)
+    except ValueError:
+        return 0
@@ -0,0 +1,27 @@
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from source.settings import settings
+
+
+def _set_pragmas(dbapi_connection: Any, _: Any) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        # WAL lets readers run alongside the single writer; with it NORMAL sync is still safe against corruption.
+        cursor.execute("PRAGMA journal_mode = WAL")
+        cursor.execute("PRAGMA synchronous = NORMAL")
+        # Off by default in SQLite; the schema relies on ON DELETE CASCADE.
+        cursor.execute("PRAGMA foreign_keys = ON")
+        cursor.execute(f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout_ms)}")
+        cursor.execute(f"PRAGMA cache_size = -{int(settings.sqlite_cache_size_kib)}")
+        cursor.execute(f"PRAGMA mmap_size = {int(settings.sqlite_mmap_size_bytes)}")
+        cursor.execute("PRAGMA temp_store = MEMORY")
+    finally:
+        cursor.close()
+
+
+def install_sqlite_pragmas(engine: Engine) -> None:
+    """Tune every new connection of a SQLite ``engine`` for a web application: WAL, foreign keys and a busy timeout."""
+    event.listen(engine, "connect", _set_pragmas)
@@ -0,0 +1,60 @@
+import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel
+
+from source.settings import EventStateSelection, settings
+from source.utils.auth import require_admin
+from source.utils.listing import event_state, list_events_page
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+
+class EventListItem(BaseModel):
+    id: int
+    name: str
+    date: datetime.date | None
+    registration_deadline: datetime.datetime
+    participant_count: int
+    state: EventStateSelection
+    drawn_at: datetime.datetime | None
+    notified_at: datetime.datetime | None
+
+
+class EventList(BaseModel):
+    events: list[EventListItem]
+    next_cursor: str | None
+
+
+@router.get("/events", status_code=status.HTTP_200_OK)
+async def list_events(
+    state: EventStateSelection | None = None,
+    limit: int = Query(default=50, ge=1),
+    cursor: str | None = None,
+) -> EventList:
+    """Events across all shards by registration deadline; pass a page's ``next_cursor`` as ``cursor`` for the next."""
+    if limit > settings.event_list_max_page_size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"At most {settings.event_list_max_page_size} per page."
+        )
+    try:
+        page = await list_events_page(limit=limit, cursor=cursor, state=state)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+    return EventList(
+        events=[
+            EventListItem(
+                id=row.id,
+                name=row.name,
+                date=row.date,
+                registration_deadline=row.registration_deadline,
+                participant_count=row.participant_count,
+                state=event_state(row),
+                drawn_at=row.drawn_at,
+                notified_at=row.notified_at,
+            )
+            for row in page.events
+        ],
+        next_cursor=page.next_cursor,
+    )
@@ -0,0 +1,93 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from pydantic import BaseModel
+
+from source.settings import settings
+from source.utils.auth import require_admin
+from source.utils.debugging import (
+    MemoryGrouping,
+    ProfileMode,
+    ProfilerBusyError,
+    ProfileResult,
+    arm_task_profiling,
+    get_task_profile,
+    list_task_profiles,
+    profile_session,
+)
+
+router = APIRouter(prefix="/debug", tags=["Debug"], dependencies=[Depends(require_admin)])
+
+
+class TaskProfilingArmed(BaseModel):
+    session: str
+    mode: ProfileMode
+    count: int
+    task: str | None
+    expires_seconds: int
+
+
+class TaskProfileInfo(BaseModel):
+    task_id: str
+    task: str
+    mode: ProfileMode
+    seconds: float
+    bytes: int
+    finished_at: float
+
+
+def _download(data: bytes, *, media_type: str, filename: str) -> Response:
+    return Response(
+        content=data, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.post("/profile", status_code=status.HTTP_200_OK)
+async def profile_worker(
+    mode: ProfileMode = ProfileMode.SAMPLING,
+    seconds: float = Query(default=10.0, gt=0),
+    top: int = Query(default=25, ge=1, le=1000),
+    group_by: MemoryGrouping = MemoryGrouping.LINENO,
+) -> Response:
+    """Profile the API worker answering this request for ``seconds`` and download the result."""
+    if seconds > settings.debug_max_profile_seconds:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.debug_max_profile_seconds:g} seconds.",
+        )
+    try:
+        with profile_session(mode, top=top, group_by=group_by) as result:
+            await asyncio.sleep(seconds)
+    except ProfilerBusyError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
+    return _download(result.data, media_type=result.media_type, filename=result.filename)
+
+
+@router.post("/tasks", status_code=status.HTTP_201_CREATED)
+async def arm_tasks(
+    mode: ProfileMode = ProfileMode.CPROFILE,
+    count: int = Query(default=1, ge=1, le=100),
+    task: str | None = None,
+    expires_seconds: int = Query(default=15 * 60, ge=1, le=24 * 60 * 60),
+    top: int = Query(default=25, ge=1, le=1000),
+    group_by: MemoryGrouping = MemoryGrouping.LINENO,
+) -> TaskProfilingArmed:
+    """Profile the next ``count`` Celery tasks (e.g. ``task=draw``) on whichever workers run them."""
+    session = await arm_task_profiling(
+        mode, count=count, task=task, expires_seconds=expires_seconds, top=top, group_by=group_by
+    )
+    return TaskProfilingArmed(session=session, mode=mode, count=count, task=task, expires_seconds=expires_seconds)
+
+
+@router.get("/tasks/{session}", status_code=status.HTTP_200_OK)
+async def list_tasks(session: str) -> list[TaskProfileInfo]:
+    return [TaskProfileInfo.model_validate(entry) for entry in await list_task_profiles(session)]
+
+
+@router.get("/tasks/{session}/{task_id}", status_code=status.HTTP_200_OK)
+async def download_task(session: str, task_id: str) -> Response:
+    if (profile := await get_task_profile(session, task_id)) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found or expired.")
+    meta, data = profile
+    result = ProfileResult(ProfileMode(meta["mode"]), data)
+    return _download(result.data, media_type=result.media_type, filename=f"{task_id}-{result.filename}")
@@ -7,6 +7,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from source.database.connection import get_session
 from source.database.operations import get_assignment_by_token
 from source.settings import CurrencySelection
+from source.utils.ratelimit import RateLimit
+from source.utils.responses import TrustedJSONResponse
 
 router = APIRouter(prefix="/draw", tags=["Draw"])
 
@@ -29,22 +31,29 @@ class AssignmentReveal(BaseModel):
     event: EventInfo
 
 
-@router.get("/reveal/{token}", status_code=status.HTTP_200_OK, response_model=AssignmentReveal)
-async def get(token: str, session: AsyncSession = Depends(get_session)) -> AssignmentReveal:
+@router.get(
+    "/reveal/{token}",
+    status_code=status.HTTP_200_OK,
+    response_model=AssignmentReveal,
+    dependencies=[Depends(RateLimit("lookup"))],
+)
+async def get(token: str, session: AsyncSession = Depends(get_session)) -> TrustedJSONResponse:
     if not (assignment := await get_assignment_by_token(session, reveal_token=token)):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Assignment not found. The link may be invalid or expired.",
         )
 
-    return AssignmentReveal(
-        giver_name=assignment.giver.name,
-        receiver_name=assignment.receiver.name,
-        receiver_wishlist=assignment.receiver.wishlist,
-        event=EventInfo(
-            name=assignment.giver.event.name,
-            date=assignment.giver.event.date,
-            max_amount=assignment.giver.event.max_amount,
-            currency=assignment.giver.event.currency,
-        ),
+    return TrustedJSONResponse(
+        AssignmentReveal(
+            giver_name=assignment.giver.name,
+            receiver_name=assignment.receiver.name,
+            receiver_wishlist=assignment.receiver.wishlist,
+            event=EventInfo(
+                name=assignment.giver.event.name,
+                date=assignment.giver.event.date,
+                max_amount=assignment.giver.event.max_amount,
+                currency=assignment.giver.event.currency,
+            ),
+        )
     )
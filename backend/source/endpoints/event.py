@@ -1,26 +1,56 @@
 import datetime
-
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel, ConfigDict, EmailStr, Field
+import secrets
+import uuid
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from pydantic import BaseModel, ConfigDict, Field
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from structlog import get_logger
 
-from source.database.connection import get_session
+from source.database.coalescing import DuplicateParticipantError, get_registration_coalescer
+from source.database.connection import get_session, session_for_event
 from source.database.models import Event
 from source.database.operations import (
     create_event,
-    get_event_and_maybe_draw,
+    execute_draw,
+    get_event,
     get_event_by_registration_token,
+    get_event_summary,
+    get_event_summary_by_registration_token,
+    is_draw_due,
     register_participant,
 )
 from source.settings import CurrencySelection, LanguageSelection, settings
-from source.tasks.draw import draw
+from source.utils.cache import get_registration_page_cache, invalidate_registration_page
+from source.utils.importing import (
+    ImportFormatError,
+    ParticipantRegister,
+    import_participants,
+    parse_rows,
+    participant_values,
+)
+from source.utils.notifications import (
+    DRAW_COMPLETE,
+    PARTICIPANT_JOINED,
+    get_event_broadcaster,
+    publish_event_update,
+    stream_event_updates,
+)
+from source.utils.ratelimit import RateLimit
+from source.utils.responses import TrustedJSONResponse, dumps
+from source.utils.scheduling import schedule_draw
+from source.utils.tokenfilter import announce_tokens
 
 logger = get_logger()
 
 router = APIRouter(prefix="/event", tags=["Event"])
 
+organiser_auth = HTTPBearer(auto_error=False, description="The organiser token returned when the event was created.")
+
 
 class EventCreate(BaseModel):
     name: str = Field(min_length=1, max_length=255)
@@ -52,14 +82,20 @@ class EventRead(BaseModel):
     registration_deadline: datetime.datetime
     registration_token: str
     is_draw_complete: bool
+    participant_count: int
     participants: list[ParticipantRead]
 
 
-class ParticipantRegister(BaseModel):
-    name: str = Field(min_length=1, max_length=255)
-    email: EmailStr | None = None
-    language: LanguageSelection = LanguageSelection.EN
-    wishlist: str | None = Field(default=None, max_length=1000)
+class EventStatus(BaseModel):
+    id: int
+    registration_deadline: datetime.datetime
+    participant_count: int
+    is_draw_complete: bool
+    drawn_at: datetime.datetime | None
+
+
+class EventCreated(EventRead):
+    organiser_token: str
 
 
 class ParticipantRegistered(BaseModel):
@@ -74,37 +110,53 @@ class ParticipantRegistered(BaseModel):
     access_token: str
 
 
-def build_event_response(event: Event) -> EventRead:
-    participants = []
-    for p in event.participants:
-        reveal_token = None
-        if p.given_assignments:
-            reveal_token = p.given_assignments[0].reveal_token
-        participants.append(
-            ParticipantRead(
-                id=p.id,
-                name=p.name,
-                email=p.email,
-                language=p.language,
-                wishlist=p.wishlist,
-                reveal_token=reveal_token,
-            )
-        )
-    return EventRead(
-        id=event.id,
-        name=event.name,
-        max_amount=event.max_amount,
-        date=event.date,
-        currency=event.currency,
-        registration_deadline=event.registration_deadline,
-        registration_token=event.registration_token,
-        is_draw_complete=event.is_draw_complete,
-        participants=participants,
-    )
-
-
-@router.post("", status_code=status.HTTP_201_CREATED, response_model=EventRead)
-async def create(payload: EventCreate, session: AsyncSession = Depends(get_session)) -> EventRead:
+class ParticipantImportError(BaseModel):
+    row: int
+    name: str | None
+    reason: str
+
+
+class ParticipantImportReport(BaseModel):
+    imported: list[ParticipantRegistered]
+    errors: list[ParticipantImportError]
+
+
+def registration_page_ttl(event: Event) -> float:
+    """How long the registration page of ``event`` may be cached; never past the deadline, when the draw may run."""
+    if event.is_draw_complete:
+        return settings.registration_cache_ttl_seconds
+    remaining = (event.registration_deadline - datetime.datetime.now(datetime.UTC)).total_seconds()
+    return max(0.0, min(settings.registration_cache_ttl_seconds, remaining))
+
+
+def build_event_response(event: Event) -> dict[str, Any]:
+    """Serialize an event into the ``EventRead`` shape as plain dicts, for ``TrustedJSONResponse``."""
+    return {
+        "id": event.id,
+        "name": event.name,
+        "max_amount": event.max_amount,
+        "date": event.date,
+        "currency": event.currency,
+        "registration_deadline": event.registration_deadline,
+        "registration_token": event.registration_token,
+        "is_draw_complete": event.is_draw_complete,
+        "participant_count": event.participant_count,
+        "participants": [
+            {
+                "id": p.id,
+                "name": p.name,
+                "email": p.email,
+                "language": p.language,
+                "wishlist": p.wishlist,
+                "reveal_token": p.given_assignments[0].reveal_token if p.given_assignments else None,
+            }
+            for p in event.participants
+        ],
+    }
+
+
+@router.post("", status_code=status.HTTP_201_CREATED, response_model=EventCreated)
+async def create(payload: EventCreate, session: AsyncSession = Depends(get_session)) -> TrustedJSONResponse:
     try:
         event = await create_event(
             session,
@@ -113,6 +165,7 @@ async def create(payload: EventCreate, session: AsyncSession = Depends(get_sessi
             date=payload.date,
             currency=payload.currency,
             registration_deadline=payload.registration_deadline,
+            draw_task_id=str(uuid.uuid4()),
         )
     except IntegrityError as exc:
         raise HTTPException(
@@ -120,36 +173,82 @@ async def create(payload: EventCreate, session: AsyncSession = Depends(get_sessi
             detail="Event could not be created due to a database constraint.",
         ) from exc
 
-    # Schedule draw execution after the registration deadline; use countdown (not ETA) to avoid timezone pitfalls.
+    await announce_tokens([event.registration_token])
+
+    # Schedule draw execution after the registration deadline.
     try:
-        deadline = event.registration_deadline
-        if deadline.tzinfo is None:
-            deadline = deadline.replace(tzinfo=datetime.UTC)
-        else:
-            deadline = deadline.astimezone(datetime.UTC)
-        draw.apply_async(
-            args=[event.id],
-            countdown=max(0, int((deadline - datetime.datetime.now(datetime.UTC)).total_seconds()))
-            + settings.schedule_buffer_seconds,
-        )
+        schedule_draw(event.id, event.registration_deadline, task_id=event.draw_task_id)
     except Exception as exc:
         logger.exception("Failed to schedule draw task", event_id=event.id, error=str(exc))
 
-    return build_event_response(event)
+    return TrustedJSONResponse(
+        {**build_event_response(event), "organiser_token": event.organiser_token},
+        status_code=status.HTTP_201_CREATED,
+    )
 
 
 @router.get("/{event_id}", status_code=status.HTTP_200_OK, response_model=EventRead)
-async def get(event_id: int, session: AsyncSession = Depends(get_session)) -> EventRead:
-    if (event := await get_event_and_maybe_draw(session, event_id=event_id)) is None:
+async def get(event_id: int, session: AsyncSession = Depends(get_session)) -> TrustedJSONResponse:
+    if (summary := await get_event_summary(session, event_id=event_id)) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
+
+    # Auto-trigger draw if deadline has passed and draw not yet complete
+    if is_draw_due(summary, datetime.datetime.now(datetime.UTC)):
+        await announce_tokens(await execute_draw(session, summary))
+        await publish_event_update(summary.id, DRAW_COMPLETE)
+
+    if (event := await get_event(session, event_id=event_id)) is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
-    return build_event_response(event)
+    return TrustedJSONResponse(build_event_response(event))
+
 
+@router.get("/{event_id}/status", status_code=status.HTTP_200_OK, response_model=EventStatus)
+async def get_status(event_id: int, session: AsyncSession = Depends(get_session)) -> TrustedJSONResponse:
+    """Registration and draw state of an event from its own row, without loading any participants."""
+    if (event := await get_event_summary(session, event_id=event_id)) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
+    return TrustedJSONResponse(
+        {
+            "id": event.id,
+            "registration_deadline": event.registration_deadline,
+            "participant_count": event.participant_count,
+            "is_draw_complete": event.is_draw_complete,
+            "drawn_at": event.drawn_at,
+        }
+    )
+
+
+@router.get("/{event_id}/stream", status_code=status.HTTP_200_OK, response_class=StreamingResponse)
+async def stream(event_id: int) -> StreamingResponse:
+    """Live updates for an event as server-sent events: ``participant-joined`` and ``draw-complete``."""
+    if not settings.event_stream_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Live updates are disabled.")
+    if get_event_broadcaster().is_full:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Too many open live updates.")
+
+    # A short-lived session instead of the get_session dependency, which would hold its connection until the
+    # stream ends.
+    async with session_for_event(event_id) as session:
+        if await session.get(Event, event_id) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
+
+    return StreamingResponse(
+        stream_event_updates(event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-@router.post("/register/{token}", status_code=status.HTTP_201_CREATED, response_model=ParticipantRegistered)
+
+@router.post(
+    "/register/{token}",
+    status_code=status.HTTP_201_CREATED,
+    response_model=ParticipantRegistered,
+    dependencies=[Depends(RateLimit("register"))],
+)
 async def register_for_event(
     token: str, payload: ParticipantRegister, session: AsyncSession = Depends(get_session)
-) -> ParticipantRegistered:
-    if (event := await get_event_by_registration_token(session, registration_token=token)) is None:
+) -> TrustedJSONResponse:
+    if (event := await get_event_summary_by_registration_token(session, registration_token=token)) is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
 
     # Check if registration deadline has passed
@@ -158,33 +257,126 @@ async def register_for_event(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Registration deadline has passed")
 
     try:
-        participant = await register_participant(
-            session,
-            event_id=event.id,
-            name=payload.name.strip(),
-            email=str(payload.email).strip() if payload.email else None,
-            language=payload.language,
-            wishlist=payload.wishlist.strip() if payload.wishlist else None,
-        )
-    except IntegrityError as exc:
+        if settings.registration_coalesce_enabled:
+            # Give the connection back: the insert is batched with concurrent registrations on the shard's own session.
+            shard = session.info.get("shard", 0)
+            await session.close()
+            participant = await get_registration_coalescer().register(
+                shard=shard, event_id=event.id, values=participant_values(payload)
+            )
+        else:
+            participant = await register_participant(session, event_id=event.id, **participant_values(payload))
+    except (IntegrityError, DuplicateParticipantError) as exc:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="A participant with this name already exists for this event.",
         ) from exc
 
-    return ParticipantRegistered(
-        id=participant.id,
-        name=participant.name,
-        email=participant.email,
-        language=participant.language,
-        wishlist=participant.wishlist,
-        event_id=participant.event_id,
-        access_token=participant.access_token,
+    await announce_tokens([participant.access_token])
+    await invalidate_registration_page(token)
+    await publish_event_update(
+        event.id, PARTICIPANT_JOINED, {"participants": [{"id": participant.id, "name": participant.name}]}
+    )
+
+    return TrustedJSONResponse(
+        ParticipantRegistered(
+            id=participant.id,
+            name=participant.name,
+            email=participant.email,
+            language=participant.language,
+            wishlist=participant.wishlist,
+            event_id=participant.event_id,
+            access_token=participant.access_token,
+        ),
+        status_code=status.HTTP_201_CREATED,
     )
 
 
-@router.get("/register/{token}", status_code=status.HTTP_200_OK, response_model=EventRead)
-async def get_event_for_registration(token: str, session: AsyncSession = Depends(get_session)) -> EventRead:
-    if (event := await get_event_by_registration_token(session, registration_token=token)) is None:
+@router.get(
+    "/register/{token}",
+    status_code=status.HTTP_200_OK,
+    response_model=EventRead,
+    # Organisers share this link with the whole group, so it is only limited per visitor.
+    dependencies=[Depends(RateLimit("lookup", per_token=False))],
+)
+async def get_event_for_registration(token: str, session: AsyncSession = Depends(get_session)) -> TrustedJSONResponse:
+    async def _load() -> tuple[bytes, float] | None:
+        if (event := await get_event_by_registration_token(session, registration_token=token)) is None:
+            return None
+        return dumps(build_event_response(event)), registration_page_ttl(event)
+
+    if settings.registration_cache_enabled:
+        payload = await get_registration_page_cache().get_or_load(token, _load)
+    else:
+        payload = loaded[0] if (loaded := await _load()) is not None else None
+
+    if payload is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
-    return build_event_response(event)
+    return TrustedJSONResponse(payload)
+
+
+def _upload_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Uploads are limited to {settings.bulk_import_max_bytes} bytes.",
+    )
+
+
+async def _read_upload(request: Request) -> bytes:
+    # Capped while streaming, so an oversized (or lying) upload is never held in memory or parsed.
+    if int(request.headers.get("content-length") or 0) > settings.bulk_import_max_bytes:
+        raise _upload_too_large()
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > settings.bulk_import_max_bytes:
+            raise _upload_too_large()
+    return bytes(body)
+
+
+@router.post("/{event_id}/participants/import", status_code=status.HTTP_200_OK, response_model=ParticipantImportReport)
+async def import_participants_for_event(
+    event_id: int,
+    request: Request,
+    credentials: HTTPAuthorizationCredentials | None = Depends(organiser_auth),
+    session: AsyncSession = Depends(get_session),
+) -> TrustedJSONResponse:
+    """Register many participants at once from a JSON list or a CSV file (``Content-Type: text/csv``)."""
+    if credentials is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Organiser token required.")
+
+    if (event := await session.get(Event, event_id)) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
+
+    if not event.organiser_token or not secrets.compare_digest(event.organiser_token, credentials.credentials):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid organiser token.")
+
+    if event.is_draw_complete:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="The draw has already taken place.")
+
+    if datetime.datetime.now(datetime.UTC) > event.registration_deadline:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Registration deadline has passed")
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    file_format = "csv" if content_type in ("text/csv", "application/csv") else "json"
+    try:
+        rows = parse_rows(await _read_upload(request), file_format=file_format)
+    except ImportFormatError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+    if len(rows) > settings.bulk_import_max_rows:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.bulk_import_max_rows} participants can be imported at once.",
+        )
+
+    report = await import_participants(session, event_id=event.id, rows=rows)
+    if report["imported"]:
+        await announce_tokens(row["access_token"] for row in report["imported"])
+        await invalidate_registration_page(event.registration_token)
+        await publish_event_update(
+            event.id,
+            PARTICIPANT_JOINED,
+            {"participants": [{"id": row["id"], "name": row["name"]} for row in report["imported"]]},
+        )
+    return TrustedJSONResponse(report)
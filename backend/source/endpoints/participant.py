@@ -5,8 +5,12 @@ from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from source.database.connection import get_session
-from source.database.operations import execute_draw, get_event, get_participant_by_access_token
+from source.database.operations import execute_draw, get_participant_by_access_token, is_draw_due
 from source.settings import CurrencySelection
+from source.utils.notifications import DRAW_COMPLETE, publish_event_update
+from source.utils.ratelimit import RateLimit
+from source.utils.responses import TrustedJSONResponse
+from source.utils.tokenfilter import announce_tokens
 
 router = APIRouter(prefix="/participant", tags=["Participant"])
 
@@ -19,6 +23,7 @@ class EventInfo(BaseModel):
     currency: CurrencySelection | None
     registration_deadline: datetime.datetime
     is_draw_complete: bool
+    participant_count: int
 
 
 class AssignmentInfo(BaseModel):
@@ -32,20 +37,25 @@ class MyStatusResponse(BaseModel):
     assignment: AssignmentInfo | None  # None if draw hasn't happened yet
 
 
-@router.get("/me/{access_token}", status_code=status.HTTP_200_OK, response_model=MyStatusResponse)
-async def get(access_token: str, session: AsyncSession = Depends(get_session)) -> MyStatusResponse:
+@router.get(
+    "/me/{access_token}",
+    status_code=status.HTTP_200_OK,
+    response_model=MyStatusResponse,
+    dependencies=[Depends(RateLimit("lookup", token_param="access_token"))],
+)
+async def get(access_token: str, session: AsyncSession = Depends(get_session)) -> TrustedJSONResponse:
     if (participant := await get_participant_by_access_token(session, access_token=access_token)) is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Participant not found. The link may be invalid."
         )
 
-    if (event := await get_event(session, event_id=participant.event_id)) is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found for participant.")
+    # The event is already loaded with the participant; its counter answers eligibility without the participants.
+    event = participant.event
 
     # Auto-trigger draw if deadline has passed and draw not yet complete
-    now = datetime.datetime.now(datetime.UTC)
-    if not event.is_draw_complete and now > event.registration_deadline and len(event.participants) >= 2:
-        await execute_draw(session, event)
+    if is_draw_due(event, datetime.datetime.now(datetime.UTC)):
+        await announce_tokens(await execute_draw(session, event))
+        await publish_event_update(event.id, DRAW_COMPLETE)
 
         # Expire all cached objects to force fresh load from database
         session.expire_all()
@@ -64,16 +74,19 @@ async def get(access_token: str, session: AsyncSession = Depends(get_session)) -
             receiver_wishlist=assignment_obj.receiver.wishlist,
         )
 
-    return MyStatusResponse(
-        participant_name=participant.name,
-        event=EventInfo(
-            id=event.id,
-            name=event.name,
-            date=event.date,
-            max_amount=event.max_amount,
-            currency=event.currency,
-            registration_deadline=event.registration_deadline,
-            is_draw_complete=event.is_draw_complete,
-        ),
-        assignment=assignment,
+    return TrustedJSONResponse(
+        MyStatusResponse(
+            participant_name=participant.name,
+            event=EventInfo(
+                id=event.id,
+                name=event.name,
+                date=event.date,
+                max_amount=event.max_amount,
+                currency=event.currency,
+                registration_deadline=event.registration_deadline,
+                is_draw_complete=event.is_draw_complete,
+                participant_count=event.participant_count,
+            ),
+            assignment=assignment,
+        )
     )
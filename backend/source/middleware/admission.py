@@ -0,0 +1,37 @@
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from source.utils.admission import Priority, get_admission_controller, route_priority
+
+
+class AdmissionControlMiddleware:
+    """Rejects requests with 503 and ``Retry-After`` while this worker is overloaded, instead of queueing them."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        priority = route_priority(scope["method"], scope["path"])
+        if priority == Priority.EXEMPT:
+            await self.app(scope, receive, send)
+            return
+
+        controller = get_admission_controller()
+        retry_after = controller.try_admit(priority)
+        if retry_after is not None:
+            response = JSONResponse(
+                {"detail": "The server is busy. Please try again shortly."},
+                status_code=503,
+                headers={"Retry-After": str(retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release()
@@ -0,0 +1,23 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from source.database.profiling import profile_queries
+
+
+class QueryProfilerMiddleware:
+    """Profiles the SQL statements issued while serving each HTTP request."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with profile_queries("http") as profile:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                # Use the route template rather than the raw path so tokens never end up in the logs.
+                route = scope.get("route")
+                profile.label = f"{scope['method']} {getattr(route, 'path', '<unmatched>')}"
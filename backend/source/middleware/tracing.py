@@ -0,0 +1,34 @@
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from source.utils.tracing import TRACEPARENT_HEADER, SpanKind, start_span
+
+
+class TracingMiddleware:
+    """Opens a server span per HTTP request, continuing the caller's trace when a ``traceparent`` header is sent."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = Headers(scope=scope).get(TRACEPARENT_HEADER)
+
+        with start_span(scope["method"], kind=SpanKind.SERVER, traceparent=traceparent) as span:
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                # Use the route template rather than the raw path so tokens never end up in the traces.
+                route = getattr(scope.get("route"), "path", "<unmatched>")
+                span.update_name(f"{scope['method']} {route}")
+                span.set_attribute("http.method", scope["method"])
+                span.set_attribute("http.route", route)
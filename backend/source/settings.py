@@ -1,4 +1,6 @@
 from enum import StrEnum
+from functools import cache
+from typing import Any, cast
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -8,6 +10,7 @@ class Settings(BaseSettings):
 
     # Environment variables
     database_url: str
+    database_shard_urls: list[str] = []  # extra shards as a JSON list; new events are spread over all of them
     redis_url: str
     cors_origins: str
 
@@ -18,15 +21,120 @@ class Settings(BaseSettings):
     resend_backoff_base_seconds: float = 0.5
     resend_max_retry_sleep_seconds: float = 20.0
     resend_min_interval_seconds: float = 0.0
+    resend_concurrency: int = 1
+    # Celery tasks requeue retryable failures instead of sleeping; `resend_max_retries` caps the requeues too
+    resend_retry_delay_base_seconds: float = 30.0
+    resend_max_retry_delay_seconds: float = 600.0
+
+    # Email circuit breaker (per worker process; `email_breaker_shared` also shares the open state through Redis)
+    email_breaker_enabled: bool = True
+    email_breaker_window: int = 20  # most recent sends considered
+    email_breaker_min_calls: int = 10
+    email_breaker_failure_rate: float = 0.5
+    email_breaker_cooldown_seconds: float = 60.0
+    email_breaker_half_open_probes: int = 1
+    email_breaker_shared: bool = False
+
+    # SQL profiling
+    sql_profile_enabled: bool = True
+    sql_profile_log_min_statements: int = 10
+    sql_profile_log_min_seconds: float = 0.5
+    sql_profile_slowest_count: int = 3
+
+    # Tracing (spans are exported as OTLP/JSON lines; unset disables tracing)
+    trace_export_path: str | None = None
+    trace_service_name: str = "picko"
+
+    # Rate limiting (sliding window per client IP and per token)
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = "memory"  # "memory" (per worker) or "redis" (shared)
+    rate_limit_window_seconds: int = 60
+    rate_limit_register_per_ip: int = 30
+    rate_limit_register_per_token: int = 300
+    rate_limit_lookup_per_ip: int = 120
+    rate_limit_lookup_per_token: int = 60
+    rate_limit_client_ip_header: str | None = None  # e.g. "x-forwarded-for", only behind a trusted proxy
+
+    # Admission control (per API worker: answer 503 with Retry-After instead of queueing for a database connection)
+    admission_control_enabled: bool = True
+    admission_max_in_flight: int = 100  # requests being served at once
+    admission_max_pool_wait_ms: float = 500.0  # recent wait for a pooled connection; 0 disables this limit
+    admission_pool_wait_window_seconds: float = 2.0
+    # Lower priorities are shed at these fractions of both limits, leaving headroom for status polls and reveals
+    admission_normal_priority_share: float = 0.8
+    admission_low_priority_share: float = 0.5
+
+    # Registration page cache (in-process tier in front of a Redis tier shared by all workers)
+    registration_cache_enabled: bool = True
+    registration_cache_ttl_seconds: float = 60.0
+    registration_cache_local_ttl_seconds: float = 2.0  # also bounds how stale other workers can be
+    registration_cache_local_max_entries: int = 1024
+    registration_cache_shared: bool = True
+
+    # Registration group commit (concurrent registrations in a worker share one INSERT and one commit)
+    registration_coalesce_enabled: bool = False
+    registration_coalesce_window_ms: float = 2.0
+    registration_coalesce_max_batch: int = 100
+
+    # SQLite mode (a `sqlite:///path/to/picko.db` database URL, for single-node installs)
+    sqlite_busy_timeout_ms: int = 5000  # how long a writer waits for the database lock
+    sqlite_cache_size_kib: int = 64 * 1024
+    sqlite_mmap_size_bytes: int = 256 * 1024 * 1024
+
+    # Token filter (per-worker Bloom filter of issued tokens answering 404 for unknown ones without a query)
+    token_filter_enabled: bool = False
+    token_filter_false_positive_rate: float = 0.01
+    token_filter_min_capacity: int = 100_000
+    token_filter_rebuild_interval_seconds: float = 6 * 60 * 60  # also drops the tokens of purged events
+    token_filter_stream_max_length: int = 100_000  # announcements kept for workers catching up after a reconnect
+
+    # Live event updates (server-sent events fanned out through Redis pub/sub)
+    event_stream_enabled: bool = True
+    event_stream_heartbeat_seconds: float = 15.0
+    event_stream_max_seconds: float = 15 * 60
+    event_stream_max_subscribers: int = 5000  # per worker
+    event_stream_queue_size: int = 64
+
+    # Retention (archive events notified more than `retention_days` ago, then delete them in small batches)
+    retention_days: int = 365
+    retention_archive_dir: str = "archive"
+    retention_batch_size: int = 50  # events per transaction
+    retention_batch_pause_seconds: float = 1.0
+    retention_max_batches_per_run: int = 100
+    retention_schedule_enabled: bool = False  # also run daily from Celery beat
+
+    # Debug surface (profiling and memory snapshots of API and Celery workers); unset `admin_token` disables it
+    admin_token: str | None = None
+    debug_max_profile_seconds: float = 60.0
+    debug_sampling_interval_seconds: float = 0.005
+    debug_task_poll_seconds: float = 10.0  # how often idle workers look for armed task profiling
+    debug_result_ttl_seconds: int = 60 * 60
+
+    # Event listing (admin endpoint and `picko list-events`)
+    event_list_max_page_size: int = 500
 
     # Manually set variables
     app_name: str = "Picko"
+    bulk_import_max_rows: int = 10_000
+    bulk_import_max_bytes: int = 5 * 1024 * 1024
     default_worker_concurrency: int = 4
     schedule_buffer_seconds: int = 5
     celery_visibility_timeout_seconds: int = 60 * 60 * 24 * 14  # 14 days
 
 
-settings = Settings()
+@cache
+def get_settings() -> Settings:
+    return Settings()
+
+
+class _LazySettings:
+    """Reads the environment on first use, so importing a module (or ``picko --help``) needs no configuration."""
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_settings(), name)
+
+
+settings = cast(Settings, _LazySettings())
 
 
 class CurrencySelection(StrEnum):
@@ -35,6 +143,12 @@ class CurrencySelection(StrEnum):
     USD = "USD"
 
 
+class EventStateSelection(StrEnum):
+    OPEN = "open"  # not drawn yet
+    DRAWN = "drawn"  # drawn, participants not emailed yet
+    NOTIFIED = "notified"
+
+
 class LanguageSelection(StrEnum):
     EN = "en"
     PL = "pl"
@@ -1,5 +1,9 @@
 from source.tasks.draw import draw
+from source.tasks.email import retry_participant_email
+from source.tasks.retention import purge_expired_events
 
 __all__ = [
     "draw",
+    "purge_expired_events",
+    "retry_participant_email",
 ]
@@ -1,16 +1,38 @@
 import asyncio
 import datetime
+import time
 from typing import Any
 
+from structlog import get_logger
+
 from source.celery_app import celery_app
-from source.database.connection import AsyncSessionLocal
-from source.database.operations import execute_draw, get_event, get_event_participants_with_assignments
+from source.database.connection import is_sqlite, session_for_event
+from source.database.operations import (
+    count_unnotified_participants,
+    execute_draw,
+    get_event_summary,
+    is_draw_due,
+    mark_participants_notified,
+    stream_email_recipients,
+)
+from source.database.profiling import profile_queries
+from source.tasks.email import requeue_deferred_emails
+from source.utils.cache import invalidate_registration_page
+from source.utils.notifications import DRAW_COMPLETE, publish_event_update
 from source.utils.postman import PostMan
+from source.utils.redis import new_redis
+from source.utils.scheduling import DRAW_TASK_NAME, SCHEDULED_FOR_HEADER, schedule_notification_retry
+from source.utils.tokenfilter import announce_tokens
+from source.utils.tracing import TRACEPARENT_HEADER, SpanKind, start_span
+
+logger = get_logger()
 
 
-async def _draw_and_notify_async(event_id: int) -> dict[str, Any]:
-    async with AsyncSessionLocal() as session:
-        if (event := await get_event(session, event_id=event_id, lock=True)) is None:
+async def _draw_and_notify_async(event_id: int, *, notify_attempt: int = 0) -> dict[str, Any]:
+    async with session_for_event(event_id) as session:
+        with start_span("db.get_event_summary", attributes={"event_id": event_id, "lock": True}):
+            event = await get_event_summary(session, event_id=event_id, lock=True)
+        if event is None:
             return {"status": "event_not_found", "event_id": event_id}
 
         now = datetime.datetime.now(datetime.UTC)
@@ -19,13 +41,21 @@ async def _draw_and_notify_async(event_id: int) -> dict[str, Any]:
         if event.notified_at is not None:
             return {"status": "already_notified", "event_id": event_id}
 
-        if not event.is_draw_complete and now > event.registration_deadline and len(event.participants) >= 2:
-            await execute_draw(session, event)
+        if is_draw_due(event, now):
+            with start_span("db.execute_draw", attributes={"event_id": event_id}):
+                reveal_tokens = await execute_draw(session, event)
             draw_executed = True
 
+            async with new_redis() as redis:
+                await announce_tokens(reveal_tokens, redis=redis)
+                await invalidate_registration_page(event.registration_token, redis=redis)
+                await publish_event_update(event_id, DRAW_COMPLETE, redis=redis)
+
             session.expire_all()  # Expire all cached objects to force fresh load from database
 
-            if (event := await get_event(session, event_id=event_id, lock=True)) is None:
+            with start_span("db.get_event_summary", attributes={"event_id": event_id, "lock": True}):
+                event = await get_event_summary(session, event_id=event_id, lock=True)
+            if event is None:
                 return {"status": "event_not_found_after_draw", "event_id": event_id}
 
         if not event.is_draw_complete:
@@ -34,25 +64,91 @@ async def _draw_and_notify_async(event_id: int) -> dict[str, Any]:
         if event.notified_at is not None:
             return {"status": "already_notified", "event_id": event_id}
 
-        participants = await get_event_participants_with_assignments(session, event_id=event_id)
-
-        async with PostMan() as postman:
-            sent_to, skipped = await postman.send_event_emails(participants=participants, event_id=event_id)
-
-        event.notified_at = now
-        session.add(event)
+        if is_sqlite():
+            # The lock covers the whole database there: don't hold it while emailing, only while recording the result.
+            await session.commit()
+
+        async with new_redis() as redis, PostMan(defer_retries=True, redis=redis) as postman:
+            with start_span("email.send_event_emails", attributes={"event_id": event_id}) as span:
+                sent_to, skipped, deferred = [], 0, []
+                if (circuit_wait := await postman.circuit_open_for_seconds()) is None:
+                    # Only the participants not emailed yet, so a resumed notification (see below) doesn't email
+                    # anyone twice. They are streamed from a cursor: the first email goes out while later rows are
+                    # still being fetched.
+                    recipients = stream_email_recipients(session, event_id=event_id, only_unnotified=True)
+                    sent_to, skipped, deferred = await postman.send_event_emails(
+                        participants=recipients, event_id=event_id
+                    )
+                span.set_attribute("sent", len(sent_to))
+                span.set_attribute("skipped", skipped)
+                span.set_attribute("deferred", len(deferred))
+                span.set_attribute("circuit_state", postman.circuit_state)
+
+        if is_sqlite():
+            await session.commit()  # End the read, so the lock is taken in a fresh transaction.
+            event = await get_event_summary(session, event_id=event_id, lock=True)
+        await mark_participants_notified(session, event_id=event_id, names=sent_to, notified_at=now)
+        # With the breaker already open nothing was read: the whole notification waits, counted rather than listed.
+        pending = await count_unnotified_participants(session, event_id=event_id) if circuit_wait is not None else 0
+        circuit_deferred = [item for item in deferred if item.circuit_open]
+        resume = (circuit_wait is not None or bool(circuit_deferred)) and notify_attempt < postman.max_retries
+        if pending and not resume:
+            # Left without notified_at for `picko resend-event --only-failed`.
+            logger.error(
+                "Giving up on emails after retries", event_id=event_id, pending=pending, attempts=notify_attempt
+            )
+        if not resume and event is not None and event.notified_at is None:
+            event.notified_at = now
+            session.add(event)
         await session.commit()
 
+    if resume:
+        # The provider is down: run this notification again after the cool-down rather than queueing a retry for
+        # every participant, which would only trip the breaker again.
+        delay = postman.deferred_retry_delay_seconds(
+            attempt=notify_attempt,
+            retry_after_seconds=max(
+                [circuit_wait or 0.0, *(item.retry_after_seconds or 0.0 for item in circuit_deferred)]
+            ),
+        )
+        schedule_notification_retry(event_id, attempt=notify_attempt + 1, delay_seconds=delay)
+        requeued, gave_up = [item.name for item in deferred], []
+    else:
+        # Queued after the commit so retries see the assignments; the worker is free again straight away.
+        requeued, gave_up = requeue_deferred_emails(
+            postman, event_id=event_id, deferred=deferred, attempt=notify_attempt + 1
+        )
+
     return {
-        "status": "emails_sent",
+        "status": "notification_deferred" if resume else "emails_sent",
         "event_id": event_id,
         "draw_executed": draw_executed,
-        "participants": len(participants),
+        "participants": len(sent_to) + skipped + len(deferred) + pending,
         "sent_to": sent_to,
-        "skipped": skipped,
+        "skipped": skipped + len(gave_up) + (0 if resume else pending),
+        "requeued": requeued,
+        "pending": pending if resume else 0,
+        "circuit_state": postman.circuit_state,
     }
 
 
-@celery_app.task(name="draw")
-def draw(event_id: int) -> dict[str, Any]:
-    return asyncio.run(_draw_and_notify_async(event_id))
+@celery_app.task(name=DRAW_TASK_NAME, bind=True)
+def draw(self, event_id: int, notify_attempt: int = 0) -> dict[str, Any]:
+    traceparent = self.request.get(TRACEPARENT_HEADER)
+    scheduled_for = self.request.get(SCHEDULED_FOR_HEADER)
+
+    async def _run() -> dict[str, Any]:
+        with (
+            start_span("task.draw", kind=SpanKind.CONSUMER, traceparent=traceparent) as span,
+            profile_queries("task.draw", event_id=event_id),
+        ):
+            span.set_attribute("event_id", event_id)
+            if scheduled_for is not None:
+                span.set_attribute("queue_wait_seconds", round(time.time() - float(scheduled_for), 3))
+            if notify_attempt:
+                span.set_attribute("notify_attempt", notify_attempt)
+            result = await _draw_and_notify_async(event_id, notify_attempt=notify_attempt)
+            span.set_attribute("status", result["status"])
+            return result
+
+    return asyncio.run(_run())
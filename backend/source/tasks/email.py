@@ -0,0 +1,82 @@
+import asyncio
+import datetime
+from collections.abc import Sequence
+from typing import Any
+
+from structlog import get_logger
+
+from source.celery_app import celery_app
+from source.database.connection import session_for_event
+from source.database.operations import mark_participants_notified, stream_email_recipients
+from source.utils.postman import DeferredEmail, PostMan
+from source.utils.scheduling import EMAIL_RETRY_TASK_NAME, schedule_email_retry
+from source.utils.tracing import TRACEPARENT_HEADER, SpanKind, start_span
+
+logger = get_logger()
+
+
+def requeue_deferred_emails(
+    postman: PostMan, *, event_id: int, deferred: Sequence[DeferredEmail], attempt: int
+) -> tuple[list[str], list[str]]:
+    """Queue the next attempt for each deferred send, or give up once ``resend_max_retries`` is exhausted."""
+    if not deferred:
+        return [], []
+    if attempt > postman.max_retries:
+        names = [item.name for item in deferred]
+        logger.error("Giving up on emails after retries", event_id=event_id, names=names, attempts=attempt)
+        return [], names
+
+    requeued = []
+    with celery_app.producer_or_acquire() as producer:
+        for item in deferred:
+            delay = postman.deferred_retry_delay_seconds(
+                attempt=attempt - 1, retry_after_seconds=item.retry_after_seconds
+            )
+            schedule_email_retry(event_id, item.name, attempt=attempt, delay_seconds=delay, producer=producer)
+            requeued.append(item.name)
+    return requeued, []
+
+
+async def _retry_participant_email_async(event_id: int, name: str, attempt: int) -> dict[str, Any]:
+    async with session_for_event(event_id) as session:
+        with start_span("db.stream_email_recipients", attributes={"event_id": event_id}):
+            recipients = [
+                row
+                async for row in stream_email_recipients(session, event_id=event_id, only_unnotified=True, names=[name])
+            ]
+        if not recipients:
+            # Deleted, or delivered in the meantime (e.g. by `picko resend-event`).
+            return {"status": "nothing_to_send", "event_id": event_id}
+
+        now = datetime.datetime.now(datetime.UTC)
+        async with PostMan(defer_retries=True) as postman:
+            sent_to, _, deferred = await postman.send_event_emails(participants=recipients, event_id=event_id)
+
+        await mark_participants_notified(session, event_id=event_id, names=sent_to, notified_at=now)
+        await session.commit()
+
+    requeued, gave_up = requeue_deferred_emails(postman, event_id=event_id, deferred=deferred, attempt=attempt + 1)
+    if sent_to:
+        status = "email_sent"
+    elif requeued:
+        status = "requeued"
+    elif gave_up:
+        status = "gave_up"
+    else:
+        status = "skipped"
+    return {"status": status, "event_id": event_id, "attempt": attempt}
+
+
+@celery_app.task(name=EMAIL_RETRY_TASK_NAME, bind=True)
+def retry_participant_email(self, event_id: int, name: str, attempt: int = 1) -> dict[str, Any]:
+    traceparent = self.request.get(TRACEPARENT_HEADER)
+
+    async def _run() -> dict[str, Any]:
+        with start_span("task.retry_participant_email", kind=SpanKind.CONSUMER, traceparent=traceparent) as span:
+            span.set_attribute("event_id", event_id)
+            span.set_attribute("attempt", attempt)
+            result = await _retry_participant_email_async(event_id, name, attempt)
+            span.set_attribute("status", result["status"])
+            return result
+
+    return asyncio.run(_run())
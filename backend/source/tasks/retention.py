@@ -0,0 +1,13 @@
+import asyncio
+from dataclasses import asdict
+from typing import Any
+
+from source.celery_app import celery_app
+from source.utils.retention import archive_and_purge
+
+PURGE_TASK_NAME = "purge_expired_events"
+
+
+@celery_app.task(name=PURGE_TASK_NAME)
+def purge_expired_events() -> dict[str, Any]:
+    return asdict(asyncio.run(archive_and_purge()))
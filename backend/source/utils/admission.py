@@ -0,0 +1,105 @@
+import math
+import re
+import time
+from collections.abc import Callable, Mapping
+from enum import StrEnum
+from functools import cache
+
+from structlog import get_logger
+
+from source.database.pool import get_pool_wait_tracker
+from source.settings import settings
+
+logger = get_logger()
+
+
+class Priority(StrEnum):
+    HIGH = "high"  # health checks, event status polling and the links participants open
+    NORMAL = "normal"
+    LOW = "low"  # admin listing
+    EXEMPT = "exempt"  # long-lived streams (limited separately) and the debug surface, needed most under load
+
+
+# First match wins; anything else is NORMAL. Matched on the raw path because admission runs before routing.
+ROUTE_PRIORITIES: tuple[tuple[str | None, re.Pattern[str], Priority], ...] = (
+    ("GET", re.compile(r"^/status$"), Priority.HIGH),
+    ("GET", re.compile(r"^/event/\d+/status$"), Priority.HIGH),  # the cheap page for polling an event
+    ("GET", re.compile(r"^/draw/reveal/[^/]+$"), Priority.HIGH),
+    ("GET", re.compile(r"^/participant/me/[^/]+$"), Priority.HIGH),
+    ("GET", re.compile(r"^/event/\d+/stream$"), Priority.EXEMPT),
+    (None, re.compile(r"^/debug/"), Priority.EXEMPT),
+    (None, re.compile(r"^/admin/"), Priority.LOW),
+)
+
+
+def route_priority(method: str, path: str) -> Priority:
+    for route_method, pattern, priority in ROUTE_PRIORITIES:
+        if route_method in (None, method) and pattern.match(path):
+            return priority
+    return Priority.NORMAL
+
+
+class AdmissionController:
+    """Per-worker load shedding on requests in flight and pool wait; lower priorities go at a share of the limits."""
+
+    def __init__(
+        self,
+        *,
+        max_in_flight: int,
+        max_pool_wait_seconds: float,
+        shares: Mapping[Priority, float],
+        pool_wait: Callable[[], float],
+        log_interval_seconds: float = 10.0,
+    ) -> None:
+        self._max_in_flight = max_in_flight
+        self._max_pool_wait_seconds = max_pool_wait_seconds
+        self._shares = shares
+        self._pool_wait = pool_wait
+        self._log_interval_seconds = log_interval_seconds
+        self.in_flight = 0
+        self._rejected = 0
+        self._logged_at = 0.0
+
+    def try_admit(self, priority: Priority) -> int | None:
+        # The seconds a rejected client should wait; an admitted request must be followed by ``release``.
+        share = self._shares[priority]
+        if self.in_flight >= max(1, math.floor(self._max_in_flight * share)):
+            return self._reject(priority, retry_after=1)
+        if self._max_pool_wait_seconds > 0:
+            pool_wait = self._pool_wait()
+            if pool_wait > self._max_pool_wait_seconds * share:
+                # Back off for about as long as the queue takes to drain.
+                return self._reject(priority, retry_after=max(1, math.ceil(pool_wait)))
+        self.in_flight += 1
+        return None
+
+    def release(self) -> None:
+        self.in_flight -= 1
+
+    def _reject(self, priority: Priority, *, retry_after: int) -> int:
+        self._rejected += 1
+        now = time.monotonic()
+        if now - self._logged_at >= self._log_interval_seconds:
+            logger.warning(
+                "Shedding requests",
+                rejected=self._rejected,
+                priority=priority,
+                in_flight=self.in_flight,
+                pool_wait_ms=round(self._pool_wait() * 1000, 1),
+            )
+            self._rejected, self._logged_at = 0, now
+        return retry_after
+
+
+@cache
+def get_admission_controller() -> AdmissionController:
+    return AdmissionController(
+        max_in_flight=settings.admission_max_in_flight,
+        max_pool_wait_seconds=settings.admission_max_pool_wait_ms / 1000,
+        shares={
+            Priority.HIGH: 1.0,
+            Priority.NORMAL: settings.admission_normal_priority_share,
+            Priority.LOW: settings.admission_low_priority_share,
+        },
+        pool_wait=get_pool_wait_tracker().current_wait,
+    )
@@ -0,0 +1,18 @@
+import secrets
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from source.settings import settings
+
+admin_auth = HTTPBearer(auto_error=False, description="The `ADMIN_TOKEN` configured on the server.")
+
+
+async def require_admin(credentials: HTTPAuthorizationCredentials | None = Depends(admin_auth)) -> None:
+    """Route dependency for operator-only endpoints; they don't exist (404) while no admin token is configured."""
+    if not settings.admin_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if credentials is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Admin token required.")
+    if not secrets.compare_digest(settings.admin_token, credentials.credentials):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token.")
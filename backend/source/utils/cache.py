@@ -0,0 +1,201 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from functools import cache
+from typing import TYPE_CHECKING
+
+from structlog import get_logger
+
+from source.settings import settings
+from source.utils.redis import get_redis
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+logger = get_logger()
+
+# Returns {version, payload, pttl} for the current version of a key in one round trip.
+_REDIS_GET_SCRIPT = """
+local version = redis.call('GET', KEYS[1]) or '0'
+local key = KEYS[2] .. ':' .. version
+return {version, redis.call('GET', key), redis.call('PTTL', key)}
+"""
+
+# How long a bumped version key is kept; far longer than any cached entry can live.
+_VERSION_TTL_SECONDS = 24 * 60 * 60
+
+# A loader returns the payload and how many seconds it may be cached (0 = don't cache), or None when not found.
+Loader = Callable[[], Awaitable[tuple[bytes, float] | None]]
+
+
+class TTLCache:
+    """Small in-process LRU cache whose entries expire after a per-entry TTL."""
+
+    def __init__(self, *, max_entries: int) -> None:
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+
+    def get(self, key: str) -> bytes | None:
+        if (entry := self._entries.get(key)) is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: bytes, *, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class TwoTierCache:
+    """Payloads cached in process (short TTL) in front of Redis (longer TTL), loaded once per key across all workers."""
+
+    def __init__(
+        self,
+        *,
+        prefix: str,
+        local_ttl: float,
+        local_max_entries: int,
+        shared: bool = True,
+        lock_seconds: float = 5.0,
+        poll_interval_seconds: float = 0.05,
+    ) -> None:
+        self._prefix = prefix
+        self._local_ttl = local_ttl
+        self._local = TTLCache(max_entries=local_max_entries)
+        self._shared = shared
+        self._lock_seconds = lock_seconds
+        self._poll_interval_seconds = poll_interval_seconds
+        self._inflight: dict[str, asyncio.Future[bytes | None]] = {}
+        self._generation = 0  # Bumped on every invalidation, so loads that raced with one aren't kept locally.
+        self._script = None
+
+    def _version_key(self, key: str) -> str:
+        return f"{self._prefix}:{key}:v"
+
+    def _value_key(self, key: str) -> str:
+        return f"{self._prefix}:{key}"
+
+    async def get_or_load(self, key: str, loader: Loader) -> bytes | None:
+        while True:
+            if (value := self._local.get(key)) is not None:
+                return value
+            if (future := self._inflight.get(key)) is None:
+                break
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                # Only the request loading it was cancelled; take over the load rather than fail with it.
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self._generation
+        try:
+            value, ttl = await self._load_shared(key, loader)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # Mark as retrieved when nobody else was waiting.
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        if value is not None and self._generation == generation:
+            self._local.set(key, value, ttl=min(self._local_ttl, ttl))
+        future.set_result(value)
+        return value
+
+    async def _load_shared(self, key: str, loader: Loader) -> tuple[bytes | None, float]:
+        if not self._shared:
+            return await self._load(loader)
+
+        try:
+            redis = get_redis()
+            if self._script is None:
+                self._script = redis.register_script(_REDIS_GET_SCRIPT)
+            version, value, pttl = await self._script(keys=[self._version_key(key), self._value_key(key)])
+            version = int(version)
+            if value is not None:
+                return value, max(0, pttl) / 1000
+
+            lock_key = f"{self._value_key(key)}:{version}:lock"
+            if not await redis.set(lock_key, b"1", nx=True, px=int(self._lock_seconds * 1000)):
+                # Someone else is loading it; wait for their result rather than hitting the database too.
+                deadline = time.monotonic() + self._lock_seconds
+                while time.monotonic() < deadline:
+                    await asyncio.sleep(self._poll_interval_seconds)
+                    if (value := await redis.get(f"{self._value_key(key)}:{version}")) is not None:
+                        return value, self._local_ttl
+                return await self._load(loader)
+        except Exception as exc:
+            logger.warning("Shared cache unavailable; loading directly", key=key, error=str(exc))
+            return await self._load(loader)
+
+        try:
+            value, ttl = await self._load(loader)
+            if value is not None and ttl > 0:
+                await redis.set(f"{self._value_key(key)}:{version}", value, px=int(ttl * 1000))
+        finally:
+            try:
+                await redis.delete(lock_key)
+            except Exception as exc:
+                logger.warning("Failed to release shared cache lock", key=key, error=str(exc))
+        return value, ttl
+
+    @staticmethod
+    async def _load(loader: Loader) -> tuple[bytes | None, float]:
+        if (loaded := await loader()) is None:
+            return None, 0.0
+        return loaded
+
+    async def invalidate(self, key: str, *, redis: "Redis | None" = None) -> None:
+        """Drop ``key`` from this process and bump its version in Redis."""
+        # A load that raced with this is stored under the old version, where nobody reads it. Other workers' copies
+        # in process may serve the previous payload for up to ``local_ttl`` seconds.
+        self._local.delete(key)
+        self._generation += 1
+        if not self._shared:
+            return
+        try:
+            client = redis or get_redis()
+            version_key = self._version_key(key)
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.incr(version_key)
+                pipe.expire(version_key, _VERSION_TTL_SECONDS)
+                await pipe.execute()
+        except Exception as exc:
+            logger.warning("Failed to invalidate shared cache entry", key=key, error=str(exc))
+
+
+@cache
+def get_registration_page_cache() -> TwoTierCache:
+    """Serialized ``EventRead`` payloads of the public registration page, keyed by registration token."""
+    return TwoTierCache(
+        prefix="picko:registration",
+        local_ttl=settings.registration_cache_local_ttl_seconds,
+        local_max_entries=settings.registration_cache_local_max_entries,
+        shared=settings.registration_cache_shared,
+    )
+
+
+async def invalidate_registration_page(registration_token: str, *, redis: "Redis | None" = None) -> None:
+    if settings.registration_cache_enabled:
+        await get_registration_page_cache().invalidate(registration_token, redis=redis)
@@ -0,0 +1,168 @@
+import time
+from collections import deque
+from enum import StrEnum
+from functools import cache
+from typing import TYPE_CHECKING
+
+from structlog import get_logger
+
+from source.settings import settings
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+logger = get_logger()
+
+
+class CircuitState(StrEnum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Fails calls fast for ``cooldown_seconds`` once ``failure_rate`` of the last ``window`` calls failed."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        window: int,
+        min_calls: int,
+        failure_rate: float,
+        cooldown_seconds: float,
+        half_open_probes: int = 1,
+        shared: bool = False,
+        shared_check_interval_seconds: float = 1.0,
+    ) -> None:
+        self.name = name
+        self._outcomes: deque[bool] = deque(maxlen=max(1, window))
+        self._min_calls = max(1, min_calls)
+        self._failure_rate = failure_rate
+        self._cooldown_seconds = cooldown_seconds
+        self._half_open_probes = max(1, half_open_probes)
+        self._shared = shared  # also keep the open state in Redis, so every worker stops calling the dependency
+        self._shared_check_interval_seconds = shared_check_interval_seconds
+        self._state = CircuitState.CLOSED
+        self._open_until = 0.0
+        self._probes_in_flight = 0
+        self._next_shared_check = 0.0
+
+    @property
+    def _shared_key(self) -> str:
+        return f"picko:breaker:{self.name}"
+
+    @property
+    def state(self) -> CircuitState:
+        if self._state is CircuitState.OPEN and time.monotonic() >= self._open_until:
+            self._transition(CircuitState.HALF_OPEN)
+        return self._state
+
+    def _transition(self, state: CircuitState) -> None:
+        previous, self._state = self._state, state
+        if state is CircuitState.CLOSED:
+            self._outcomes.clear()
+        if state is not CircuitState.HALF_OPEN:
+            self._probes_in_flight = 0
+        log = logger.info if state is CircuitState.CLOSED else logger.warning
+        log(
+            "Circuit breaker state changed",
+            metric="circuit_breaker_state",
+            breaker=self.name,
+            state=state.value,
+            previous=previous.value,
+        )
+
+    def _open(self, seconds: float) -> None:
+        self._open_until = time.monotonic() + seconds
+        if self._state is not CircuitState.OPEN:
+            self._transition(CircuitState.OPEN)
+
+    async def _sync_shared(self, redis: "Redis | None") -> None:
+        now = time.monotonic()
+        if not self._shared or redis is None or now < self._next_shared_check:
+            return
+        self._next_shared_check = now + self._shared_check_interval_seconds
+        try:
+            remaining_ms = await redis.pttl(self._shared_key)
+        except Exception as exc:
+            logger.warning("Shared circuit breaker unavailable", breaker=self.name, error=str(exc))
+            return
+        if remaining_ms > 0 and self._state is CircuitState.CLOSED:
+            self._open(remaining_ms / 1000)
+
+    async def open_for_seconds(self, *, redis: "Redis | None" = None) -> float | None:
+        """Seconds left in the cool-down while the breaker is open, otherwise None. Never takes a probe slot."""
+        await self._sync_shared(redis)
+        if self.state is CircuitState.OPEN:
+            return max(0.0, self._open_until - time.monotonic())
+        return None
+
+    async def acquire(self, *, redis: "Redis | None" = None) -> float | None:
+        """None when a call may go ahead (report it with ``record``), or how many seconds to wait."""
+        if (remaining := await self.open_for_seconds(redis=redis)) is not None:
+            return remaining
+        if self._state is CircuitState.HALF_OPEN:
+            if self._probes_in_flight >= self._half_open_probes:
+                return self._cooldown_seconds
+            self._probes_in_flight += 1
+        return None
+
+    async def record(self, *, success: bool, redis: "Redis | None" = None) -> None:
+        if self._state is CircuitState.HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            if success:
+                self._transition(CircuitState.CLOSED)
+                await self._set_shared(redis, open_seconds=None)
+            else:
+                self._open(self._cooldown_seconds)
+                await self._set_shared(redis, open_seconds=self._cooldown_seconds)
+            return
+
+        if self._state is CircuitState.OPEN:
+            return  # A call that started before the breaker opened.
+
+        self._outcomes.append(success)
+        if len(self._outcomes) < self._min_calls:
+            return
+        failures = self._outcomes.count(False)
+        if failures / len(self._outcomes) >= self._failure_rate:
+            logger.warning(
+                "Opening circuit breaker",
+                breaker=self.name,
+                failures=failures,
+                calls=len(self._outcomes),
+                cooldown_seconds=self._cooldown_seconds,
+            )
+            self._open(self._cooldown_seconds)
+            await self._set_shared(redis, open_seconds=self._cooldown_seconds)
+
+    def release(self) -> None:
+        """Give back a probe slot taken by ``acquire`` for a call that ended without an outcome (e.g. cancelled)."""
+        if self._state is CircuitState.HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    async def _set_shared(self, redis: "Redis | None", *, open_seconds: float | None) -> None:
+        if not self._shared or redis is None:
+            return
+        try:
+            if open_seconds is None:
+                await redis.delete(self._shared_key)
+            else:
+                await redis.set(self._shared_key, b"1", px=max(1, int(open_seconds * 1000)))
+        except Exception as exc:
+            logger.warning("Failed to update shared circuit breaker", breaker=self.name, error=str(exc))
+
+
+@cache
+def get_email_circuit_breaker() -> CircuitBreaker:
+    """The breaker in front of the email provider, one per worker process."""
+    return CircuitBreaker(
+        "email",
+        window=settings.email_breaker_window,
+        min_calls=settings.email_breaker_min_calls,
+        failure_rate=settings.email_breaker_failure_rate,
+        cooldown_seconds=settings.email_breaker_cooldown_seconds,
+        half_open_probes=settings.email_breaker_half_open_probes,
+        shared=settings.email_breaker_shared,
+    )
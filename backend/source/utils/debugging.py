@@ -0,0 +1,288 @@
+import cProfile
+import marshal
+import secrets
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import Any
+
+import orjson
+from structlog import get_logger
+
+from source.settings import settings
+from source.utils.redis import get_redis, get_sync_redis
+
+logger = get_logger()
+
+_ARMED_KEY = "picko:debug:armed"
+_REMAINING_KEY = "picko:debug:armed:remaining"
+_RESULTS_PREFIX = "picko:debug:results"
+
+# Takes one of the remaining armed profiles: -1 once they are used up or expired. A bare DECR would recreate an
+# expired counter at -1 without a TTL.
+_CLAIM_SCRIPT = """
+if tonumber(redis.call('GET', KEYS[1]) or '0') <= 0 then
+    return -1
+end
+return redis.call('DECR', KEYS[1])
+"""
+
+# Frames kept per allocation when grouping memory by traceback; a single frame is enough for "lineno".
+_TRACEBACK_FRAMES = 25
+
+# One profiling session per process: profilers and tracemalloc are process-wide.
+_session_lock = threading.Lock()
+
+
+class ProfileMode(StrEnum):
+    CPROFILE = "cprofile"
+    SAMPLING = "sampling"
+    MEMORY = "memory"
+
+
+class MemoryGrouping(StrEnum):
+    LINENO = "lineno"
+    TRACEBACK = "traceback"
+
+
+class ProfilerBusyError(RuntimeError):
+    pass
+
+
+@dataclass
+class ProfileResult:
+    mode: ProfileMode
+    data: bytes = b""
+    seconds: float = 0.0
+
+    @property
+    def media_type(self) -> str:
+        return {
+            ProfileMode.CPROFILE: "application/octet-stream",
+            ProfileMode.SAMPLING: "text/plain",
+            ProfileMode.MEMORY: "application/json",
+        }[self.mode]
+
+    @property
+    def filename(self) -> str:
+        return {
+            ProfileMode.CPROFILE: "profile.pstats",
+            ProfileMode.SAMPLING: "profile.folded",
+            ProfileMode.MEMORY: "memory.json",
+        }[self.mode]
+
+
+class StackSampler:
+    """Statistical profiler sampling one thread's stack from a background thread, in the folded flame graph format."""
+
+    def __init__(self, thread_id: int, *, interval_seconds: float) -> None:
+        self._thread_id = thread_id
+        self._interval_seconds = interval_seconds
+        self._stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="picko-stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> bytes:
+        self._stop.set()
+        self._thread.join()
+        return "".join(f"{stack} {count}\n" for stack, count in self._stacks.most_common()).encode()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval_seconds):
+            if (frame := sys._current_frames().get(self._thread_id)) is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_qualname} ({code.co_filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self._stacks[";".join(reversed(stack))] += 1
+
+
+def _memory_report(snapshot: tracemalloc.Snapshot, *, top: int, group_by: MemoryGrouping) -> bytes:
+    snapshot = snapshot.filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+    stats = snapshot.statistics(group_by.value)
+    return orjson.dumps(
+        {
+            "total_kib": round(sum(stat.size for stat in stats) / 1024, 1),
+            "group_by": group_by.value,
+            "top": [
+                {
+                    "size_kib": round(stat.size / 1024, 1),
+                    "count": stat.count,
+                    "traceback": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+                }
+                for stat in stats[:top]
+            ],
+        }
+    )
+
+
+@contextmanager
+def profile_session(
+    mode: ProfileMode, *, top: int = 25, group_by: MemoryGrouping = MemoryGrouping.LINENO
+) -> Iterator[ProfileResult]:
+    """Profile the calling thread (CPU) or the whole process (memory) for the duration of the block."""
+    if not _session_lock.acquire(blocking=False):
+        raise ProfilerBusyError("A profiling session is already running in this process.")
+    result = ProfileResult(mode)
+    started = time.perf_counter()
+    try:
+        if mode is ProfileMode.CPROFILE:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError as exc:  # another profiler (e.g. a debugger) is active
+                raise ProfilerBusyError(str(exc)) from exc
+            try:
+                yield result
+            finally:
+                profile.disable()
+                profile.create_stats()
+                result.data = marshal.dumps(profile.stats)
+        elif mode is ProfileMode.SAMPLING:
+            sampler = StackSampler(threading.get_ident(), interval_seconds=settings.debug_sampling_interval_seconds)
+            sampler.start()
+            try:
+                yield result
+            finally:
+                result.data = sampler.stop()
+        else:
+            was_tracing = tracemalloc.is_tracing()
+            if not was_tracing:
+                tracemalloc.start(_TRACEBACK_FRAMES if group_by is MemoryGrouping.TRACEBACK else 1)
+            try:
+                yield result
+            finally:
+                snapshot = tracemalloc.take_snapshot()
+                if not was_tracing:
+                    tracemalloc.stop()
+                result.data = _memory_report(snapshot, top=top, group_by=group_by)
+    finally:
+        result.seconds = round(time.perf_counter() - started, 3)
+        _session_lock.release()
+
+
+async def arm_task_profiling(
+    mode: ProfileMode,
+    *,
+    count: int,
+    task: str | None,
+    expires_seconds: int,
+    top: int = 25,
+    group_by: MemoryGrouping = MemoryGrouping.LINENO,
+) -> str:
+    """Ask Celery workers to profile the next ``count`` tasks (named ``task`` when given); returns the session id."""
+    session = secrets.token_hex(8)
+    armed = orjson.dumps({"session": session, "mode": mode, "task": task, "top": top, "group_by": group_by})
+    async with get_redis().pipeline(transaction=True) as pipe:
+        pipe.set(_ARMED_KEY, armed, ex=expires_seconds)
+        pipe.set(_REMAINING_KEY, count, ex=expires_seconds)
+        await pipe.execute()
+    return session
+
+
+async def list_task_profiles(session: str) -> list[dict[str, Any]]:
+    entries = await get_redis().hgetall(f"{_RESULTS_PREFIX}:{session}:meta")
+    return sorted((orjson.loads(value) for value in entries.values()), key=lambda entry: entry["finished_at"])
+
+
+async def get_task_profile(session: str, task_id: str) -> tuple[dict[str, Any], bytes] | None:
+    async with get_redis().pipeline(transaction=False) as pipe:
+        pipe.hget(f"{_RESULTS_PREFIX}:{session}:meta", task_id)
+        pipe.hget(f"{_RESULTS_PREFIX}:{session}:data", task_id)
+        meta, data = await pipe.execute()
+    if meta is None or data is None:
+        return None
+    return orjson.loads(meta), data
+
+
+class _TaskProfiling:
+    """Celery signal handlers profiling the tasks armed through ``arm_task_profiling``."""
+
+    def __init__(self) -> None:
+        self._armed: dict[str, Any] | None = None
+        self._next_check = 0.0  # idle workers read the armed session at most once per ``debug_task_poll_seconds``
+        self._running: dict[str, tuple[ExitStack, ProfileResult, dict[str, Any], str]] = {}
+        self._claim_script: Any = None
+
+    def _armed_session(self) -> dict[str, Any] | None:
+        if (now := time.monotonic()) >= self._next_check:
+            self._next_check = now + settings.debug_task_poll_seconds
+            try:
+                armed = get_sync_redis().get(_ARMED_KEY)
+            except Exception as exc:
+                logger.warning("Failed to check for armed task profiling", error=str(exc))
+                armed = None
+            self._armed = orjson.loads(armed) if armed else None
+        return self._armed
+
+    def on_prerun(self, task_id: str, task: Any, **_: Any) -> None:
+        if (armed := self._armed_session()) is None or armed["task"] not in (None, task.name):
+            return
+        try:
+            if self._claim_script is None:
+                self._claim_script = get_sync_redis().register_script(_CLAIM_SCRIPT)
+            if self._claim_script(keys=[_REMAINING_KEY]) < 0:
+                self._armed = None  # used up (or expired); nothing to do until the next poll
+                return
+        except Exception as exc:
+            logger.warning("Failed to claim armed task profiling", error=str(exc))
+            return
+
+        stack = ExitStack()
+        try:
+            result = stack.enter_context(
+                profile_session(
+                    ProfileMode(armed["mode"]), top=armed["top"], group_by=MemoryGrouping(armed["group_by"])
+                )
+            )
+        except ProfilerBusyError:
+            return
+        self._running[task_id] = (stack, result, armed, task.name)
+
+    def on_postrun(self, task_id: str, **_: Any) -> None:
+        if (running := self._running.pop(task_id, None)) is None:
+            return
+        stack, result, armed, task_name = running
+        stack.close()
+
+        session = armed["session"]
+        meta = {
+            "task_id": task_id,
+            "task": task_name,
+            "mode": result.mode,
+            "seconds": result.seconds,
+            "bytes": len(result.data),
+            "finished_at": time.time(),
+        }
+        ttl = settings.debug_result_ttl_seconds
+        try:
+            with get_sync_redis().pipeline(transaction=False) as pipe:
+                pipe.hset(f"{_RESULTS_PREFIX}:{session}:meta", task_id, orjson.dumps(meta))
+                pipe.hset(f"{_RESULTS_PREFIX}:{session}:data", task_id, result.data)
+                pipe.expire(f"{_RESULTS_PREFIX}:{session}:meta", ttl)
+                pipe.expire(f"{_RESULTS_PREFIX}:{session}:data", ttl)
+                pipe.execute()
+        except Exception as exc:
+            logger.warning("Failed to store task profile", session=session, task_id=task_id, error=str(exc))
+            return
+        logger.info("Stored task profile", session=session, **meta)
+
+
+def install_task_profiling() -> None:
+    """Connect the task profiling hooks to Celery's signals, in every worker process."""
+    from celery.signals import task_postrun, task_prerun
+
+    profiling = _TaskProfiling()
+    task_prerun.connect(profiling.on_prerun, weak=False)
+    task_postrun.connect(profiling.on_postrun, weak=False)
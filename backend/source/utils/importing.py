@@ -0,0 +1,119 @@
+import csv
+import io
+from dataclasses import asdict, dataclass
+from typing import Any
+
+import orjson
+from pydantic import BaseModel, EmailStr, Field, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from source.database.operations import register_participants_bulk
+from source.settings import LanguageSelection
+
+CSV_COLUMNS = ("name", "email", "language", "wishlist")
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class RowError:
+    row: int  # 1-based position of the data row in the uploaded file
+    name: str | None
+    reason: str
+
+
+def parse_rows(content: bytes, *, file_format: str) -> list[dict[str, Any]]:
+    """Parse an uploaded participant list: a JSON list (or ``{"participants": [...]}``) or a CSV file with a header."""
+    if file_format == "json":
+        try:
+            data = orjson.loads(content)
+        except orjson.JSONDecodeError as exc:
+            raise ImportFormatError(f"Invalid JSON: {exc}") from exc
+        if isinstance(data, dict):
+            data = data.get("participants")
+        if not isinstance(data, list) or not all(isinstance(item, dict) for item in data):
+            raise ImportFormatError("Expected a list of participant objects.")
+        return data
+
+    if file_format == "csv":
+        try:
+            text = content.decode("utf-8-sig")
+        except UnicodeDecodeError as exc:
+            raise ImportFormatError("CSV must be UTF-8 encoded.") from exc
+        reader = csv.DictReader(io.StringIO(text))
+        if reader.fieldnames is None or "name" not in (f.strip().lower() for f in reader.fieldnames):
+            raise ImportFormatError(f"CSV needs a header row with at least a 'name' column ({', '.join(CSV_COLUMNS)}).")
+        return [
+            {
+                key.strip().lower(): value.strip()
+                for key, value in row.items()
+                if key and key.strip().lower() in CSV_COLUMNS and value and value.strip()
+            }
+            for row in reader
+        ]
+
+    raise ImportFormatError(f"Unsupported format: {file_format}")
+
+
+def validate_rows[T: BaseModel](
+    rows: list[dict[str, Any]], model: type[T]
+) -> tuple[list[tuple[int, T]], list[RowError]]:
+    """Validate every row against ``model``, collecting per-row errors instead of stopping at the first one."""
+    valid: list[tuple[int, T]] = []
+    errors: list[RowError] = []
+    for number, row in enumerate(rows, start=1):
+        try:
+            valid.append((number, model.model_validate(row)))
+        except ValidationError as exc:
+            reason = "; ".join(
+                f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}" for error in exc.errors()
+            )
+            name = row.get("name")
+            errors.append(RowError(row=number, name=name if isinstance(name, str) else None, reason=reason))
+    return valid, errors
+
+
+class ParticipantRegister(BaseModel):
+    name: str = Field(min_length=1, max_length=255)
+    email: EmailStr | None = None
+    language: LanguageSelection = LanguageSelection.EN
+    wishlist: str | None = Field(default=None, max_length=1000)
+
+
+def participant_values(payload: ParticipantRegister) -> dict[str, Any]:
+    return {
+        "name": payload.name.strip(),
+        "email": str(payload.email).strip() if payload.email else None,
+        "language": payload.language,
+        "wishlist": payload.wishlist.strip() if payload.wishlist else None,
+    }
+
+
+async def import_participants(session: AsyncSession, *, event_id: int, rows: list[dict[str, Any]]) -> dict[str, Any]:
+    """Validate uploaded rows with the registration rules and insert the valid ones in one batch."""
+    valid, errors = validate_rows(rows, ParticipantRegister)
+
+    row_by_name: dict[str, int] = {}
+    values = []
+    for number, payload in valid:
+        participant = participant_values(payload)
+        if (first := row_by_name.get(participant["name"])) is not None:
+            errors.append(RowError(row=number, name=participant["name"], reason=f"Same name as row {first}."))
+            continue
+        row_by_name[participant["name"]] = number
+        values.append(participant)
+
+    inserted, skipped = [], set()
+    if values:
+        inserted, skipped = await register_participants_bulk(session, event_id=event_id, participants=values)
+
+    errors.extend(
+        RowError(row=row_by_name[name], name=name, reason="A participant with this name already exists for this event.")
+        for name in skipped
+    )
+    return {
+        "imported": [row._asdict() for row in inserted],
+        "errors": [asdict(error) for error in sorted(errors, key=lambda e: e.row)],
+    }
@@ -0,0 +1,61 @@
+import asyncio
+import base64
+import datetime
+import heapq
+import itertools
+from dataclasses import dataclass
+
+import orjson
+from sqlalchemy import Row
+
+from source.database.connection import new_session, shard_count
+from source.database.operations import list_events
+from source.settings import EventStateSelection
+from source.utils.datetime import ensure_utc
+
+
+@dataclass(frozen=True)
+class EventPage:
+    events: list[Row]
+    next_cursor: str | None
+
+
+def encode_cursor(registration_deadline: datetime.datetime, event_id: int) -> str:
+    raw = orjson.dumps([ensure_utc(registration_deadline).isoformat(), event_id])
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime.datetime, int]:
+    """The ``(registration_deadline, id)`` key a page starts after; raises ``ValueError`` for malformed cursors."""
+    try:
+        deadline, event_id = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return ensure_utc(datetime.datetime.fromisoformat(deadline)), int(event_id)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor.") from exc
+
+
+def _sort_key(row: Row) -> tuple[datetime.datetime, int]:
+    return ensure_utc(row.registration_deadline), row.id
+
+
+async def list_events_page(
+    *, limit: int, cursor: str | None = None, state: EventStateSelection | None = None
+) -> EventPage:
+    """One page of events across all shards, ordered by ``(registration_deadline, id)``."""
+    # Every shard returns its next ``limit + 1`` rows after the cursor; the extra row tells if there is a next page.
+    after = decode_cursor(cursor) if cursor else None
+
+    async def _list_shard(shard: int) -> list[Row]:
+        async with new_session(shard) as session:
+            return list(await list_events(session, limit=limit + 1, after=after, state=state))
+
+    pages = await asyncio.gather(*(_list_shard(shard) for shard in range(shard_count())))
+    rows = list(itertools.islice(heapq.merge(*pages, key=_sort_key), limit + 1))
+    next_cursor = encode_cursor(*_sort_key(rows[limit - 1])) if len(rows) > limit else None
+    return EventPage(events=rows[:limit], next_cursor=next_cursor)
+
+
+def event_state(row: Row) -> EventStateSelection:
+    if row.notified_at is not None:
+        return EventStateSelection.NOTIFIED
+    return EventStateSelection.DRAWN if row.is_draw_complete else EventStateSelection.OPEN
@@ -0,0 +1,131 @@
+import asyncio
+from collections.abc import AsyncIterator
+from functools import cache
+from typing import TYPE_CHECKING, Any
+
+import orjson
+from structlog import get_logger
+
+from source.settings import settings
+from source.utils.redis import get_redis
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+logger = get_logger()
+
+CHANNEL_PREFIX = "picko:event"
+
+PARTICIPANT_JOINED = "participant-joined"
+DRAW_COMPLETE = "draw-complete"
+
+
+async def publish_event_update(
+    event_id: int, kind: str, data: dict[str, Any] | None = None, *, redis: "Redis | None" = None
+) -> None:
+    # Failures are only logged: notifications are a convenience, clients can always re-fetch.
+    if not settings.event_stream_enabled:
+        return
+    message = orjson.dumps({"type": kind, "event_id": event_id, "data": data or {}})
+    try:
+        await (redis or get_redis()).publish(f"{CHANNEL_PREFIX}:{event_id}", message)
+    except Exception as exc:
+        logger.warning("Failed to publish event update", event_id=event_id, kind=kind, error=str(exc))
+
+
+class EventBroadcaster:
+    """Fans Redis pub/sub messages out to the live streams open in this worker, through one pattern subscription."""
+
+    def __init__(self, *, queue_size: int, max_subscribers: int) -> None:
+        self._queue_size = queue_size
+        self._max_subscribers = max_subscribers
+        self._subscribers: dict[int, set[asyncio.Queue[bytes]]] = {}
+        self._count = 0
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def is_full(self) -> bool:
+        return self._count >= self._max_subscribers
+
+    def subscribe(self, event_id: int) -> asyncio.Queue[bytes]:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen(), name="event-broadcaster")
+        # Bounded: a stream that falls behind misses messages rather than blocking the others.
+        queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=self._queue_size)
+        self._subscribers.setdefault(event_id, set()).add(queue)
+        self._count += 1
+        return queue
+
+    async def stop(self) -> None:
+        """Cancel the subscription, which closes its Redis connection; the next ``subscribe`` starts a new one."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def unsubscribe(self, event_id: int, queue: asyncio.Queue[bytes]) -> None:
+        if (queues := self._subscribers.get(event_id)) is None or queue not in queues:
+            return
+        queues.discard(queue)
+        self._count -= 1
+        if not queues:
+            del self._subscribers[event_id]
+
+    def dispatch(self, event_id: int, frame: bytes) -> None:
+        for queue in self._subscribers.get(event_id, ()):
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                logger.debug("Dropping event update for a slow stream", event_id=event_id)
+
+    async def _listen(self) -> None:
+        backoff = 1.0
+        while True:
+            pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}:*")
+                backoff = 1.0
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    try:
+                        event_id = int(message["channel"].rsplit(b":", 1)[1])
+                        kind = orjson.loads(message["data"])["type"]
+                    except (ValueError, KeyError, TypeError):
+                        continue
+                    # Rendered once here rather than per stream.
+                    self.dispatch(event_id, b"event: " + kind.encode() + b"\ndata: " + message["data"] + b"\n\n")
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Event update subscription lost; reconnecting", error=str(exc), retry_in=backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                await pubsub.aclose()
+
+
+@cache
+def get_event_broadcaster() -> EventBroadcaster:
+    return EventBroadcaster(
+        queue_size=settings.event_stream_queue_size, max_subscribers=settings.event_stream_max_subscribers
+    )
+
+
+async def stream_event_updates(event_id: int) -> AsyncIterator[bytes]:
+    """Server-sent events for ``event_id``, ending after ``event_stream_max_seconds`` for the client to reconnect."""
+    broadcaster = get_event_broadcaster()
+    queue = broadcaster.subscribe(event_id)
+    loop = asyncio.get_running_loop()
+    ends_at = loop.time() + settings.event_stream_max_seconds
+    try:
+        yield b"retry: 5000\n\n"
+        while (remaining := ends_at - loop.time()) > 0:
+            try:
+                yield await asyncio.wait_for(
+                    queue.get(), timeout=min(remaining, settings.event_stream_heartbeat_seconds)
+                )
+            except TimeoutError:
+                yield b": ping\n\n"
+    finally:
+        broadcaster.unsubscribe(event_id, queue)
@@ -3,19 +3,24 @@ import datetime
 import html as html_lib
 import json
 import random
-from collections.abc import Sequence
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Sequence
 from dataclasses import dataclass
 from email.utils import parsedate_to_datetime
 from functools import lru_cache
+from http import HTTPStatus
 from pathlib import Path
 from string import Template
-from typing import Any, Protocol
+from typing import TYPE_CHECKING, Any, Protocol
 
 import httpx
-from fastapi import status
 from structlog import get_logger
 
 from source.settings import LanguageSelection, Settings, settings
+from source.utils.circuitbreaker import CircuitBreaker, get_email_circuit_breaker
+from source.utils.tracing import SpanKind, start_span
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
 
 logger = get_logger()
 
@@ -28,29 +33,82 @@ class PostManSendError(PostManError):
     pass
 
 
+class PostManRetryableError(PostManSendError):
+    """The provider was unavailable or rate limiting (network error, 429, 5xx); the send may succeed later."""
+
+    def __init__(self, message: str, *, retry_after_seconds: float | None = None) -> None:
+        super().__init__(message)
+        self.retry_after_seconds = retry_after_seconds
+
+
+class PostManCircuitOpenError(PostManRetryableError):
+    """The circuit breaker is open: the provider has been failing, so the send was not attempted."""
+
+
 @dataclass(frozen=True)
 class SendResult:
     id: str
     raw: dict[str, Any]
 
 
-class AssignmentProtocol(Protocol):
-    reveal_token: str
+@dataclass(frozen=True)
+class DeferredEmail:
+    """A participant whose email hit a retryable failure and should be requeued rather than retried in place."""
+
+    name: str
+    retry_after_seconds: float | None
+    circuit_open: bool = False
+
 
+class RecipientProtocol(Protocol):
+    """A participant to email: a row of ``stream_email_recipients`` or an ``EmailRecipient``."""
 
-class ParticipantProtocol(Protocol):
+    name: str
+    email: str | None
+    language: LanguageSelection
+    reveal_token: str | None
+
+
+@dataclass(frozen=True)
+class EmailRecipient:
+    name: str
     email: str | None
-    name: str | None
     language: LanguageSelection
-    event: Any
-    given_assignments: Sequence[AssignmentProtocol]
+    reveal_token: str | None
+
+    @classmethod
+    def from_participant(cls, participant: Any) -> "EmailRecipient":
+        # Needs the participant's ``given_assignments`` loaded.
+        assignments = participant.given_assignments
+        return cls(
+            name=participant.name,
+            email=participant.email,
+            language=participant.language,
+            reveal_token=assignments[0].reveal_token if assignments else None,
+        )
+
+
+async def _aiter(items: Iterable[Any] | AsyncIterable[Any]) -> AsyncIterator[Any]:
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
 
 
 class PostMan:
     BASE_URL = "https://api.resend.com/emails"
 
     def __init__(
-        self, settings: Settings = settings, *, timeout: float = 20.0, client: httpx.AsyncClient | None = None
+        self,
+        settings: Settings = settings,
+        *,
+        timeout: float = 20.0,
+        client: httpx.AsyncClient | None = None,
+        defer_retries: bool = False,
+        breaker: CircuitBreaker | None = None,
+        redis: "Redis | None" = None,
     ) -> None:
         self._sender = settings.email_from
         self._api_key = settings.resend_api_key
@@ -60,6 +118,15 @@ class PostMan:
         self._backoff_base_seconds = float(getattr(settings, "resend_backoff_base_seconds", 0.5))
         self._max_retry_sleep_seconds = float(getattr(settings, "resend_max_retry_sleep_seconds", 20.0))
         self._min_interval_seconds = float(getattr(settings, "resend_min_interval_seconds", 0.0))
+        self._concurrency = int(getattr(settings, "resend_concurrency", 1))
+        self._retry_delay_base_seconds = float(getattr(settings, "resend_retry_delay_base_seconds", 30.0))
+        self._max_retry_delay_seconds = float(getattr(settings, "resend_max_retry_delay_seconds", 600.0))
+        # Retryable failures are reported back for Celery to requeue instead of retried with in-process sleeps.
+        self._defer_retries = defer_retries
+        if breaker is None and getattr(settings, "email_breaker_enabled", True):
+            breaker = get_email_circuit_breaker()
+        self._breaker = breaker
+        self._redis = redis
 
         self._timeout = timeout
         self._client = client
@@ -130,24 +197,41 @@ class PostMan:
         except Exception:
             return None
 
-    def _compute_backoff_seconds(self, *, attempt: int, retry_after_seconds: float | None) -> float:
+    def _compute_backoff_seconds(
+        self, *, attempt: int, retry_after_seconds: float | None, base: float | None = None, cap: float | None = None
+    ) -> float:
+        base = self._backoff_base_seconds if base is None else base
+        cap = self._max_retry_sleep_seconds if cap is None else cap
         if retry_after_seconds is not None:
-            return min(retry_after_seconds, self._max_retry_sleep_seconds)
+            return min(retry_after_seconds, cap)
         # Exponential backoff with jitter.
-        base = max(0.0, self._backoff_base_seconds)
+        base = max(0.0, base)
         exp = base * (2**attempt)
-        jitter = random.uniform(0.0, max(0.0, base))
-        return min(exp + jitter, self._max_retry_sleep_seconds)
+        jitter = random.uniform(0.0, base)
+        return min(exp + jitter, cap)
+
+    @property
+    def max_retries(self) -> int:
+        return max(0, self._max_retries)
+
+    def deferred_retry_delay_seconds(self, *, attempt: int, retry_after_seconds: float | None) -> float:
+        """Delay before requeueing a deferred send; ``attempt`` counts the deferred retries already made."""
+        return self._compute_backoff_seconds(
+            attempt=attempt,
+            retry_after_seconds=retry_after_seconds,
+            base=self._retry_delay_base_seconds,
+            cap=self._max_retry_delay_seconds,
+        )
 
     @staticmethod
     def _is_retryable_status(code: int) -> bool:
-        return code == status.HTTP_429_TOO_MANY_REQUESTS or code in (
-            status.HTTP_408_REQUEST_TIMEOUT,
-            status.HTTP_425_TOO_EARLY,
-            status.HTTP_500_INTERNAL_SERVER_ERROR,
-            status.HTTP_502_BAD_GATEWAY,
-            status.HTTP_503_SERVICE_UNAVAILABLE,
-            status.HTTP_504_GATEWAY_TIMEOUT,
+        return code == HTTPStatus.TOO_MANY_REQUESTS or code in (
+            HTTPStatus.REQUEST_TIMEOUT,
+            HTTPStatus.TOO_EARLY,
+            HTTPStatus.INTERNAL_SERVER_ERROR,
+            HTTPStatus.BAD_GATEWAY,
+            HTTPStatus.SERVICE_UNAVAILABLE,
+            HTTPStatus.GATEWAY_TIMEOUT,
         )
 
     async def send(
@@ -183,45 +267,72 @@ class PostMan:
         if self._client is None:
             raise PostManSendError("PostMan client not initialized. Use 'async with PostMan() as postman:'")
 
+        with start_span("email.send", attributes=dict(tags or {})) as span:
+            try:
+                return await self._send_with_retries(payload)
+            finally:
+                if self._breaker is not None:
+                    span.set_attribute("circuit_state", self.circuit_state)
+
+    async def _send_with_retries(self, payload: dict[str, Any]) -> SendResult:
+        max_retries = 0 if self._defer_retries else max(0, self._max_retries)
         last_exc: Exception | None = None
-        for attempt in range(max(0, self._max_retries) + 1):
+        for attempt in range(max_retries + 1):
+            if self._breaker is not None and (wait := await self._breaker.acquire(redis=self._redis)) is not None:
+                raise PostManCircuitOpenError("Email provider circuit breaker is open", retry_after_seconds=wait)
             try:
-                resp = await self._client.post(
-                    self.BASE_URL,
-                    headers={"Authorization": f"Bearer {self._api_key}"},
-                    json=payload,
-                )
+                with start_span(
+                    "email.send.attempt", kind=SpanKind.CLIENT, attributes={"attempt": attempt + 1}
+                ) as span:
+                    resp = await self._client.post(
+                        self.BASE_URL,
+                        headers={"Authorization": f"Bearer {self._api_key}"},
+                        json=payload,
+                    )
+                    span.set_attribute("http.status_code", resp.status_code)
             except httpx.RequestError as e:
                 last_exc = e
-                if attempt >= self._max_retries:
-                    raise PostManSendError(f"Network error sending email after retries: {e}") from e
+                await self._record_outcome(success=False)
+                if attempt >= max_retries:
+                    raise PostManRetryableError(f"Network error sending email after retries: {e}") from e
                 sleep_s = self._compute_backoff_seconds(attempt=attempt, retry_after_seconds=None)
                 logger.warning(
                     "Email send network error; retrying",
                     attempt=attempt + 1,
-                    max_retries=self._max_retries,
+                    max_retries=max_retries,
                     sleep_seconds=sleep_s,
                     error=str(e),
                 )
                 await asyncio.sleep(sleep_s)
                 continue
+            except BaseException:
+                if self._breaker is not None:
+                    self._breaker.release()
+                raise
+
+            # Only outages count against the provider; a rejected message (e.g. a bad address) means it is up.
+            await self._record_outcome(success=not self._is_retryable_status(resp.status_code))
 
             try:
                 data = resp.json()
             except ValueError:
                 data = {"raw_text": resp.text}
 
-            if resp.status_code >= status.HTTP_400_BAD_REQUEST:
+            if resp.status_code >= HTTPStatus.BAD_REQUEST:
                 # Sanitize response to avoid leaking sensitive info
                 safe_data = {k: v for k, v in data.items() if k not in ("request", "headers")}
-                if self._is_retryable_status(resp.status_code) and attempt < self._max_retries:
+                if self._is_retryable_status(resp.status_code):
                     retry_after = self._parse_retry_after_seconds(resp.headers.get("Retry-After"))
+                    if attempt >= max_retries:
+                        raise PostManRetryableError(
+                            f"Resend error {resp.status_code}: {safe_data}", retry_after_seconds=retry_after
+                        )
                     sleep_s = self._compute_backoff_seconds(attempt=attempt, retry_after_seconds=retry_after)
                     logger.warning(
                         "Email send got retryable response; retrying",
                         status_code=resp.status_code,
                         attempt=attempt + 1,
-                        max_retries=self._max_retries,
+                        max_retries=max_retries,
                         retry_after_seconds=retry_after,
                         sleep_seconds=sleep_s,
                         response=safe_data,
@@ -239,64 +350,132 @@ class PostMan:
         # Should be unreachable, but keep a safe fallback.
         raise PostManSendError(f"Failed to send email after retries: {last_exc}")
 
+    @property
+    def circuit_state(self) -> str | None:
+        return self._breaker.state.value if self._breaker is not None else None
+
+    async def circuit_open_for_seconds(self) -> float | None:
+        """Seconds until sends are attempted again while the circuit breaker is open, otherwise None."""
+        if self._breaker is None:
+            return None
+        return await self._breaker.open_for_seconds(redis=self._redis)
+
+    async def _record_outcome(self, *, success: bool) -> None:
+        if self._breaker is not None:
+            await self._breaker.record(success=success, redis=self._redis)
+
     async def send_event_emails(
-        self, *, participants: Sequence[ParticipantProtocol], event_id: int
-    ) -> tuple[list[str], int]:
+        self,
+        *,
+        participants: Iterable[RecipientProtocol] | AsyncIterable[RecipientProtocol],
+        event_id: int,
+        concurrency: int | None = None,
+    ) -> tuple[list[str], int, list[DeferredEmail]]:
+        """Email every participant their reveal link, with up to ``concurrency`` sends in flight."""
+        # ``participants`` may be a database cursor: the next row is only taken once a send slot is free.
+        semaphore = asyncio.Semaphore(max(1, concurrency or self._concurrency))
         sent_to: list[str] = []
+        deferred: list[DeferredEmail] = []
         skipped = 0
 
-        for participant in participants:
-            if not participant.email:
-                skipped += 1
-                continue
-
-            assignments = participant.given_assignments
-            if not assignments or not participant.event:
-                skipped += 1
-                continue
+        async def _send(participant: RecipientProtocol) -> None:
+            nonlocal skipped
+            try:
+                name = await self._send_participant_email(participant, event_id=event_id)
+            except PostManRetryableError as exc:
+                deferred.append(
+                    DeferredEmail(
+                        participant.name or "",
+                        exc.retry_after_seconds,
+                        circuit_open=isinstance(exc, PostManCircuitOpenError),
+                    )
+                )
+            else:
+                if name is None:
+                    skipped += 1
+                else:
+                    sent_to.append(name)
+            finally:
+                semaphore.release()
+
+        in_flight: set[asyncio.Task[None]] = set()
+        try:
+            async for participant in _aiter(participants):
+                await semaphore.acquire()
+                for task in [task for task in in_flight if task.done()]:
+                    in_flight.discard(task)
+                    task.result()  # re-raises unexpected errors
+                in_flight.add(asyncio.create_task(_send(participant)))
+            await asyncio.gather(*in_flight)
+        except BaseException:
+            for task in in_flight:
+                task.cancel()
+            await asyncio.gather(*in_flight, return_exceptions=True)
+            raise
+        return sent_to, skipped, deferred
+
+    async def _send_participant_email(self, participant: RecipientProtocol, *, event_id: int) -> str | None:
+        if not participant.email or not (token := participant.reveal_token):
+            return None
 
-            token = assignments[0].reveal_token
-            join_url = f"{self._frontend_origin}/join/{token}"
+        join_url = f"{self._frontend_origin}/join/{token}"
 
-            lang = participant.language
-            subject = self._get_christmas_subject(lang)
+        lang = participant.language
+        subject = self._get_christmas_subject(lang)
 
-            html_body = self._render_christmas_email_html(language=lang, join_url=join_url, app_name=self._app_name)
-            text_body = self._render_christmas_email_text(language=lang, join_url=join_url, app_name=self._app_name)
+        html_body = self._render_christmas_email_html(language=lang, join_url=join_url, app_name=self._app_name)
+        text_body = self._render_christmas_email_text(language=lang, join_url=join_url, app_name=self._app_name)
 
-            try:
-                result = await self.send(
-                    to=participant.email,
-                    subject=subject,
-                    html=html_body,
-                    text=text_body,
-                    tags={"event_id": str(event_id)},
-                )
-            except PostManSendError as exc:
-                logger.exception(
-                    "Failed to send email",
+        try:
+            result = await self.send(
+                to=participant.email,
+                subject=subject,
+                html=html_body,
+                text=text_body,
+                tags={"event_id": str(event_id)},
+            )
+        except PostManRetryableError as exc:
+            if self._defer_retries:
+                logger.warning(
+                    "Email send deferred",
                     to=participant.email,
                     participant_name=participant.name,
                     event_id=event_id,
+                    retry_after_seconds=exc.retry_after_seconds,
                     error=str(exc),
                 )
-                skipped += 1
-                continue
-
-            logger.info(
-                "Email sent",
+                raise
+            logger.exception(
+                "Failed to send email",
+                to=participant.email,
+                participant_name=participant.name,
+                event_id=event_id,
+                error=str(exc),
+            )
+            return None
+        except PostManSendError as exc:
+            logger.exception(
+                "Failed to send email",
                 to=participant.email,
                 participant_name=participant.name,
                 event_id=event_id,
-                resend_id=result.id,
+                error=str(exc),
             )
-            sent_to.append(participant.name or "")
+            return None
+
+        logger.info(
+            "Email sent",
+            to=participant.email,
+            participant_name=participant.name,
+            event_id=event_id,
+            resend_id=result.id,
+        )
 
-            # Smooth bursts to reduce chance of hitting provider rate limits.
-            if self._min_interval_seconds > 0:
-                await asyncio.sleep(self._min_interval_seconds)
+        # Smooth bursts to reduce chance of hitting provider rate limits.
+        if self._min_interval_seconds > 0:
+            await asyncio.sleep(self._min_interval_seconds)
 
-        return sent_to, skipped
+        return participant.name or ""
 
     async def close(self) -> None:
         if self._client and self._owns_client:
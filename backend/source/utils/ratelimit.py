@@ -0,0 +1,160 @@
+import math
+import re
+import time
+from collections import OrderedDict
+from functools import cache
+from typing import Protocol
+
+from fastapi import HTTPException, Request, status
+from structlog import get_logger
+
+from source.settings import settings
+from source.utils.redis import get_redis
+
+logger = get_logger()
+
+# Tokens are issued by secrets.token_urlsafe(32); anything else cannot exist in the database.
+_TOKEN_RE = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+
+# Sliding window counter: the previous fixed window's count is weighted by how much of it still overlaps the
+# sliding window. Returns {allowed, current, previous}.
+_REDIS_HIT_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local elapsed = tonumber(ARGV[3])
+if previous * (1 - elapsed) + current + 1 > limit then
+    return {0, current, previous}
+end
+current = redis.call('INCR', KEYS[1])
+if current == 1 then
+    redis.call('EXPIRE', KEYS[1], window * 2)
+end
+return {1, current, previous}
+"""
+
+
+def _retry_after_seconds(*, current: int, previous: int, limit: int, elapsed: float, window_seconds: int) -> int:
+    # Seconds until one more hit fits under the limit, given the counts of the current and previous windows.
+    if current + 1 > limit:
+        # Has to wait for the next window, until enough of the current one slides out.
+        needed = 1 - (limit - 1) / current if current else 0.0
+        wait = (1 - elapsed) + needed
+    else:
+        needed = 1 - (limit - current - 1) / previous if previous else 0.0
+        wait = needed - elapsed
+    return max(1, math.ceil(wait * window_seconds))
+
+
+class RateLimitBackend(Protocol):
+    async def hit(self, key: str, *, limit: int, window_seconds: int) -> int | None:
+        """Record a hit for ``key``; return None when allowed, or the seconds to wait when the limit is exceeded."""
+        ...
+
+
+class InMemoryRateLimitBackend:
+    """Per-worker sliding window counters with LRU eviction, so random keys cannot grow memory without bound."""
+
+    def __init__(self, *, max_keys: int = 100_000) -> None:
+        self._max_keys = max_keys
+        # key -> (window index, hits in that window, hits in the window before)
+        self._windows: OrderedDict[str, tuple[int, int, int]] = OrderedDict()
+
+    async def hit(self, key: str, *, limit: int, window_seconds: int) -> int | None:
+        now = time.time()
+        index, elapsed = int(now // window_seconds), (now % window_seconds) / window_seconds
+
+        current, previous = 0, 0
+        if (state := self._windows.get(key)) is not None:
+            state_index, state_current, state_previous = state
+            if state_index == index:
+                current, previous = state_current, state_previous
+            elif state_index == index - 1:
+                previous = state_current
+
+        if previous * (1 - elapsed) + current + 1 > limit:
+            return _retry_after_seconds(
+                current=current, previous=previous, limit=limit, elapsed=elapsed, window_seconds=window_seconds
+            )
+
+        self._windows[key] = (index, current + 1, previous)
+        self._windows.move_to_end(key)
+        if len(self._windows) > self._max_keys:
+            self._windows.popitem(last=False)
+        return None
+
+
+class RedisRateLimitBackend:
+    """Sliding window counters shared by all workers, updated atomically by a Lua script."""
+
+    def __init__(self, *, prefix: str = "picko:ratelimit") -> None:
+        self._prefix = prefix
+        self._script = None
+
+    async def hit(self, key: str, *, limit: int, window_seconds: int) -> int | None:
+        now = time.time()
+        index, elapsed = int(now // window_seconds), (now % window_seconds) / window_seconds
+
+        if self._script is None:
+            self._script = get_redis().register_script(_REDIS_HIT_SCRIPT)
+        try:
+            allowed, current, previous = await self._script(
+                keys=[f"{self._prefix}:{key}:{index}", f"{self._prefix}:{key}:{index - 1}"],
+                args=[limit, window_seconds, elapsed],
+            )
+        except Exception as exc:
+            # Fail open: an unavailable Redis must not take the API down with it.
+            logger.warning("Rate limit backend unavailable; allowing request", error=str(exc))
+            return None
+
+        if allowed:
+            return None
+        return _retry_after_seconds(
+            current=int(current), previous=int(previous), limit=limit, elapsed=elapsed, window_seconds=window_seconds
+        )
+
+
+@cache
+def get_rate_limit_backend() -> RateLimitBackend:
+    if settings.rate_limit_backend == "redis":
+        return RedisRateLimitBackend()
+    return InMemoryRateLimitBackend()
+
+
+def get_client_ip(request: Request) -> str:
+    if header := settings.rate_limit_client_ip_header:
+        if forwarded := request.headers.get(header):
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+class RateLimit:
+    """Route dependency rejecting malformed tokens and enforcing the per-IP and per-token limits of ``scope``."""
+
+    def __init__(self, scope: str, *, token_param: str = "token", per_token: bool = True) -> None:
+        self.scope = scope
+        self.token_param = token_param
+        self.per_token = per_token
+
+    async def __call__(self, request: Request) -> None:
+        token = request.path_params.get(self.token_param)
+        if token is not None and not _TOKEN_RE.match(token):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found. The link may be invalid.")
+
+        if not settings.rate_limit_enabled:
+            return
+
+        backend = get_rate_limit_backend()
+        window = settings.rate_limit_window_seconds
+        checks = [(f"{self.scope}:ip:{get_client_ip(request)}", getattr(settings, f"rate_limit_{self.scope}_per_ip"))]
+        if token is not None and self.per_token:
+            checks.append((f"{self.scope}:token:{token}", getattr(settings, f"rate_limit_{self.scope}_per_token")))
+
+        for key, limit in checks:
+            if (retry_after := await backend.hit(key, limit=limit, window_seconds=window)) is not None:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many requests. Please try again later.",
+                    headers={"Retry-After": str(retry_after)},
+                )
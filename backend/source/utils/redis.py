@@ -0,0 +1,32 @@
+from functools import cache
+from typing import TYPE_CHECKING
+
+from source.settings import settings
+
+if TYPE_CHECKING:
+    from redis import Redis as SyncRedis
+    from redis.asyncio import Redis
+
+
+@cache
+def get_redis() -> "Redis":
+    """Shared asyncio Redis client for the API process; the client library is only imported when first used."""
+    from redis.asyncio import Redis
+
+    return Redis.from_url(settings.redis_url)
+
+
+# Helpers taking a ``redis=`` client expect one of these when called outside the API's loop (Celery tasks, the CLI).
+def new_redis() -> "Redis":
+    """A dedicated client for code running under its own event loop; use it with ``async with`` so it is closed."""
+    from redis.asyncio import Redis
+
+    return Redis.from_url(settings.redis_url)
+
+
+@cache
+def get_sync_redis() -> "SyncRedis":
+    """Blocking client for code that runs outside any event loop, such as Celery signal handlers."""
+    from redis import Redis as SyncRedis
+
+    return SyncRedis.from_url(settings.redis_url)
@@ -0,0 +1,27 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    # OPT_UTC_Z renders UTC datetimes with a "Z" suffix, matching Pydantic's JSON output.
+    return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
+
+
+class TrustedJSONResponse(Response):
+    """JSON response for payloads the server built itself, encoded once with orjson and not validated again."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
@@ -0,0 +1,120 @@
+import asyncio
+import datetime
+import gzip
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import orjson
+from structlog import get_logger
+
+from source.database.connection import new_session, shard_count
+from source.database.models import Base, Event
+from source.database.operations import (
+    count_expired_events,
+    delete_events,
+    get_events_for_archive,
+    get_expired_event_ids,
+)
+from source.settings import settings
+
+logger = get_logger()
+
+
+@dataclass(frozen=True)
+class PurgeResult:
+    archive_path: str | None
+    events: int
+    batches: int
+    remaining: bool  # Stopped at max_batches with expired events left over.
+
+
+def retention_cutoff(days: int) -> datetime.datetime:
+    return datetime.datetime.now(datetime.UTC) - datetime.timedelta(days=days)
+
+
+def _columns(obj: Base) -> dict[str, Any]:
+    return {column.key: getattr(obj, column.key) for column in obj.__table__.columns}
+
+
+def serialize_event(event: Event) -> bytes:
+    """One JSON line with the event, its participants and every draw with its assignments."""
+    return (
+        orjson.dumps(
+            {
+                **_columns(event),
+                "participants": [_columns(participant) for participant in event.participants],
+                "draws": [
+                    {**_columns(draw), "assignments": [_columns(assignment) for assignment in draw.assignments]}
+                    for draw in event.draws
+                ],
+            }
+        )
+        + b"\n"
+    )
+
+
+async def count_purgeable_events(*, older_than_days: int | None = None) -> int:
+    cutoff = retention_cutoff(settings.retention_days if older_than_days is None else older_than_days)
+    total = 0
+    for shard in range(shard_count()):
+        async with new_session(shard) as session:
+            total += await count_expired_events(session, notified_before=cutoff)
+    return total
+
+
+async def archive_and_purge(
+    *,
+    older_than_days: int | None = None,
+    archive_dir: str | None = None,
+    batch_size: int | None = None,
+    pause_seconds: float | None = None,
+    max_batches: int | None = None,
+) -> PurgeResult:
+    """Archive events notified more than ``older_than_days`` ago to gzipped JSONL, then delete them in batches."""
+    # An event is only deleted once its archive line is on disk; a crash in between archives it again next run.
+    days = settings.retention_days if older_than_days is None else older_than_days
+    batch_size = settings.retention_batch_size if batch_size is None else batch_size
+    pause_seconds = settings.retention_batch_pause_seconds if pause_seconds is None else pause_seconds
+    max_batches = settings.retention_max_batches_per_run if max_batches is None else max_batches
+    cutoff = retention_cutoff(days)
+
+    directory = Path(settings.retention_archive_dir if archive_dir is None else archive_dir)
+    path = directory / f"events-{datetime.datetime.now(datetime.UTC):%Y%m%dT%H%M%SZ}.jsonl.gz"
+
+    archived = batches = 0
+    remaining = False
+    for shard in range(shard_count()):
+        while True:
+            if batches >= max_batches:
+                remaining = True
+                break
+
+            async with new_session(shard) as session:
+                if not (event_ids := await get_expired_event_ids(session, notified_before=cutoff, limit=batch_size)):
+                    break
+                events = await get_events_for_archive(session, event_ids=event_ids)
+
+                directory.mkdir(parents=True, exist_ok=True)
+                # Appending a gzip member per batch keeps the file a valid gzip stream.
+                with open(path, "ab") as raw:
+                    with gzip.GzipFile(fileobj=raw, mode="ab") as fh:
+                        fh.writelines(serialize_event(event) for event in events)
+                    raw.flush()
+                    os.fsync(raw.fileno())
+
+                deleted = await delete_events(session, event_ids=event_ids)
+                await session.commit()
+
+            archived += deleted
+            batches += 1
+            logger.info("Purged archived events", shard=shard, batch=batches, events=deleted, archive=str(path))
+
+            if len(event_ids) < batch_size:
+                break
+            await asyncio.sleep(pause_seconds)
+
+    return PurgeResult(
+        archive_path=str(path) if archived else None, events=archived, batches=batches, remaining=remaining
+    )
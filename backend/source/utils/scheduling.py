@@ -0,0 +1,80 @@
+import datetime
+import time
+from typing import Any
+
+from source.settings import settings
+from source.utils.datetime import ensure_utc
+from source.utils.tracing import SpanKind, inject_trace_headers, start_span
+
+DRAW_TASK_NAME = "draw"
+EMAIL_RETRY_TASK_NAME = "retry_participant_email"
+
+# Message header with the epoch time the draw was scheduled to run at, used to measure queue wait.
+SCHEDULED_FOR_HEADER = "picko_scheduled_for"
+
+
+def draw_countdown_seconds(deadline: datetime.datetime) -> int:
+    # Countdown (not ETA) avoids timezone pitfalls between the API and the workers.
+    remaining = (ensure_utc(deadline) - datetime.datetime.now(datetime.UTC)).total_seconds()
+    return max(0, int(remaining)) + settings.schedule_buffer_seconds
+
+
+def schedule_draw(
+    event_id: int, deadline: datetime.datetime, *, task_id: str | None = None, producer: Any = None
+) -> str:
+    """Queue the draw task to run shortly after the registration deadline and return its task id."""
+    # Sent by name, importing Celery on first use, so API workers don't load it at start-up.
+    from source.celery_app import celery_app
+
+    countdown = draw_countdown_seconds(deadline)
+    with start_span(
+        "draw.schedule", kind=SpanKind.PRODUCER, attributes={"event_id": event_id, "countdown_seconds": countdown}
+    ):
+        result = celery_app.send_task(
+            DRAW_TASK_NAME,
+            args=[event_id],
+            countdown=countdown,
+            task_id=task_id,
+            producer=producer,
+            headers={**inject_trace_headers(), SCHEDULED_FOR_HEADER: time.time() + countdown},
+        )
+    return result.id
+
+
+def schedule_notification_retry(event_id: int, *, attempt: int, delay_seconds: float) -> str:
+    """Run the draw task for ``event_id`` again in ``delay_seconds`` to email the participants not notified yet."""
+    from source.celery_app import celery_app
+
+    with start_span(
+        "email.schedule_notification_retry",
+        kind=SpanKind.PRODUCER,
+        attributes={"event_id": event_id, "attempt": attempt, "countdown_seconds": delay_seconds},
+    ):
+        result = celery_app.send_task(
+            DRAW_TASK_NAME,
+            args=[event_id],
+            kwargs={"notify_attempt": attempt},
+            countdown=delay_seconds,
+            headers={**inject_trace_headers(), SCHEDULED_FOR_HEADER: time.time() + delay_seconds},
+        )
+    return result.id
+
+
+def schedule_email_retry(event_id: int, name: str, *, attempt: int, delay_seconds: float, producer: Any = None) -> str:
+    """Queue another attempt at emailing participant ``name`` of ``event_id`` in ``delay_seconds``."""
+    from source.celery_app import celery_app
+
+    with start_span(
+        "email.schedule_retry",
+        kind=SpanKind.PRODUCER,
+        attributes={"event_id": event_id, "attempt": attempt, "countdown_seconds": delay_seconds},
+    ):
+        result = celery_app.send_task(
+            EMAIL_RETRY_TASK_NAME,
+            args=[event_id, name],
+            kwargs={"attempt": attempt},
+            countdown=delay_seconds,
+            producer=producer,
+            headers=inject_trace_headers(),
+        )
+    return result.id
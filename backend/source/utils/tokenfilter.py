@@ -0,0 +1,260 @@
+import asyncio
+import hashlib
+import math
+import secrets
+from collections.abc import Iterable
+from functools import cache
+from typing import TYPE_CHECKING
+
+import orjson
+from structlog import get_logger
+
+from source.settings import settings
+from source.utils.redis import get_redis
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+logger = get_logger()
+
+STREAM = "picko:tokens"
+GENERATION_KEY = "picko:tokens:generation"  # bumped when an announcement is lost, so every filter is reloaded
+
+_STREAM_START = b"0-0"
+_READ_BATCH = 1000
+_GENERATION_POLL_SECONDS = 5.0
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter of strings; ``in`` is never wrong for added items."""
+
+    def __init__(self, *, capacity: int, false_positive_rate: float) -> None:
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        # Double hashing: k positions from the two halves of one digest.
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8]), int.from_bytes(digest[8:]) | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class TokenFilter:
+    """The tokens issued on every shard, kept current from a Redis stream, so never-issued tokens skip the database."""
+
+    def __init__(self, *, false_positive_rate: float, min_capacity: int, rebuild_interval_seconds: float) -> None:
+        self._false_positive_rate = false_positive_rate
+        self._min_capacity = min_capacity
+        self._rebuild_interval_seconds = rebuild_interval_seconds
+        self._origin = secrets.token_hex(8).encode()  # to skip our own announcements, already added locally
+        self._filter: BloomFilter | None = None
+        self._suspended: BloomFilter | None = None  # set aside while disconnected, caught up from the stream after
+        self._backlog: list[str] | None = None  # tokens announced while a rebuild is running
+        self._task: asyncio.Task[None] | None = None
+        self._rebuild_task: asyncio.Task[None] | None = None
+
+    @property
+    def is_ready(self) -> bool:
+        return self._filter is not None
+
+    def may_contain(self, token: str) -> bool:
+        return self._filter is None or token in self._filter
+
+    def add(self, tokens: Iterable[str]) -> None:
+        tokens = list(tokens)
+        if self._backlog is not None:
+            self._backlog.extend(tokens)
+        if (bloom := self._filter if self._filter is not None else self._suspended) is None:
+            return
+        for token in tokens:
+            bloom.add(token)
+        if self._filter is not None and self._filter.count > self._filter.capacity and self._backlog is None:
+            self._start_rebuild()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen(), name="token-filter")
+
+    async def stop(self) -> None:
+        for task in (self._rebuild_task, self._task):
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(*(t for t in (self._rebuild_task, self._task) if t is not None), return_exceptions=True)
+        self._filter = self._suspended = None
+
+    async def publish(self, tokens: list[str], *, redis: "Redis | None" = None) -> None:
+        client = redis or get_redis()
+        try:
+            await client.xadd(
+                STREAM,
+                {"origin": self._origin, "tokens": orjson.dumps(tokens)},
+                maxlen=settings.token_filter_stream_max_length,
+                approximate=True,
+            )
+        except Exception as exc:
+            # Without the announcement the other workers would answer 404 for these tokens, so make them all reload.
+            # If even that fails the error propagates: failing the request beats handing out a token that 404s.
+            logger.warning("Failed to announce tokens; resetting every token filter", count=len(tokens), error=str(exc))
+            await client.incr(GENERATION_KEY)
+
+    def _invalidate(self) -> None:
+        self._filter = self._suspended = None
+        if self._rebuild_task is not None:
+            self._rebuild_task.cancel()
+            self._rebuild_task = None
+        self._backlog = None
+
+    def _suspend(self) -> None:
+        # Announcements can't be read meanwhile, so every token may exist until the stream is caught up again.
+        if self._filter is not None:
+            self._filter, self._suspended = None, self._filter
+        if self._rebuild_task is not None:
+            self._rebuild_task.cancel()
+            self._rebuild_task = None
+        self._backlog = None
+
+    def _start_rebuild(self) -> None:
+        if self._rebuild_task is not None and not self._rebuild_task.done():
+            self._rebuild_task.cancel()
+        self._backlog = []
+        self._rebuild_task = asyncio.create_task(self._rebuild(), name="token-filter-rebuild")
+
+    async def _rebuild(self) -> None:
+        # Imported here: the operations check tokens against this module.
+        from source.database.connection import new_session, shard_count
+        from source.database.operations import count_tokens, stream_tokens
+
+        backoff = 1.0
+        while True:
+            try:
+                count = 0
+                for shard in range(shard_count()):
+                    async with new_session(shard) as session:
+                        count += await count_tokens(session)
+                bloom = BloomFilter(
+                    capacity=max(self._min_capacity, 2 * count), false_positive_rate=self._false_positive_rate
+                )
+                for shard in range(shard_count()):
+                    async with new_session(shard) as session:
+                        async for token in stream_tokens(session):
+                            bloom.add(token)
+                break
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Failed to load the token filter; retrying", error=str(exc), retry_in=backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60.0)
+
+        for token in self._backlog or ():
+            bloom.add(token)
+        self._filter, self._backlog = bloom, None
+        logger.info("Token filter loaded", tokens=bloom.count, capacity=bloom.capacity, bits=bloom.size)
+
+    def _apply(self, entries: list[tuple[bytes, dict[bytes, bytes]]]) -> None:
+        for _, fields in entries:
+            if fields.get(b"origin") == self._origin:
+                continue
+            try:
+                self.add(orjson.loads(fields[b"tokens"]))
+            except (ValueError, KeyError, TypeError):
+                continue
+
+    async def _read(self, redis: "Redis", last_id: bytes, *, block_ms: int | None = None) -> bytes | None:
+        # The id of the last entry applied, or None once the stream is caught up.
+        response = await redis.xread({STREAM: last_id}, count=_READ_BATCH, block=block_ms)
+        if not response or not (entries := response[0][1]):
+            return None
+        self._apply(entries)
+        return entries[-1][0]
+
+    async def _can_resume(self, redis: "Redis", last_id: bytes | None) -> bool:
+        if self._suspended is None or last_id is None:
+            return False
+        # Entries after ``last_id`` may have been trimmed when the oldest one left is newer.
+        oldest = await redis.xrange(STREAM, count=1)
+        if not oldest:
+            return last_id == _STREAM_START
+        return _entry_id(oldest[0][0]) <= _entry_id(last_id)
+
+    async def _listen(self) -> None:
+        backoff = 1.0
+        loop = asyncio.get_running_loop()
+        last_id: bytes | None = None
+        generation: bytes | None = None
+        rebuild_at = loop.time() + self._rebuild_interval_seconds
+        while True:
+            redis = get_redis()
+            try:
+                current = await redis.get(GENERATION_KEY)
+                if current == generation and await self._can_resume(redis, last_id):
+                    while (read := await self._read(redis, last_id)) is not None:
+                        last_id = read
+                    self._filter, self._suspended = self._suspended, None
+                else:
+                    # Read before loading: anything announced up to here was committed, so the databases have it.
+                    newest = await redis.xrevrange(STREAM, count=1)
+                    last_id, generation = newest[0][0] if newest else _STREAM_START, current
+                    self._invalidate()
+                    self._start_rebuild()
+                    rebuild_at = loop.time() + self._rebuild_interval_seconds
+                backoff = 1.0
+                while True:
+                    block = min(_GENERATION_POLL_SECONDS, max(0.001, rebuild_at - loop.time()))
+                    last_id = await self._read(redis, last_id, block_ms=math.ceil(block * 1000)) or last_id
+                    if (current := await redis.get(GENERATION_KEY)) != generation:
+                        logger.warning("Token announcements were lost; reloading the token filter")
+                        generation = current
+                        self._invalidate()
+                        self._start_rebuild()
+                        rebuild_at = loop.time() + self._rebuild_interval_seconds
+                    elif loop.time() >= rebuild_at:
+                        self._start_rebuild()
+                        rebuild_at = loop.time() + self._rebuild_interval_seconds
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self._suspend()
+                logger.warning("Token filter stream lost; reconnecting", error=str(exc), retry_in=backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+
+def _entry_id(entry_id: bytes) -> tuple[int, int]:
+    milliseconds, sequence = entry_id.split(b"-")
+    return int(milliseconds), int(sequence)
+
+
+@cache
+def get_token_filter() -> TokenFilter:
+    return TokenFilter(
+        false_positive_rate=settings.token_filter_false_positive_rate,
+        min_capacity=settings.token_filter_min_capacity,
+        rebuild_interval_seconds=settings.token_filter_rebuild_interval_seconds,
+    )
+
+
+def token_may_exist(token: str) -> bool:
+    """False only for tokens that were certainly never issued; always True while the filter is disabled or loading."""
+    return not settings.token_filter_enabled or get_token_filter().may_contain(token)
+
+
+async def announce_tokens(tokens: Iterable[str], *, redis: "Redis | None" = None) -> None:
+    """Tell every API worker about newly committed tokens; call it before returning them to anyone."""
+    if not settings.token_filter_enabled or not (tokens := list(tokens)):
+        return
+    token_filter = get_token_filter()
+    token_filter.add(tokens)
+    await token_filter.publish(tokens, redis=redis)
@@ -0,0 +1,253 @@
+import atexit
+import json
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import IntEnum
+from functools import cache
+from pathlib import Path
+from typing import Any
+
+from structlog import get_logger
+
+from source.settings import settings
+
+logger = get_logger()
+
+TRACEPARENT_HEADER = "traceparent"
+
+# W3C trace context: version-trace_id-parent_id-flags
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class SpanKind(IntEnum):
+    # Values follow the OTLP SpanKind enum.
+    INTERNAL = 1
+    SERVER = 2
+    CLIENT = 3
+    PRODUCER = 4
+    CONSUMER = 5
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: str | None = None
+    kind: SpanKind = SpanKind.INTERNAL
+    attributes: dict[str, Any] = field(default_factory=dict)
+    start_time_ns: int = field(default_factory=time.time_ns)
+    end_time_ns: int | None = None
+    error: str | None = None
+
+    def update_name(self, name: str) -> None:
+        self.name = name
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+
+class _NoopSpan:
+    # Returned when tracing is disabled so call sites never need to check.
+
+    traceparent = None
+
+    def update_name(self, name: str) -> None:
+        pass
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Span | None] = ContextVar("picko_current_span", default=None)
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class FileSpanExporter:
+    """Appends finished spans to a file as OTLP/JSON lines, from a background thread."""
+
+    # Spans beyond ``max_pending`` are dropped (and counted in a warning) rather than buffered without bound.
+
+    def __init__(
+        self, path: str | Path, *, service_name: str, max_pending: int = 10_000, batch_size: int = 500
+    ) -> None:
+        self._path = Path(path)
+        self._service_name = service_name
+        self._max_pending = max_pending
+        self._batch_size = batch_size
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._queue: queue.Queue[Span] = queue.Queue(maxsize=max_pending)
+        self._dropped = 0
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+
+    def _to_otlp(self, span: Span) -> dict[str, Any]:
+        otlp_span: dict[str, Any] = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": int(span.kind),
+            "startTimeUnixNano": str(span.start_time_ns),
+            "endTimeUnixNano": str(span.end_time_ns or span.start_time_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in span.attributes.items() if v is not None],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        }
+        if span.parent_span_id:
+            otlp_span["parentSpanId"] = span.parent_span_id
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [{"key": "service.name", "value": _otlp_value(self._service_name)}]},
+                    "scopeSpans": [{"scope": {"name": "picko"}, "spans": [otlp_span]}],
+                }
+            ]
+        }
+
+    def export(self, span: Span) -> None:
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self._dropped += 1
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # A forked process (Celery prefork) inherits the queue but not the thread draining it.
+            if self._pid is None:
+                atexit.register(self.flush)
+            self._queue = queue.Queue(maxsize=self._max_pending)
+            self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _run(self) -> None:
+        while True:
+            spans = [self._queue.get()]
+            spans.extend(self._drain(self._batch_size - 1))
+            self._write(spans)
+
+    def _drain(self, limit: int) -> list[Span]:
+        spans = []
+        while len(spans) < limit:
+            try:
+                spans.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return spans
+
+    def _write(self, spans: list[Span]) -> None:
+        if dropped := self._dropped:
+            self._dropped -= dropped
+            logger.warning("Dropped spans; the exporter fell behind", dropped=dropped)
+        lines = [json.dumps(self._to_otlp(span), separators=(",", ":")) + "\n" for span in spans]
+        try:
+            with self._write_lock, self._path.open("a", encoding="utf-8") as fh:
+                fh.writelines(lines)
+        except OSError as exc:
+            logger.warning("Failed to export spans", count=len(spans), error=str(exc))
+        for _ in spans:
+            self._queue.task_done()
+
+    def flush(self) -> None:
+        """Write the spans still queued and wait for the batch being written; registered to run at interpreter exit."""
+        while spans := self._drain(self._batch_size):
+            self._write(spans)
+        if self._pid == os.getpid():
+            self._queue.join()
+
+
+@cache
+def _get_exporter() -> FileSpanExporter | None:
+    if not settings.trace_export_path:
+        return None
+    return FileSpanExporter(settings.trace_export_path, service_name=settings.trace_service_name)
+
+
+def parse_traceparent(value: str | None) -> tuple[str, str] | None:
+    """Return ``(trace_id, parent_span_id)`` from a ``traceparent`` header, or None if it is missing or invalid."""
+    if not value or not (match := _TRACEPARENT_RE.match(value.strip().lower())):
+        return None
+    trace_id, span_id, _ = match.groups()
+    if trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return trace_id, span_id
+
+
+def inject_trace_headers() -> dict[str, str]:
+    """Headers carrying the current trace context, for Celery messages or outgoing HTTP requests."""
+    if (span := _current_span.get()) is None:
+        return {}
+    return {TRACEPARENT_HEADER: span.traceparent}
+
+
+@contextmanager
+def start_span(
+    name: str,
+    *,
+    kind: SpanKind = SpanKind.INTERNAL,
+    traceparent: str | None = None,
+    attributes: dict[str, Any] | None = None,
+) -> Iterator[Span | _NoopSpan]:
+    """Open a child span of the current one, or of ``traceparent``; a no-op while ``trace_export_path`` is unset."""
+    if (exporter := _get_exporter()) is None:
+        yield _NOOP_SPAN
+        return
+
+    if (remote := parse_traceparent(traceparent)) is not None:
+        trace_id, parent_span_id = remote
+    elif (parent := _current_span.get()) is not None:
+        trace_id, parent_span_id = parent.trace_id, parent.span_id
+    else:
+        trace_id, parent_span_id = secrets.token_hex(16), None
+
+    span = Span(
+        name=name,
+        trace_id=trace_id,
+        span_id=secrets.token_hex(8),
+        parent_span_id=parent_span_id,
+        kind=kind,
+        attributes=dict(attributes or {}),
+    )
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as exc:
+        span.record_exception(exc)
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end_time_ns = time.time_ns()
+        exporter.export(span)
@@ -0,0 +1,119 @@
+import datetime
+import os
+import subprocess
+import sys
+from collections.abc import AsyncIterator, Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+import httpx
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Settings are read on first use, so this only has to happen before the first test. Nothing below needs Redis, a
+# Celery broker or Resend: the features that would reach them are off, and draws are scheduled into the void.
+os.environ.update(
+    DATABASE_URL="sqlite:///unused.db",  # replaced by the `database_url` fixture
+    REDIS_URL="redis://localhost:1/0",
+    CORS_ORIGINS="http://localhost:3000",
+    EMAIL_FROM="picko@example.com",
+    RESEND_API_KEY="test",
+    REGISTRATION_CACHE_SHARED="false",
+    EVENT_STREAM_ENABLED="false",
+    TOKEN_FILTER_ENABLED="false",
+    RATE_LIMIT_ENABLED="false",
+    SQL_PROFILE_ENABLED="true",  # query budgets count through the profiler
+)
+
+
+def _migrate(database_url: str, *args: str) -> None:
+    # In a subprocess: alembic's env.py runs its own event loop.
+    subprocess.run(
+        [sys.executable, "-m", "alembic", *args],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "DATABASE_URL": database_url},
+        check=True,
+        capture_output=True,
+    )
+
+
+def use_database(database_url: str) -> None:
+    from source.database.connection import get_engine, get_sessionmaker
+    from source.settings import get_settings
+
+    os.environ["DATABASE_URL"] = database_url
+    for cached in (get_settings, get_engine, get_sessionmaker):
+        cached.cache_clear()
+
+
+@pytest.fixture(scope="session")
+def migrate() -> Callable[..., None]:
+    return _migrate
+
+
+@pytest.fixture(scope="session")
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def database_url(tmp_path_factory: pytest.TempPathFactory) -> str:
+    url = f"sqlite:///{tmp_path_factory.mktemp('database') / 'picko.db'}"
+    _migrate(url, "upgrade", "head")
+    use_database(url)
+    return url
+
+
+@pytest.fixture
+async def client(database_url: str, monkeypatch: pytest.MonkeyPatch) -> AsyncIterator[httpx.AsyncClient]:
+    from source.app import app
+    from source.database.connection import get_engine
+
+    monkeypatch.setattr("source.endpoints.event.schedule_draw", lambda *args, **kwargs: "scheduled")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    await get_engine(0).dispose()
+
+
+@pytest.fixture
+def register(client: httpx.AsyncClient) -> Callable[..., Awaitable[dict[str, Any]]]:
+    async def _register(registration_token: str, **fields: Any) -> dict[str, Any]:
+        response = await client.post(f"/event/register/{registration_token}", json=fields)
+        assert response.status_code == 201, response.text
+        return response.json()
+
+    return _register
+
+
+@pytest.fixture
+def create_event(
+    client: httpx.AsyncClient, register: Callable[..., Awaitable[dict[str, Any]]]
+) -> Callable[..., Awaitable[dict[str, Any]]]:
+    async def _create(*, participants: int = 0, **fields: Any) -> dict[str, Any]:
+        deadline = datetime.datetime.now(datetime.UTC) + datetime.timedelta(hours=1)
+        response = await client.post(
+            "/event",
+            json={"name": "Office party", "currency": None, "registration_deadline": deadline.isoformat(), **fields},
+        )
+        assert response.status_code == 201, response.text
+        event = response.json()
+        event["participants"] = [
+            await register(event["registration_token"], name=f"Participant {i}") for i in range(participants)
+        ]
+        return event
+
+    return _create
+
+
+@pytest.fixture
+def draw(database_url: str) -> Callable[[int], Awaitable[list[str]]]:
+    async def _draw(event_id: int) -> list[str]:
+        from source.database.connection import new_session
+        from source.database.operations import execute_draw, get_event_summary
+
+        async with new_session() as session:
+            event = await get_event_summary(session, event_id=event_id, lock=True)
+            return await execute_draw(session, event)
+
+    return _draw
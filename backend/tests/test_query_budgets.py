@@ -0,0 +1,46 @@
+import pytest
+
+from source.database.profiling import assert_query_budget
+
+pytestmark = pytest.mark.anyio
+
+# The statements each hot endpoint may run; none of them may grow with the number of participants.
+
+
+async def test_get_event(client, create_event):
+    event = await create_event(participants=5)
+
+    with assert_query_budget(5, label="GET /event/{event_id}"):
+        response = await client.get(f"/event/{event['id']}")
+
+    assert response.status_code == 200
+    assert len(response.json()["participants"]) == 5
+
+
+async def test_register(client, create_event):
+    event = await create_event(participants=5)
+
+    with assert_query_budget(4, label="POST /event/register/{token}"):
+        response = await client.post(f"/event/register/{event['registration_token']}", json={"name": "Newcomer"})
+
+    assert response.status_code == 201
+
+
+async def test_reveal(client, create_event, draw):
+    event = await create_event(participants=5)
+    reveal_token, *_ = await draw(event["id"])
+
+    with assert_query_budget(4, label="GET /draw/reveal/{token}"):
+        response = await client.get(f"/draw/reveal/{reveal_token}")
+
+    assert response.status_code == 200
+
+
+async def test_participant_me(client, create_event, draw):
+    event = await create_event(participants=5)
+    await draw(event["id"])
+
+    with assert_query_budget(4, label="GET /participant/me/{access_token}"):
+        response = await client.get(f"/participant/me/{event['participants'][0]['access_token']}")
+
+    assert response.status_code == 200
@@ -0,0 +1,390 @@
+import datetime
+import json
+import os
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+from dataclasses import dataclass, field
+from typing import Any
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from source.database.operations import (
+    get_assignment_by_token,
+    get_event,
+    get_event_by_registration_token,
+    get_event_summary,
+    get_event_summary_by_registration_token,
+    get_participant_by_access_token,
+    get_pending_draw_events,
+    insert_participants,
+    list_events,
+    mark_participants_notified,
+    stream_email_recipients,
+)
+from source.settings import EventStateSelection, LanguageSelection
+
+# The hot queries run against a seeded scratch Postgres database and their statements again under EXPLAIN:
+#     TEST_POSTGRES_URL=postgresql://picko@localhost:5432/picko_plans uv run pytest tests/test_query_plans.py
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+pytestmark = [pytest.mark.anyio, pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL is not set")]
+
+EVENTS = 50_000
+LARGE_EVENTS = 5
+LARGE_EVENT_SIZE = 20_000
+
+# Tables big enough that a sequential scan on a request path is a regression.
+LARGE_TABLES = frozenset({"event", "participant", "assignment", "draw"})
+
+# Participants per small event range over 2..38 (20 on average); nine in ten events are drawn.
+_SEED_EVENTS_SQL = """
+INSERT INTO event (
+    id, name, currency, registration_deadline, registration_token, organiser_token,
+    is_draw_complete, drawn_at, notified_at, participant_count
+)
+SELECT
+    i,
+    'Event ' || i,
+    'EUR',
+    deadline,
+    '00' || left(md5('registration' || i) || md5('registration:' || i), 43),
+    '00' || left(md5('organiser' || i) || md5('organiser:' || i), 43),
+    i % 10 <> 0,
+    CASE WHEN i % 10 <> 0 THEN deadline END,
+    CASE WHEN i % 10 > 1 THEN deadline + interval '1 hour' END,
+    CASE WHEN i <= CAST(:events AS integer) THEN 2 + (i * 7919) % 37 ELSE CAST(:large_event_size AS integer) END
+FROM generate_series(1, CAST(:events AS integer) + CAST(:large_events AS integer)) AS i
+CROSS JOIN LATERAL (
+    SELECT CASE
+        WHEN i > CAST(:events AS integer) THEN now() - interval '1 hour'  -- large events: drawn, emails going out
+        WHEN i % 10 = 0 THEN now() + (i % 2000) * interval '1 hour'  -- open
+        ELSE now() - (i % 9000) * interval '1 hour'
+    END AS deadline
+) AS deadlines
+"""
+
+_SEED_PARTICIPANTS_SQL = """
+INSERT INTO participant (event_id, name, email, language, access_token, notified_at)
+SELECT
+    e.id,
+    'Participant ' || g,
+    'participant' || g || '@example.com',
+    CAST(CASE WHEN g % 3 = 0 THEN 'EN' ELSE 'PL' END AS languageselection),
+    '00' || left(md5('access' || e.id || ':' || g) || md5('access:' || e.id || ':' || g), 43),
+    e.notified_at
+FROM event AS e
+CROSS JOIN LATERAL generate_series(1, e.participant_count) AS g
+"""
+
+_SEED_DRAWS_SQL = "INSERT INTO draw (event_id, created_at) SELECT id, drawn_at FROM event WHERE is_draw_complete"
+
+# Everybody gives to the next participant of their event, the last one to the first.
+_SEED_ASSIGNMENTS_SQL = """
+INSERT INTO assignment (draw_id, giver_id, receiver_id, reveal_token)
+SELECT
+    d.id,
+    p.id,
+    coalesce(lead(p.id) OVER w, first_value(p.id) OVER w),
+    '00' || left(md5('reveal' || p.id) || md5('reveal:' || p.id), 43)
+FROM participant AS p
+JOIN draw AS d ON d.event_id = p.event_id
+WINDOW w AS (PARTITION BY p.event_id ORDER BY p.id)
+"""
+
+
+@dataclass(frozen=True)
+class Samples:
+    # Keys of seeded rows the queries look up.
+    event_id: int
+    large_event_id: int
+    large_registration_token: str
+    access_token: str
+    reveal_token: str
+    large_event_names: list[str]
+    cursor: tuple[datetime.datetime, int]
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    name: str
+    run: Callable[[AsyncSession, Samples], Awaitable[Any]]
+    # Each entry is one lookup and the indexes that may serve it; at least one of them must show up in the plans.
+    indexes: tuple[tuple[str, ...], ...]
+    max_buffers: int
+
+
+async def _register(session: AsyncSession, samples: Samples) -> Any:
+    participant = {"name": "Query plan check", "email": None, "language": LanguageSelection.EN, "wishlist": None}
+    return await insert_participants(session, [{**participant, "event_id": samples.large_event_id}])
+
+
+async def _stream_recipients(session: AsyncSession, samples: Samples) -> Any:
+    recipients = stream_email_recipients(session, event_id=samples.large_event_id, only_unnotified=True)
+    return [row async for row in recipients]
+
+
+async def _mark_notified(session: AsyncSession, samples: Samples) -> Any:
+    now = datetime.datetime.now(datetime.UTC)
+    await mark_participants_notified(
+        session, event_id=samples.large_event_id, names=samples.large_event_names, notified_at=now
+    )
+
+
+def _list_events(state: EventStateSelection | None) -> Callable[[AsyncSession, Samples], Awaitable[Any]]:
+    async def _run(session: AsyncSession, samples: Samples) -> Any:
+        return await list_events(session, limit=50, after=samples.cursor, state=state)
+
+    return _run
+
+
+async def _get_pending_draws(session: AsyncSession, samples: Samples) -> Any:
+    now = datetime.datetime.now(datetime.UTC)
+    return await get_pending_draw_events(session, deadline_from=now, deadline_to=now + datetime.timedelta(days=1))
+
+
+_PARTICIPANTS_BY_EVENT = ("ix_participant_event_id", "uq_participant_event_id_name")
+
+HOT_QUERIES = (
+    HotQuery(
+        "event-summary",
+        lambda session, samples: get_event_summary(session, event_id=samples.event_id, lock=True),
+        (("event_pkey",),),
+        max_buffers=20,
+    ),
+    HotQuery(
+        "event-page",
+        lambda session, samples: get_event(session, event_id=samples.event_id),
+        (("event_pkey",), _PARTICIPANTS_BY_EVENT, ("ix_assignment_giver_id",), ("ix_draw_event_id",)),
+        max_buffers=400,
+    ),
+    HotQuery(
+        "registration-summary",
+        lambda session, samples: get_event_summary_by_registration_token(
+            session, registration_token=samples.large_registration_token
+        ),
+        (("event_registration_token_key",),),
+        max_buffers=20,
+    ),
+    HotQuery(
+        "registration-page",
+        lambda session, samples: get_event_by_registration_token(
+            session, registration_token=samples.large_registration_token
+        ),
+        (
+            ("event_registration_token_key",),
+            _PARTICIPANTS_BY_EVENT,
+            ("ix_assignment_giver_id",),
+            ("ix_draw_event_id",),
+        ),
+        max_buffers=100_000,
+    ),
+    HotQuery(
+        "reveal",
+        lambda session, samples: get_assignment_by_token(session, reveal_token=samples.reveal_token),
+        (("assignment_reveal_token_key",), ("participant_pkey",), ("event_pkey",)),
+        max_buffers=40,
+    ),
+    HotQuery(
+        "participant-status",
+        lambda session, samples: get_participant_by_access_token(session, access_token=samples.access_token),
+        (("participant_access_token_key",), ("event_pkey",), ("ix_assignment_giver_id",), ("participant_pkey",)),
+        max_buffers=40,
+    ),
+    HotQuery("register", _register, (("uq_participant_event_id_name",), ("event_pkey",)), max_buffers=60),
+    HotQuery(
+        "notify-stream",
+        _stream_recipients,
+        (_PARTICIPANTS_BY_EVENT, ("ix_assignment_giver_id", "uq_assignment_draw_id_giver_id")),
+        max_buffers=120_000,
+    ),
+    # Mostly index maintenance: the rows are not HOT-updated on full pages, so every index gets a new entry.
+    HotQuery("mark-notified", _mark_notified, (_PARTICIPANTS_BY_EVENT,), max_buffers=5_000),
+    HotQuery("list-events", _list_events(None), (("ix_event_registration_deadline_id",),), max_buffers=100),
+    HotQuery(
+        "list-events-open",
+        _list_events(EventStateSelection.OPEN),
+        (("ix_event_open_registration_deadline_id",),),
+        max_buffers=100,
+    ),
+    HotQuery(
+        "list-events-drawn",
+        _list_events(EventStateSelection.DRAWN),
+        (("ix_event_drawn_registration_deadline_id",),),
+        max_buffers=100,
+    ),
+    HotQuery(
+        "list-events-notified",
+        _list_events(EventStateSelection.NOTIFIED),
+        (("ix_event_notified_registration_deadline_id",),),
+        max_buffers=100,
+    ),
+    HotQuery("pending-draws", _get_pending_draws, (("ix_event_open_registration_deadline_id",),), max_buffers=200),
+)
+
+
+@dataclass
+class StatementRecorder:
+    # Collects the statements (and their driver-level parameters) sent while ``recording`` is set.
+    recording: bool = False
+    statements: list[tuple[str, Any]] = field(default_factory=list)
+
+    def __call__(
+        self, conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+    ) -> None:
+        if self.recording and not executemany:
+            self.statements.append((statement, parameters))
+
+
+@dataclass(frozen=True)
+class PlansDatabase:
+    engine: AsyncEngine
+    sessionmaker: async_sessionmaker[AsyncSession]
+    recorder: StatementRecorder
+    samples: Samples
+
+
+@dataclass
+class Plan:
+    indexes: set[str] = field(default_factory=set)
+    seq_scans: set[str] = field(default_factory=set)
+    buffers: int = 0
+    nodes: list[str] = field(default_factory=list)
+
+
+async def _seed(session: AsyncSession) -> None:
+    params = {"events": EVENTS, "large_events": LARGE_EVENTS, "large_event_size": LARGE_EVENT_SIZE}
+    await session.execute(text(_SEED_EVENTS_SQL), params)
+    await session.execute(text(_SEED_PARTICIPANTS_SQL))
+    await session.execute(text(_SEED_DRAWS_SQL))
+    await session.execute(text(_SEED_ASSIGNMENTS_SQL))
+    await session.execute(text("SELECT setval('event_id_seq', (SELECT max(id) FROM event))"))
+    await session.commit()
+    await session.execute(text("ANALYZE"))
+    await session.commit()
+
+
+async def _samples(session: AsyncSession) -> Samples:
+    large = (
+        await session.execute(
+            text("SELECT id, registration_token FROM event ORDER BY participant_count DESC, id LIMIT 1")
+        )
+    ).one()
+    event_count = (await session.execute(text("SELECT count(*) FROM event"))).scalar_one()
+    event_id = (
+        await session.execute(
+            text("SELECT id FROM event WHERE notified_at IS NOT NULL ORDER BY id LIMIT 1 OFFSET :offset"),
+            {"offset": event_count // 2},
+        )
+    ).scalar_one()
+    names = (
+        await session.execute(
+            text("SELECT name FROM participant WHERE event_id = :event_id ORDER BY id LIMIT 100"),
+            {"event_id": large.id},
+        )
+    ).scalars()
+    access_token = (
+        await session.execute(
+            text("SELECT access_token FROM participant WHERE event_id = :event_id ORDER BY id LIMIT 1"),
+            {"event_id": event_id},
+        )
+    ).scalar_one()
+    reveal_token = (
+        await session.execute(
+            text(
+                "SELECT reveal_token FROM assignment WHERE id >= (SELECT max(id) / 2 FROM assignment) ORDER BY id "
+                "LIMIT 1"
+            )
+        )
+    ).scalar_one()
+    cursor = (
+        await session.execute(
+            text(
+                "SELECT registration_deadline, id FROM event ORDER BY registration_deadline, id OFFSET :offset LIMIT 1"
+            ),
+            {"offset": event_count // 2},
+        )
+    ).one()
+    return Samples(
+        event_id=event_id,
+        large_event_id=large.id,
+        large_registration_token=large.registration_token,
+        access_token=access_token,
+        reveal_token=reveal_token,
+        large_event_names=list(names),
+        cursor=(cursor.registration_deadline, cursor.id),
+    )
+
+
+def _walk(node: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", ()):
+        yield from _walk(child)
+
+
+def _describe(node: dict[str, Any]) -> str:
+    description = node["Node Type"]
+    if index := node.get("Index Name"):
+        description += f" using {index}"
+    if relation := node.get("Relation Name"):
+        description += f" on {relation}"
+    return description
+
+
+@pytest.fixture(scope="session")
+async def plans_database(migrate: Callable[..., None]) -> AsyncIterator[PlansDatabase]:
+    migrate(POSTGRES_URL, "upgrade", "head")
+    engine = create_async_engine(POSTGRES_URL.replace("postgresql://", "postgresql+asyncpg://"))
+    # The shard is kept on the session like the app's own sessions, for the operations issuing tokens.
+    sessionmaker = async_sessionmaker(bind=engine, expire_on_commit=False, autoflush=False, info={"shard": 0})
+    try:
+        async with sessionmaker() as session:
+            if not await session.scalar(text("SELECT count(*) FROM event")):
+                await _seed(session)
+            samples = await _samples(session)
+        recorder = StatementRecorder()
+        event.listen(engine.sync_engine, "before_cursor_execute", recorder)
+        yield PlansDatabase(engine=engine, sessionmaker=sessionmaker, recorder=recorder, samples=samples)
+    finally:
+        await engine.dispose()
+
+
+async def _explain(database: PlansDatabase, query: HotQuery) -> Plan:
+    recorder = database.recorder
+    recorder.statements.clear()
+    async with database.sessionmaker() as session:
+        recorder.recording = True
+        try:
+            await query.run(session, database.samples)
+        finally:
+            recorder.recording = False
+            await session.rollback()
+
+    plan = Plan()
+    async with database.engine.connect() as conn:
+        for statement, parameters in list(recorder.statements):
+            result = await conn.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters)
+            explained = result.scalar_one()
+            root = (json.loads(explained) if isinstance(explained, str) else explained)[0]["Plan"]
+            plan.buffers += root.get("Shared Hit Blocks", 0) + root.get("Shared Read Blocks", 0)
+            for node in _walk(root):
+                plan.nodes.append(_describe(node))
+                plan.indexes.update(filter(None, [node.get("Index Name")]))
+                plan.indexes.update(node.get("Conflict Arbiter Indexes", ()))
+                if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in LARGE_TABLES:
+                    plan.seq_scans.add(node["Relation Name"])
+        await conn.rollback()
+    return plan
+
+
+@pytest.mark.parametrize("query", HOT_QUERIES, ids=lambda query: query.name)
+async def test_query_plan(plans_database: PlansDatabase, query: HotQuery) -> None:
+    plan = await _explain(plans_database, query)
+    nodes = ", ".join(dict.fromkeys(plan.nodes))
+
+    missing = [
+        " or ".join(alternatives) for alternatives in query.indexes if not plan.indexes.intersection(alternatives)
+    ]
+    assert not missing, f"{query.name} does not use {missing}; plan: {nodes}"
+    assert not plan.seq_scans, f"{query.name} scans {sorted(plan.seq_scans)} sequentially; plan: {nodes}"
+    assert plan.buffers <= query.max_buffers, f"{query.name} touched {plan.buffers} shared buffers; plan: {nodes}"
@@ -0,0 +1,54 @@
+import asyncio
+import datetime
+import importlib
+
+import pytest
+from sqlalchemy import func, select, update
+
+from source.database.connection import new_session
+from source.database.models import Assignment, Draw, Event
+
+
+def test_migrations_round_trip(migrate, tmp_path):
+    url = f"sqlite:///{tmp_path / 'migrations.db'}"
+
+    migrate(url, "upgrade", "head")
+    migrate(url, "check")  # the models and the migrated schema agree
+    migrate(url, "downgrade", "base")
+    migrate(url, "upgrade", "head")
+
+
+@pytest.mark.anyio
+async def test_register_and_draw(client, create_event, register):
+    event = await create_event()
+
+    # Every registration takes the database-wide write lock; concurrent ones wait for it rather than fail.
+    await asyncio.gather(*(register(event["registration_token"], name=f"Guest {i}") for i in range(20)))
+
+    async with new_session() as session:
+        await session.execute(
+            update(Event)
+            .where(Event.id == event["id"])
+            .values(registration_deadline=datetime.datetime.now(datetime.UTC) - datetime.timedelta(seconds=1))
+        )
+        await session.commit()
+
+    tasks = importlib.import_module("source.tasks.draw")  # the package attribute is the Celery task
+    results = await asyncio.gather(*(tasks._draw_and_notify_async(event["id"]) for _ in range(2)))
+
+    assert sorted(result.get("draw_executed", False) for result in results) == [False, True]
+    async with new_session() as session:
+        drawn = await session.get(Event, event["id"])
+        assignments = await session.scalar(
+            select(func.count()).select_from(Assignment).join(Draw).where(Draw.event_id == event["id"])
+        )
+    assert drawn.participant_count == 20
+    assert drawn.drawn_at.tzinfo is datetime.UTC  # read back from SQLite as aware UTC
+    assert drawn.notified_at > drawn.registration_deadline
+    assert assignments == 20  # drawn once
+
+    response = await client.get(f"/event/{event['id']}")
+    assert response.json()["is_draw_complete"] is True
+    assert datetime.datetime.fromisoformat(response.json()["registration_deadline"]).utcoffset() == datetime.timedelta(
+        0
+    )
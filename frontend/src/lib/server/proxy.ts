@@ -15,6 +15,7 @@ function getApiBaseUrl(): string {
 type ProxyEvent = {
 	request: Request;
 	fetch: typeof fetch;
+	getClientAddress: () => string;
 };
 
 type ProxyToBackendOptions = {
@@ -36,7 +37,8 @@ export async function proxyToBackend(
 	const forwardBody = opts.forwardBody ?? (method !== 'GET' && method !== 'HEAD');
 
 	let body: string | undefined;
-	const headers: Record<string, string> = {};
+	// The backend rate-limits per client, so pass on who the request actually came from.
+	const headers: Record<string, string> = { 'x-forwarded-for': event.getClientAddress() };
 
 	if (forwardBody) {
 		body = await event.request.text();
@@ -49,10 +51,16 @@ export async function proxyToBackend(
 		body
 	});
 
+	const responseHeaders: Record<string, string> = {
+		'content-type': upstream.headers.get('content-type') ?? 'application/json'
+	};
+	const retryAfter = upstream.headers.get('retry-after');
+	if (retryAfter) {
+		responseHeaders['retry-after'] = retryAfter;
+	}
+
 	return new Response(await upstream.text(), {
 		status: upstream.status,
-		headers: {
-			'content-type': upstream.headers.get('content-type') ?? 'application/json'
-		}
+		headers: responseHeaders
 	});
 }